@@ -2,16 +2,20 @@
 FastAPI dependencies for authentication and common services.
 Reusable dependencies for clean endpoint code.
 """
-from typing import Optional
+from typing import Callable, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.security import verify_token
 from app.database import get_async_session
 from app.models.user import User
+from app.schemas.user import ResponseSchema, parse_fields
+from app.services.loader import UserLoader, get_user_loader
 from app.services.user import UserService
+from app.services.user_cache import get_user_cache
 
 # Security scheme
 security = HTTPBearer()
@@ -20,17 +24,57 @@ security = HTTPBearer()
 async def get_user_service(
     db: AsyncSession = Depends(get_async_session)
 ) -> UserService:
-    """Dependency to get user service instance."""
+    """Dependency to get user service instance (sharded if SHARD_URLS is set)."""
+    if settings.SHARD_URLS:
+        from app.services.sharded_user import ShardedUserService
+        from app.sharding import get_shard_router
+
+        return ShardedUserService(db, get_shard_router())
     return UserService(db)
 
 
+async def get_user_loader_dependency() -> UserLoader:
+    """Dependency to get the batching user loader for this event loop."""
+    return get_user_loader()
+
+
+def sparse_fields(model: type[ResponseSchema]) -> Callable:
+    """
+    Dependency factory for a ``fields=`` query parameter checked against ``model``.
+    
+    The dependency returns the field names in schema order, or None when
+    the parameter is absent (full response).
+    """
+    async def dependency(
+        fields: Optional[str] = Query(
+            None,
+            description=f"Comma-separated {model.__name__} fields to return, e.g. id,email,username"
+        )
+    ) -> Optional[tuple[str, ...]]:
+        if fields is None:
+            return None
+        try:
+            return parse_fields(fields, model)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    return dependency
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    user_service: UserService = Depends(get_user_service)
+    user_loader: UserLoader = Depends(get_user_loader_dependency)
 ) -> User:
     """
     Dependency to get current authenticated user.
     
+    The lookup is served from the per-worker user cache when possible;
+    otherwise it goes through the batching user loader, so concurrent
+    requests share one IN query instead of one SELECT each.
+    
     Raises:
         HTTPException: If token is invalid or user not found
     """
@@ -50,10 +94,15 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    # Get user from database
-    user = await user_service.get_user_by_id(int(user_id))
+    # Get user from the cache, or the database
+    cache = get_user_cache()
+    user = cache.get(int(user_id))
     if user is None:
-        raise credentials_exception
+        epoch = cache.epoch
+        user = await user_loader.load(int(user_id))
+        if user is None:
+            raise credentials_exception
+        cache.put(user, epoch)
     
     # Check if user is active
     if not user.is_active:
@@ -0,0 +1,117 @@
+"""
+Administrative endpoints for runtime diagnostics.
+Superuser-only views into database and process internals.
+"""
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.api.dependencies import get_current_superuser
+from app.core import query_log
+from app.core.config import settings
+from app.core.pool import pool_snapshot
+from app.core.sql_budget import sql_budget
+from app.database import get_engine
+from app.models.user import User
+
+router = APIRouter()
+
+
+@router.get(
+    "/pool",
+    dependencies=[Depends(sql_budget(1))],  # auth lookup
+)
+async def get_pool_stats(
+    _: User = Depends(get_current_superuser)  # Only superusers can inspect the pool
+) -> Any:
+    """
+    Get database connection pool metrics.
+
+    **Requires superuser privileges.**
+
+    Returns:
+    - Pool size, in-use, idle and overflow connections
+    - Checkout count, timeouts and checkout wait histogram
+    - Connects, disconnects, invalidations and open connection age
+    """
+    return pool_snapshot(get_engine().pool)
+
+
+@router.get(
+    "/query-log",
+    dependencies=[Depends(sql_budget(1))],  # auth lookup
+)
+async def get_query_log(
+    _: User = Depends(get_current_superuser)
+) -> Any:
+    """
+    Get slow-query log settings and the slowest captured statement shapes.
+
+    **Requires superuser privileges.**
+
+    Shapes are only captured while EXPLAIN capture is enabled.
+    """
+    return {
+        "threshold_ms": settings.SLOW_QUERY_THRESHOLD_MS,
+        "sample_rate": settings.QUERY_LOG_SAMPLE_RATE,
+        "explain_enabled": query_log.state.explain_enabled,
+        "slowest": [
+            {
+                "statement": captured.shape,
+                "slowest_ms": round(captured.duration_ms, 3),
+                "executions": captured.executions,
+            }
+            for captured in query_log.state.slowest(settings.QUERY_LOG_EXPLAIN_LIMIT)
+        ],
+    }
+
+
+@router.put(
+    "/query-log/explain",
+    dependencies=[Depends(sql_budget(1))],  # auth lookup
+)
+async def toggle_explain_capture(
+    enabled: bool = Query(..., description="Capture slowest shapes for EXPLAIN"),
+    _: User = Depends(get_current_superuser)
+) -> Any:
+    """
+    Enable or disable capture of the slowest statement shapes.
+
+    **Requires superuser privileges.**
+
+    Disabling clears everything captured so far.
+    """
+    query_log.state.explain_enabled = enabled
+    if not enabled:
+        query_log.state.captured.clear()
+    return {"explain_enabled": enabled}
+
+
+@router.post(
+    "/query-log/explain",
+    dependencies=[Depends(sql_budget(settings.QUERY_LOG_EXPLAIN_LIMIT + 1))],  # auth + one per shape
+)
+async def explain_slowest_queries(
+    _: User = Depends(get_current_superuser)
+) -> Any:
+    """
+    Run EXPLAIN (ANALYZE, BUFFERS) on the slowest captured SELECT shapes.
+
+    **Requires superuser privileges.**
+
+    ANALYZE re-executes each statement; only SELECTs are explained.
+    """
+    if not query_log.state.explain_enabled:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="EXPLAIN capture is disabled"
+        )
+
+    try:
+        plans = await query_log.explain_slowest(get_engine(), settings.QUERY_LOG_EXPLAIN_LIMIT)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {"plans": plans}
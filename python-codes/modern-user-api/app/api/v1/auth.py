@@ -3,13 +3,15 @@ Authentication endpoints for login, register, and token management.
 Modern JWT authentication with comprehensive error handling.
 """
 from datetime import timedelta
-from typing import Any
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.api.dependencies import get_current_user, get_user_service
+from app.api.dependencies import get_current_user, get_user_service, sparse_fields
 from app.core.config import settings
+from app.core.idempotency import IdempotentRoute, idempotent
+from app.core.sql_budget import sql_budget
 from app.core.security import create_access_token
 from app.models.user import User
 from app.schemas.user import (
@@ -21,20 +23,28 @@ from app.schemas.user import (
     UserResponse
 )
 from app.schemas.user import (
+    Availability,
     PasswordChange,
     Token,
     UserCreate,
     UserDetail,
     UserLogin,
     UserResponse,
-    UserUpdate  # Bu eksikti!
+    UserUpdate,  # Bu eksikti!
+    sparse_model
 )
 from app.services.user import UserService
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
 
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(sql_budget(4))],  # email check + username check + insert + refresh
+)
+@idempotent
 async def register(
     user_data: UserCreate,
     user_service: UserService = Depends(get_user_service)
@@ -62,7 +72,44 @@ async def register(
         )
 
 
-@router.post("/login", response_model=Token)
+@router.get(
+    "/availability",
+    response_model=Availability,
+    response_model_exclude_none=True,
+    dependencies=[Depends(sql_budget(2))],  # email check + username check, skipped on filter misses
+)
+async def check_availability(
+    email: Optional[str] = Query(None, max_length=255, description="Email to check"),
+    username: Optional[str] = Query(None, max_length=50, description="Username to check"),
+    user_service: UserService = Depends(get_user_service)
+) -> Any:
+    """
+    Check whether an email and/or username is still free.
+    
+    For live checks in signup forms. Names the per-worker availability
+    filter has never seen are answered without a database query. The
+    answer is advisory: registration re-checks, and can still report a
+    name taken in the meantime.
+    """
+    if email is None and username is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide an email and/or a username"
+        )
+    
+    result = {}
+    if email is not None:
+        result["email_available"] = not await user_service.email_taken(email)
+    if username is not None:
+        result["username_available"] = not await user_service.username_taken(username)
+    return result
+
+
+@router.post(
+    "/login",
+    response_model=Token,
+    dependencies=[Depends(sql_budget(2))],  # lookup + login tracking update
+)
 async def login(
     login_data: UserLogin,
     user_service: UserService = Depends(get_user_service)
@@ -101,7 +148,11 @@ async def login(
     }
 
 
-@router.post("/login/form", response_model=Token)
+@router.post(
+    "/login/form",
+    response_model=Token,
+    dependencies=[Depends(sql_budget(2))],  # lookup + login tracking update
+)
 async def login_form(
     form_data: OAuth2PasswordRequestForm = Depends(),
     user_service: UserService = Depends(get_user_service)
@@ -136,19 +187,32 @@ async def login_form(
     }
 
 
-@router.get("/me", response_model=UserDetail)
+@router.get(
+    "/me",
+    response_model=UserDetail,
+    dependencies=[Depends(sql_budget(1))],  # auth lookup
+)
 async def get_current_user_info(
+    fields: Optional[tuple[str, ...]] = Depends(sparse_fields(UserDetail)),
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Get current user information.
     
-    Requires valid authentication token.
+    Requires valid authentication token. ``fields`` limits the response
+    to the named fields.
     """
+    if fields:
+        content = sparse_model(UserDetail, fields).dump_json(current_user)
+        return Response(content=content, media_type="application/json")
     return current_user
 
 
-@router.put("/me", response_model=UserDetail)
+@router.put(
+    "/me",
+    response_model=UserDetail,
+    dependencies=[Depends(sql_budget(6))],  # auth + get + email check + username check + update + refresh
+)
 async def update_current_user(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
@@ -179,7 +243,10 @@ async def update_current_user(
         )
 
 
-@router.post("/change-password")
+@router.post(
+    "/change-password",
+    dependencies=[Depends(sql_budget(3))],  # auth + get + update
+)
 async def change_password(
     password_data: PasswordChange,
     current_user: User = Depends(get_current_user),
@@ -205,7 +272,11 @@ async def change_password(
     return {"message": "Password changed successfully"}
 
 
-@router.post("/refresh", response_model=Token)
+@router.post(
+    "/refresh",
+    response_model=Token,
+    dependencies=[Depends(sql_budget(1))],  # auth lookup
+)
 async def refresh_token(
     current_user: User = Depends(get_current_user)
 ) -> Any:
@@ -227,7 +298,10 @@ async def refresh_token(
     }
 
 
-@router.post("/logout")
+@router.post(
+    "/logout",
+    dependencies=[Depends(sql_budget(0))],  # stateless
+)
 async def logout() -> Any:
     """
     Logout user.
@@ -2,30 +2,45 @@
 User management endpoints with CRUD operations.
 Comprehensive user management with filtering and pagination.
 """
-from typing import Any, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
 from app.api.dependencies import (
     get_current_superuser,
     get_current_user,
-    get_user_service
+    get_user_loader_dependency,
+    get_user_service,
+    sparse_fields
 )
 from app.core.config import settings
+from app.core.idempotency import IdempotentRoute, idempotent
+from app.core.sql_budget import sql_budget
 from app.models.user import User
 from app.schemas.user import (
+    UserBatchGet,
+    UserBatchResponse,
+    UserChangesResponse,
     UserCreate,
     UserDetail,
     UserListResponse,
     UserResponse,
-    UserUpdate
+    UserUpdate,
+    sparse_model,
+    sparse_page_model
 )
-from app.services.user import UserService
+from app.services.loader import UserLoader
+from app.services.user import UserService, decode_change_cursor, encode_change_cursor
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
 
 
-@router.get("/", response_model=UserListResponse)
+@router.get(
+    "/",
+    response_model=UserListResponse,
+    dependencies=[Depends(sql_budget(3))],  # auth + count + page
+)
 async def get_users(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(
@@ -36,6 +51,7 @@ async def get_users(
     ),
     search: Optional[str] = Query(None, description="Search in email, username, or full name"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    fields: Optional[tuple[str, ...]] = Depends(sparse_fields(UserResponse)),
     user_service: UserService = Depends(get_user_service),
     _: User = Depends(get_current_superuser)  # Only superusers can list all users
 ) -> Any:
@@ -48,6 +64,7 @@ async def get_users(
     - **page_size**: Number of users per page
     - **search**: Search term for email, username, or full name
     - **is_active**: Filter by user active status
+    - **fields**: Only these user fields are loaded and returned
     """
     skip = (page - 1) * page_size
     
@@ -55,21 +72,31 @@ async def get_users(
         skip=skip,
         limit=page_size,
         search=search,
-        is_active=is_active
+        is_active=is_active,
+        columns=fields
     )
     
     total_pages = (total + page_size - 1) // page_size
     
-    return {
+    # Largest response in the API: serialize in one pydantic-core pass
+    page_model = sparse_page_model(UserListResponse, "users", fields) if fields else UserListResponse
+    content = page_model.dump_json({
         "users": users,
         "total": total,
         "page": page,
         "page_size": page_size,
         "total_pages": total_pages
-    }
+    })
+    return Response(content=content, media_type="application/json")
 
 
-@router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(sql_budget(5))],  # auth + email check + username check + insert + refresh
+)
+@idempotent
 async def create_user(
     user_data: UserCreate,
     user_service: UserService = Depends(get_user_service),
@@ -95,10 +122,155 @@ async def create_user(
         )
 
 
-@router.get("/{user_id}", response_model=UserDetail)
+@router.get(
+    "/changes",
+    response_model=UserChangesResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(sql_budget(2))],  # auth + page
+)
+async def get_user_changes(
+    since: Optional[str] = Query(None, description="next_cursor of the previous page; omit to start over"),
+    limit: int = Query(
+        settings.MAX_PAGE_SIZE,
+        ge=1,
+        le=settings.CHANGE_FEED_MAX_PAGE_SIZE,
+        description="Changes per page"
+    ),
+    user_service: UserService = Depends(get_user_service),
+    _: User = Depends(get_current_superuser)  # Full user records, like the list
+) -> Any:
+    """
+    Incremental change feed for downstream sync.
+    
+    **Requires superuser privileges.**
+    
+    Users created, updated or soft deleted since ``since``, oldest change
+    first; a user changed several times appears once, as it is now. Keep
+    ``next_cursor`` and send it as ``since`` next time; while ``has_more``
+    is true there is more to fetch right away. Null fields are left out.
+    
+    Changes from the last CHANGE_FEED_SETTLE_SECONDS are held back, so a
+    transaction that commits after a later-stamped one is not skipped.
+    """
+    try:
+        after = decode_change_cursor(since) if since else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    until = datetime.now(timezone.utc) - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+    users = await user_service.get_changes(after, until, limit + 1)
+    
+    changes = users[:limit]
+    content = UserChangesResponse.dump_json({
+        "changes": changes,
+        "next_cursor": encode_change_cursor(changes[-1]) if changes else since,
+        "has_more": len(users) > limit
+    }, exclude_none=True)
+    return Response(content=content, media_type="application/json")
+
+
+async def _batch_get(
+    user_ids: List[int],
+    fields: Optional[tuple[str, ...]],
+    user_service: UserService,
+    current_user: User
+) -> Response:
+    """Resolve ``user_ids`` in one IN query; the get_user permission rule applies."""
+    if not user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one user ID is required"
+        )
+    
+    # Duplicates are answered once, at their first position
+    unique_ids = list(dict.fromkeys(user_ids))
+    if len(unique_ids) > settings.USER_BATCH_GET_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.USER_BATCH_GET_MAX_IDS} user IDs per request"
+        )
+    
+    # Check permissions: like get_user, users may only see themselves
+    if not current_user.is_superuser and unique_ids != [current_user.id]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    users = await user_service.get_users_by_ids(unique_ids, columns=fields)
+    users_by_id = {user.id: user for user in users}
+    page_model = sparse_page_model(UserBatchResponse, "users", fields) if fields else UserBatchResponse
+    content = page_model.dump_json({
+        "users": [users_by_id[user_id] for user_id in unique_ids if user_id in users_by_id],
+        "missing": [user_id for user_id in unique_ids if user_id not in users_by_id]
+    })
+    return Response(content=content, media_type="application/json")
+
+
+@router.post(
+    "/batch-get",
+    response_model=UserBatchResponse,
+    dependencies=[Depends(sql_budget(2))],  # auth + one IN query
+)
+async def batch_get_users(
+    batch: UserBatchGet,
+    fields: Optional[tuple[str, ...]] = Depends(sparse_fields(UserDetail)),
+    user_service: UserService = Depends(get_user_service),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get many users by ID in one request.
+    
+    Users can fetch their own profile.
+    Superusers can fetch any user profiles.
+    
+    - **ids**: Up to USER_BATCH_GET_MAX_IDS user IDs
+    - **fields**: Only these user fields are loaded and returned
+    
+    Returns the users found and the missing (or soft deleted) IDs, both
+    in request order.
+    """
+    return await _batch_get(batch.ids, fields, user_service, current_user)
+
+
+@router.get(
+    "/batch-get",
+    response_model=UserBatchResponse,
+    dependencies=[Depends(sql_budget(2))],  # auth + one IN query
+)
+async def batch_get_users_by_query(
+    ids: str = Query(..., description="Comma-separated user IDs"),
+    fields: Optional[tuple[str, ...]] = Depends(sparse_fields(UserDetail)),
+    user_service: UserService = Depends(get_user_service),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get many users by ID: ``GET /users/batch-get?ids=1,2,3``.
+    
+    Same rules and response as ``POST /users/batch-get``.
+    """
+    try:
+        user_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be comma-separated integers"
+        )
+    return await _batch_get(user_ids, fields, user_service, current_user)
+
+
+@router.get(
+    "/{user_id}",
+    response_model=UserDetail,
+    dependencies=[Depends(sql_budget(2))],  # auth + target lookup
+)
 async def get_user(
     user_id: int,
-    user_service: UserService = Depends(get_user_service),
+    fields: Optional[tuple[str, ...]] = Depends(sparse_fields(UserDetail)),
+    user_loader: UserLoader = Depends(get_user_loader_dependency),
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
@@ -107,7 +279,7 @@ async def get_user(
     Users can view their own profile.
     Superusers can view any user profile.
     """
-    user = await user_service.get_user_by_id(user_id)
+    user = await user_loader.load(user_id)
     
     if not user:
         raise HTTPException(
@@ -122,10 +294,17 @@ async def get_user(
             detail="Not enough permissions"
         )
     
+    if fields:
+        content = sparse_model(UserDetail, fields).dump_json(user)
+        return Response(content=content, media_type="application/json")
     return user
 
 
-@router.put("/{user_id}", response_model=UserDetail)
+@router.put(
+    "/{user_id}",
+    response_model=UserDetail,
+    dependencies=[Depends(sql_budget(6))],  # auth + get + email check + username check + update + refresh
+)
 async def update_user(
     user_id: int,
     user_update: UserUpdate,
@@ -162,7 +341,10 @@ async def update_user(
         )
 
 
-@router.delete("/{user_id}")
+@router.delete(
+    "/{user_id}",
+    dependencies=[Depends(sql_budget(3))],  # auth + get + update
+)
 async def delete_user(
     user_id: int,
     user_service: UserService = Depends(get_user_service),
@@ -174,7 +356,8 @@ async def delete_user(
     **Requires superuser privileges.**
     
     This performs a soft delete - the user is marked as deleted
-    but the record remains in the database.
+    but the record remains in the database (moved to the archive
+    after ARCHIVE_RETENTION_DAYS) and can be restored.
     """
     # Prevent superuser from deleting themselves
     if current_user.id == user_id:
@@ -194,7 +377,45 @@ async def delete_user(
     return {"message": "User deleted successfully"}
 
 
-@router.post("/{user_id}/activate")
+@router.post(
+    "/{user_id}/restore",
+    response_model=UserDetail,
+    dependencies=[Depends(sql_budget(5))],  # auth + get + archive read + archive delete + insert
+)
+async def restore_user(
+    user_id: int,
+    user_service: UserService = Depends(get_user_service),
+    _: User = Depends(get_current_superuser)  # Only superusers can restore
+) -> Any:
+    """
+    Restore a soft deleted user.
+    
+    **Requires superuser privileges.**
+    
+    Also works after the user was moved to the archive; fails if its
+    email or username has been registered again in the meantime.
+    """
+    try:
+        user = await user_service.restore_user(user_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return user
+
+
+@router.post(
+    "/{user_id}/activate",
+    dependencies=[Depends(sql_budget(3))],  # auth + get + update
+)
 async def activate_user(
     user_id: int,
     user_service: UserService = Depends(get_user_service),
@@ -218,7 +439,10 @@ async def activate_user(
     return {"message": "User activated successfully"}
 
 
-@router.post("/{user_id}/deactivate")
+@router.post(
+    "/{user_id}/deactivate",
+    dependencies=[Depends(sql_budget(3))],  # auth + get + update
+)
 async def deactivate_user(
     user_id: int,
     user_service: UserService = Depends(get_user_service),
@@ -249,7 +473,10 @@ async def deactivate_user(
     return {"message": "User deactivated successfully"}
 
 
-@router.get("/stats/overview")
+@router.get(
+    "/stats/overview",
+    dependencies=[Depends(sql_budget(5))],  # auth + four counts
+)
 async def get_user_stats(
     user_service: UserService = Depends(get_user_service),
     _: User = Depends(get_current_superuser)  # Only superusers can view stats
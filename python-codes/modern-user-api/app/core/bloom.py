@@ -0,0 +1,55 @@
+"""
+Bloom filter for set membership of strings.
+No false negatives; false positives at a rate chosen when sizing it.
+"""
+import hashlib
+import math
+from typing import Iterable, List
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter.
+
+    Sized for ``capacity`` items at ``error_rate``; past that capacity it
+    keeps working, with a growing false-positive rate. Items cannot be
+    removed: rebuild the filter instead.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate in (0, 1)")
+
+        # Optimal size and hash count for the target rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> List[int]:
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        """False means definitely absent; True means probably present."""
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+    def false_positive_rate(self) -> float:
+        """Expected false-positive rate at the current number of items."""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
@@ -0,0 +1,162 @@
+"""
+Circuit breaker around each database engine.
+Consecutive connection/timeout failures open it; requests then fail in microseconds.
+
+States:
+    closed     normal operation; failures are counted, any completed
+               statement resets the count
+    open       every pool checkout raises DatabaseUnavailable at once,
+               without waiting for a connection, a pre-ping or a connect
+               timeout; lasts DB_CIRCUIT_RESET_TIMEOUT seconds
+    half-open  one checkout is let through as a probe: a completed
+               statement closes the breaker, a failure opens it again
+
+Only failures that say "the database is unreachable or not answering"
+count: disconnects, connect errors and timeouts. SQL errors (constraint
+violations, syntax) are the caller's problem and pass through, and so
+do pool timeouts, which mean saturation rather than an outage (the
+concurrency limiter deals with those).
+"""
+import asyncio
+import math
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import (
+    DB_CIRCUIT_REJECTED,
+    DB_CIRCUIT_STATE,
+    DB_CIRCUIT_TRANSITIONS,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Exception class names that mean "no answer in time" across drivers
+_TIMEOUT_NAMES = ("Timeout", "QueryCanceled", "CannotConnectNow")
+
+
+class DatabaseUnavailable(RuntimeError):
+    """Raised instead of checking out a connection while the breaker is open."""
+
+    def __init__(self, database: str, retry_after: float):
+        super().__init__(f"Database {database!r} is unavailable (circuit open)")
+        self.database = database
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        DB_CIRCUIT_STATE.labels(name).set(_STATE_VALUES[CLOSED])
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        self.state = state
+        DB_CIRCUIT_STATE.labels(self.name).set(_STATE_VALUES[state])
+        DB_CIRCUIT_TRANSITIONS.labels(self.name, state).inc()
+        print(f"⚡ Database circuit {self.name!r} is now {state.replace('_', '-')}")
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a probe through."""
+        return max(self.opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def before_checkout(self) -> None:
+        """
+        Gate a pool checkout.
+
+        Raises:
+            DatabaseUnavailable: While open, or half-open with a probe in flight
+        """
+        if self.state == CLOSED:
+            return
+
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                DB_CIRCUIT_REJECTED.labels(self.name).inc()
+                raise DatabaseUnavailable(self.name, self.retry_after())
+            self._transition(HALF_OPEN)
+            self._probe_started = None
+
+        # Half-open: one probe at a time; a probe that never reports back
+        # (its request was cancelled) is replaced after reset_timeout
+        if self._probe_started is not None and now - self._probe_started < self.reset_timeout:
+            DB_CIRCUIT_REJECTED.labels(self.name).inc()
+            raise DatabaseUnavailable(self.name, self.reset_timeout)
+        self._probe_started = now
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self.state != CLOSED:
+            self._probe_started = None
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or (
+            self.state == CLOSED and self.failures >= self.failure_threshold
+        ):
+            self.opened_at = time.monotonic()
+            self._probe_started = None
+            self._transition(OPEN)
+
+
+def is_outage_error(exception: BaseException, is_disconnect: bool = False) -> bool:
+    """True for errors meaning the database is unreachable or not answering."""
+    if isinstance(exception, DatabaseUnavailable):
+        return False
+    if is_disconnect or isinstance(exception, (OSError, asyncio.TimeoutError, TimeoutError)):
+        return True
+    # Driver exceptions are often adapted; look at the chain by class name
+    while exception is not None:
+        if any(name in type(exception).__name__ for name in _TIMEOUT_NAMES):
+            return True
+        exception = exception.__cause__ or exception.__context__
+    return False
+
+
+def instrument_engine(sync_engine: Engine, breaker: CircuitBreaker) -> None:
+    """Feed engine outcomes into ``breaker`` and gate its pool's checkouts."""
+
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if breaker.failures or breaker.state != CLOSED:
+            breaker.record_success()
+
+    def _handle_error(context) -> None:
+        if is_outage_error(context.original_exception, context.is_disconnect):
+            breaker.record_failure()
+
+    def _do_connect(dialect, connection_record, cargs, cparams):
+        # Connect errors that are not DBAPI errors (refused, DNS, TLS) never
+        # reach handle_error, so new connections and reconnects after a
+        # failed pre-ping are made here; any failure to connect counts
+        try:
+            return dialect.connect(*cargs, **cparams)
+        except Exception:
+            breaker.record_failure()
+            raise
+
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+    event.listen(sync_engine, "do_connect", _do_connect)
+    # Checked in InstrumentedAsyncQueuePool._do_get; survives pool.recreate()
+    sync_engine.pool.breaker = breaker
+
+
+def retry_after_header(exc: DatabaseUnavailable) -> str:
+    return str(max(math.ceil(exc.retry_after), 1))
@@ -0,0 +1,123 @@
+"""
+Adaptive concurrency limit driven by observed request latency.
+Gradient algorithm: shrink when latency rises above its long-term baseline, grow otherwise.
+
+Every completed request is a latency sample. Samples are averaged over
+short windows; the baseline is the lowest window average of the last
+``baseline_windows`` windows, i.e. latency without queueing. Under
+constant overload every window queues, so once per ``baseline_windows``
+one probe window admits only half the limit to measure it afresh:
+
+    gradient  = clamp(tolerance * baseline / short_rtt, 0.5, 1.0)
+    new_limit = limit * gradient + sqrt(limit)
+
+The limit moves a ``smoothing`` fraction of the way towards new_limit
+per window. With latency within ``tolerance`` times the baseline the
+gradient is 1 and the limit grows by a fraction of sqrt(limit); once
+requests start queueing (for pool connections, the CPU, the database)
+latency rises and the limit contracts multiplicatively.
+
+Admission is split into priority lanes: a lane may only fill its share
+of the limit, so lower lanes are shed first and the remaining headroom
+stays free for the higher ones.
+"""
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+# Share of the limit each lane may occupy
+LANE_SHARES: Dict[str, float] = {
+    "critical": 1.0,  # logins, token refresh
+    "normal": 0.8,
+    "low": 0.5,  # admin listings, statistics
+}
+
+
+class AdaptiveLimiter:
+    """Per-process concurrency limit with gradient updates and priority lanes."""
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        window_seconds: float = 1.0,
+        window_min_samples: int = 10,
+        baseline_windows: int = 600,
+        lane_shares: Optional[Dict[str, float]] = None,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.window_seconds = window_seconds
+        self.window_min_samples = window_min_samples
+        self.lane_shares = lane_shares or LANE_SHARES
+
+        self.in_flight = 0
+        # Recent window averages; their minimum is the no-load baseline
+        self._recent_rtts: Deque[float] = deque(maxlen=baseline_windows)
+        self._window_started = time.monotonic()
+        self._window_sum = 0.0
+        self._window_count = 0
+        self._window_max_in_flight = 0
+        self._windows = 0
+        self.probing = False
+
+    def try_acquire(self, lane: str) -> bool:
+        """Admit a request in ``lane``, or return False if it must be shed."""
+        limit = self.limit / 2 if self.probing else self.limit
+        if self.in_flight >= max(limit * self.lane_shares[lane], 1):
+            return False
+        self.in_flight += 1
+        self._window_max_in_flight = max(self._window_max_in_flight, self.in_flight)
+        return True
+
+    def release(self, rtt: Optional[float]) -> None:
+        """
+        Finish an admitted request.
+
+        Args:
+            rtt: Its latency in seconds, or None if it should not count
+                (e.g. it failed fast with a 5xx)
+        """
+        self.in_flight -= 1
+        if rtt is None:
+            return
+
+        self._window_sum += rtt
+        self._window_count += 1
+        now = time.monotonic()
+        if (
+            self._window_count >= self.window_min_samples
+            and now - self._window_started >= self.window_seconds
+        ):
+            self._update(self._window_sum / self._window_count, self._window_max_in_flight)
+            self._window_started = now
+            self._window_sum = 0.0
+            self._window_count = 0
+            self._window_max_in_flight = self.in_flight
+            self._windows += 1
+            self.probing = self._windows % self._recent_rtts.maxlen == 0
+
+    @property
+    def baseline_rtt(self) -> Optional[float]:
+        return min(self._recent_rtts, default=None)
+
+    def _update(self, short_rtt: float, max_in_flight: int) -> None:
+        self._recent_rtts.append(short_rtt)
+        if self.probing:
+            return  # Measured at half the limit: only a baseline sample
+
+        # Traffic far below the limit says nothing about what the limit could be
+        if max_in_flight < self.limit / 2:
+            return
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.baseline_rtt / short_rtt))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = self.limit * (1 - self.smoothing) + target * self.smoothing
+        self.limit = max(float(self.min_limit), min(float(self.max_limit), limit))
@@ -0,0 +1,360 @@
+"""
+Idempotency-Key support for retried POSTs (registration, user creation).
+The first response is stored per (route, caller, key) and replayed to duplicates.
+
+A duplicate carrying the same key and an identical body gets the stored
+response back with ``Idempotent-Replayed: true``, without running the
+endpoint again: no bcrypt and no DB queries. A duplicate that arrives
+while the original is still running waits for it. Reusing a key with a
+different body is rejected with 422.
+
+Stores (IDEMPOTENCY_BACKEND):
+    memory  bounded LRU with TTL, per worker process
+    redis   shared by all workers; needs the ``redis`` extra
+    off     header ignored
+
+Usage:
+    router = APIRouter(route_class=IdempotentRoute)
+
+    @router.post("/register")
+    @idempotent
+    async def register(...): ...
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from starlette.exceptions import HTTPException
+
+from app.core.config import settings
+from app.core.metrics import IDEMPOTENCY_REQUESTS
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = "idempotent-replayed"
+MAX_KEY_LENGTH = 255
+
+# Responses that depend on who asks or when, rather than on the request:
+# a retry should be evaluated afresh
+NOT_STORED_STATUSES = {401, 403, 408, 429}
+
+# Not copied into stored responses; recomputed when replaying
+_SKIPPED_HEADERS = {b"content-length", b"date", b"server"}
+
+
+@dataclass
+class StoredResponse:
+    """Snapshot of a finished response plus the hash of the request body."""
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    body_hash: str
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "status_code": self.status_code,
+            "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in self.headers],
+            "body": base64.b64encode(self.body).decode(),
+            "body_hash": self.body_hash,
+        })
+
+    @classmethod
+    def from_json(cls, data: str) -> "StoredResponse":
+        raw = json.loads(data)
+        return cls(
+            status_code=raw["status_code"],
+            headers=[(k.encode("latin-1"), v.encode("latin-1")) for k, v in raw["headers"]],
+            body=base64.b64decode(raw["body"]),
+            body_hash=raw["body_hash"],
+        )
+
+    def to_response(self) -> Response:
+        response = Response(content=self.body, status_code=self.status_code)
+        response.raw_headers = [
+            *(header for header in response.raw_headers if header[0] == b"content-length"),
+            *self.headers,
+            (REPLAYED_HEADER.encode(), b"true"),
+        ]
+        return response
+
+
+class IdempotencyStore(ABC):
+    """
+    Interface of a response store with per-key ownership.
+
+    ``lock`` makes the caller the owner of a key; other callers ``wait``
+    until the owner calls ``complete`` (with the response to keep, or None
+    when nothing should be stored).
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        ...
+
+    @abstractmethod
+    async def lock(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def wait(self, key: str, timeout: float) -> Optional[StoredResponse]:
+        ...
+
+    @abstractmethod
+    async def complete(self, key: str, response: Optional[StoredResponse]) -> None:
+        ...
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """Per-process store: at most ``max_entries`` responses, each kept ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Insertion order == expiry order, since every entry has the same TTL
+        self._entries: "OrderedDict[str, Tuple[float, StoredResponse]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Event] = {}
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        while self._entries:
+            key, (expires, _) = next(iter(self._entries.items()))
+            if expires > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, response = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        return response
+
+    async def lock(self, key: str) -> bool:
+        if key in self._in_flight:
+            return False
+        self._in_flight[key] = asyncio.Event()
+        return True
+
+    async def wait(self, key: str, timeout: float) -> Optional[StoredResponse]:
+        done = self._in_flight.get(key)
+        if done is not None:
+            try:
+                await asyncio.wait_for(done.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return await self.get(key)
+
+    async def complete(self, key: str, response: Optional[StoredResponse]) -> None:
+        if response is not None:
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(key)
+            self._prune()
+        done = self._in_flight.pop(key, None)
+        if done is not None:
+            done.set()
+
+
+class RedisIdempotencyStore(IdempotencyStore):
+    """
+    Store shared by every worker. Entries expire after ``ttl`` seconds;
+    Redis' maxmemory policy bounds the total size.
+    """
+
+    POLL_INTERVAL = 0.05
+
+    # Store the response (if any), then release the lock only if it is
+    # still ours: an owner outliving lock_timeout must not release the
+    # lock of the request that took over
+    COMPLETE_SCRIPT = """
+    if ARGV[2] ~= "" then
+        redis.call("SET", KEYS[1], ARGV[2], "EX", ARGV[3])
+    end
+    if redis.call("GET", KEYS[2]) == ARGV[1] then
+        return redis.call("DEL", KEYS[2])
+    end
+    return 0
+    """
+
+    def __init__(self, url: str, ttl: float, lock_timeout: float):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url)
+        self.ttl = ttl
+        # The lock outlives a crashed owner by at most this long
+        self.lock_timeout = lock_timeout
+        self._complete = self.redis.register_script(self.COMPLETE_SCRIPT)
+        # key -> token of the locks this process owns
+        self._tokens: Dict[str, str] = {}
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        data = await self.redis.get(f"idempotency:{key}")
+        return StoredResponse.from_json(data) if data is not None else None
+
+    async def lock(self, key: str) -> bool:
+        token = uuid.uuid4().hex
+        locked = await self.redis.set(
+            f"idempotency:{key}:lock", token, nx=True, px=int(self.lock_timeout * 1000)
+        )
+        if locked:
+            self._tokens[key] = token
+        return bool(locked)
+
+    async def wait(self, key: str, timeout: float) -> Optional[StoredResponse]:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            stored = await self.get(key)
+            if stored is not None:
+                return stored
+            if not await self.redis.exists(f"idempotency:{key}:lock"):
+                # Owner finished without storing anything
+                return await self.get(key)
+            await asyncio.sleep(self.POLL_INTERVAL)
+        return None
+
+    async def complete(self, key: str, response: Optional[StoredResponse]) -> None:
+        token = self._tokens.pop(key, "")
+        await self._complete(
+            keys=[f"idempotency:{key}", f"idempotency:{key}:lock"],
+            args=[token, response.to_json() if response is not None else "", int(self.ttl)],
+        )
+
+
+_store: Optional[IdempotencyStore] = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Return the process-wide store configured by IDEMPOTENCY_BACKEND."""
+    global _store
+    if _store is None:
+        if settings.IDEMPOTENCY_BACKEND == "redis":
+            _store = RedisIdempotencyStore(
+                settings.IDEMPOTENCY_REDIS_URL,
+                ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+                lock_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT,
+            )
+        else:
+            _store = MemoryIdempotencyStore(
+                max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+                ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+            )
+    return _store
+
+
+def idempotent(endpoint: Callable) -> Callable:
+    """Route decorator: honour Idempotency-Key (needs route_class=IdempotentRoute)."""
+    endpoint.__idempotent__ = True
+    return endpoint
+
+
+def request_caller(request: Request) -> str:
+    """
+    Who is asking: the token subject, or "anonymous".
+
+    Anonymous keys are still scoped by the body hash, so a replay needs the
+    exact original body (for registration, including the password).
+    """
+    from app.core.security import verify_token
+
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        payload = verify_token(token)
+        if payload and payload.get("sub") is not None:
+            return f"user:{payload['sub']}"
+    return "anonymous"
+
+
+async def _render_exception(request: Request, exc: Exception) -> Response:
+    """Turn ``exc`` into a response with the app's registered exception handler."""
+    for cls in type(exc).__mro__:
+        exception_handler = request.app.exception_handlers.get(cls)
+        if exception_handler is not None:
+            return await exception_handler(request, exc)
+    raise exc
+
+
+def _error(status_code: int, detail: str) -> Response:
+    body = json.dumps(
+        {"detail": detail, "type": "http_error", "status_code": status_code}, separators=(",", ":")
+    )
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+class IdempotentRoute(APIRoute):
+    """APIRoute that replays stored responses for @idempotent endpoints."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if not getattr(self.endpoint, "__idempotent__", False):
+            return handler
+
+        route = self.path_format
+
+        async def idempotent_handler(request: Request) -> Response:
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if key is None or settings.IDEMPOTENCY_BACKEND == "off":
+                return await handler(request)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return _error(400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+            # Starlette caches the body, so the endpoint reads it again for free
+            body_hash = hashlib.sha256(await request.body()).hexdigest()
+            scope = f"{request.method} {route}\n{request_caller(request)}\n{key}"
+            store_key = hashlib.sha256(scope.encode()).hexdigest()
+            store = get_idempotency_store()
+
+            stored = await store.get(store_key)
+            if stored is None and not await store.lock(store_key):
+                # A duplicate of a request still in progress: wait for it
+                stored = await store.wait(store_key, settings.IDEMPOTENCY_WAIT_TIMEOUT)
+                # Nothing stored means the original failed; then we run it
+                if stored is None and not await store.lock(store_key):
+                    IDEMPOTENCY_REQUESTS.labels(route, "conflict").inc()
+                    return _error(409, "A request with this Idempotency-Key is still being processed")
+
+            if stored is not None:
+                if stored.body_hash != body_hash:
+                    IDEMPOTENCY_REQUESTS.labels(route, "mismatch").inc()
+                    return _error(422, "Idempotency-Key was already used with a different request body")
+                IDEMPOTENCY_REQUESTS.labels(route, "replayed").inc()
+                return stored.to_response()
+
+            snapshot = None
+            try:
+                try:
+                    response = await handler(request)
+                except (HTTPException, RequestValidationError) as exc:
+                    # Render it here (as the exception middleware would) so
+                    # "Email already registered" is replayed like a success
+                    response = await _render_exception(request, exc)
+
+                body = getattr(response, "body", None)
+                if (
+                    isinstance(body, bytes)
+                    and response.status_code < 500
+                    and response.status_code not in NOT_STORED_STATUSES
+                ):
+                    snapshot = StoredResponse(
+                        status_code=response.status_code,
+                        headers=[h for h in response.raw_headers if h[0] not in _SKIPPED_HEADERS],
+                        body=body,
+                        body_hash=body_hash,
+                    )
+                return response
+            finally:
+                # Also runs on errors and cancellation, so waiters never hang
+                await asyncio.shield(store.complete(store_key, snapshot))
+                IDEMPOTENCY_REQUESTS.labels(route, "stored" if snapshot else "not_stored").inc()
+
+        return idempotent_handler
@@ -0,0 +1,331 @@
+"""
+Invalidation bus for per-process caches of users.
+UserService publishes (user_id, version) after commit; every worker evicts its local copy.
+
+The publishing worker notifies its own subscribers synchronously, so it
+never serves its own stale write. Other workers get the event from the
+backend (INVALIDATION_BACKEND):
+    memory    this worker only; single-worker deployments and tests
+    unix      datagrams between the workers of one host, one socket per
+              worker in INVALIDATION_SOCKET_DIR; a stand-in for a broker
+    postgres  NOTIFY/LISTEN on a dedicated asyncpg connection
+    redis     pub/sub; needs the ``redis`` extra
+
+Delivery is best effort. A failed publish is logged and counted, never
+raised: the commit already happened, and the cache TTL bounds how long a
+lost event can leave another worker stale. A listener that loses its
+connection clears the caches, since events may have been missed.
+
+Every event carries its wall-clock publish time; receivers observe the
+difference as ``user_invalidation_lag_seconds`` (across hosts this
+includes clock skew).
+"""
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.metrics import INVALIDATION_EVENTS, INVALIDATION_LAG
+
+# (user_id, version) -> None
+InvalidateCallback = Callable[[int, int], None]
+
+
+@dataclass(frozen=True)
+class Invalidation:
+    """One event on the wire."""
+    user_id: int
+    version: int
+    published_at: float  # time.time() at the publisher
+    origin: str  # Publishing bus; it ignores its own echo
+
+    def encode(self) -> bytes:
+        return json.dumps(
+            {"id": self.user_id, "v": self.version, "t": self.published_at, "o": self.origin},
+            separators=(",", ":"),
+        ).encode()
+
+    @classmethod
+    def decode(cls, data: bytes) -> "Invalidation":
+        raw = json.loads(data)
+        return cls(user_id=raw["id"], version=raw["v"], published_at=raw["t"], origin=raw["o"])
+
+
+class InvalidationBus:
+    """
+    In-process bus, and the base of the cross-process ones.
+
+    Subclasses implement ``_send`` and, to receive, a listener that hands
+    raw payloads to ``_receive``.
+    """
+
+    backend = "memory"
+
+    def __init__(self, publish_timeout: float = 1.0):
+        self.publish_timeout = publish_timeout
+        self.origin = uuid.uuid4().hex
+        self._subscribers: List[Tuple[InvalidateCallback, Optional[Callable[[], None]]]] = []
+
+    def subscribe(
+        self, on_invalidate: InvalidateCallback, on_reset: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Register a local cache.
+
+        Args:
+            on_invalidate: Called with (user_id, version) for every event
+            on_reset: Called when events may have been lost; drop everything
+        """
+        self._subscribers.append((on_invalidate, on_reset))
+
+    async def start(self) -> None:
+        """Start receiving events from other workers."""
+
+    async def stop(self) -> None:
+        """Stop receiving and release connections."""
+
+    async def publish(self, user_id: int, version: int) -> None:
+        """Announce that ``user_id`` changed; call after the change is committed."""
+        self._deliver(user_id, version)
+        event = Invalidation(user_id, version, time.time(), self.origin)
+        try:
+            await asyncio.wait_for(self._send(event.encode()), self.publish_timeout)
+        except Exception as e:
+            INVALIDATION_EVENTS.labels(self.backend, "publish_failed").inc()
+            print(f"⚠️ Invalidation of user {user_id} not published: {e!r}")
+            return
+        INVALIDATION_EVENTS.labels(self.backend, "published").inc()
+
+    async def _send(self, payload: bytes) -> None:
+        """Hand an encoded event to the other workers."""
+
+    def _receive(self, payload: bytes) -> None:
+        try:
+            event = Invalidation.decode(payload)
+        except (ValueError, KeyError, TypeError):
+            INVALIDATION_EVENTS.labels(self.backend, "malformed").inc()
+            return
+        if event.origin == self.origin:
+            return  # Our own event, delivered locally when published
+
+        INVALIDATION_LAG.labels(self.backend).observe(max(time.time() - event.published_at, 0.0))
+        INVALIDATION_EVENTS.labels(self.backend, "received").inc()
+        self._deliver(event.user_id, event.version)
+
+    def _deliver(self, user_id: int, version: int) -> None:
+        for on_invalidate, _ in self._subscribers:
+            on_invalidate(user_id, version)
+
+    def _reset(self) -> None:
+        for _, on_reset in self._subscribers:
+            if on_reset is not None:
+                on_reset()
+
+
+class _ListeningBus(InvalidationBus, ABC):
+    """Bus with a background listener that reconnects after failures."""
+
+    RECONNECT_DELAY = 1.0
+
+    def __init__(self, publish_timeout: float = 1.0):
+        super().__init__(publish_timeout)
+        self._task: Optional[asyncio.Task] = None
+        self._listened = False
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=f"user-invalidation-{self.backend}")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+                print(f"⚠️ Invalidation listener ({self.backend}) disconnected")
+            except Exception as e:
+                print(f"⚠️ Invalidation listener ({self.backend}) failed: {e!r}")
+            # Whatever was published in the meantime is lost
+            self._reset()
+            await asyncio.sleep(self.RECONNECT_DELAY)
+
+    def _listening(self) -> None:
+        """Called by ``_listen`` once subscribed."""
+        if self._listened:
+            self._reset()  # Events may have been published while reconnecting
+        self._listened = True
+
+    @abstractmethod
+    async def _listen(self) -> None:
+        """Subscribe and feed ``_receive`` until the connection is lost."""
+
+
+class UnixSocketInvalidationBus(_ListeningBus):
+    """
+    Workers on one host, each bound to a datagram socket in ``directory``.
+
+    A publish is one sendto per peer socket. Sockets nobody listens on
+    (a worker that died) are removed; a peer with a full receive buffer
+    misses the event.
+    """
+
+    backend = "unix"
+
+    def __init__(self, directory: str, publish_timeout: float = 1.0):
+        super().__init__(publish_timeout)
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}-{self.origin[:8]}.sock")
+        self._sock: Optional[socket.socket] = None
+
+    async def _listen(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        sock.bind(self.path)
+        self._sock = sock
+        self._listening()
+        try:
+            loop = asyncio.get_running_loop()
+            while True:
+                self._receive(await loop.sock_recv(sock, 4096))
+        finally:
+            self._sock = None
+            sock.close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    async def _send(self, payload: bytes) -> None:
+        sock = self._sock
+        if sock is None:
+            raise ConnectionError("not listening")
+
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if path == self.path or not name.endswith(".sock"):
+                continue
+            try:
+                sock.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            except BlockingIOError:
+                INVALIDATION_EVENTS.labels(self.backend, "dropped").inc()
+
+
+class PostgresInvalidationBus(_ListeningBus):
+    """
+    LISTEN on one dedicated asyncpg connection per worker; publishes are
+    ``pg_notify`` on the same connection (outside any request transaction).
+    """
+
+    backend = "postgres"
+
+    def __init__(self, url: str, channel: str, publish_timeout: float = 1.0):
+        super().__init__(publish_timeout)
+        # asyncpg takes a plain postgresql:// DSN
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self._conn = None
+        # One statement at a time per asyncpg connection
+        self._lock = asyncio.Lock()
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        conn = await asyncpg.connect(self.dsn)
+        lost = asyncio.Event()
+        try:
+            conn.add_termination_listener(lambda _conn: lost.set())
+            await conn.add_listener(
+                self.channel, lambda _conn, _pid, _channel, payload: self._receive(payload.encode())
+            )
+            self._conn = conn
+            self._listening()
+            await lost.wait()
+        finally:
+            self._conn = None
+            if not conn.is_closed():
+                await asyncio.shield(conn.close(timeout=1))
+
+    async def _send(self, payload: bytes) -> None:
+        conn = self._conn
+        if conn is None:
+            raise ConnectionError("not connected")
+        async with self._lock:
+            await conn.execute("SELECT pg_notify($1, $2)", self.channel, payload.decode())
+
+
+class RedisInvalidationBus(_ListeningBus):
+    """Redis pub/sub on ``channel``; needs the ``redis`` extra."""
+
+    backend = "redis"
+
+    def __init__(self, url: str, channel: str, publish_timeout: float = 1.0):
+        import redis.asyncio as redis
+
+        super().__init__(publish_timeout)
+        self.redis = redis.from_url(url)
+        self.channel = channel
+
+    async def _listen(self) -> None:
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.channel)
+            self._listening()
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    self._receive(message["data"])
+        finally:
+            await asyncio.shield(pubsub.aclose())
+
+    async def _send(self, payload: bytes) -> None:
+        await self.redis.publish(self.channel, payload)
+
+    async def stop(self) -> None:
+        await super().stop()
+        await self.redis.aclose()
+
+
+_bus: Optional[InvalidationBus] = None
+
+
+def get_invalidation_bus() -> InvalidationBus:
+    """Return the process-wide bus configured by INVALIDATION_BACKEND."""
+    global _bus
+    if _bus is None:
+        timeout = settings.INVALIDATION_PUBLISH_TIMEOUT
+        if settings.INVALIDATION_BACKEND == "unix":
+            _bus = UnixSocketInvalidationBus(settings.INVALIDATION_SOCKET_DIR, timeout)
+        elif settings.INVALIDATION_BACKEND == "postgres":
+            _bus = PostgresInvalidationBus(
+                settings.INVALIDATION_POSTGRES_URL or settings.DATABASE_URL,
+                settings.INVALIDATION_CHANNEL,
+                timeout,
+            )
+        elif settings.INVALIDATION_BACKEND == "redis":
+            _bus = RedisInvalidationBus(
+                settings.INVALIDATION_REDIS_URL, settings.INVALIDATION_CHANNEL, timeout
+            )
+        else:
+            _bus = InvalidationBus(timeout)
+    return _bus
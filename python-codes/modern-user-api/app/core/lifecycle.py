@@ -0,0 +1,231 @@
+"""
+Process lifecycle: pool warm-up, readiness and graceful drain.
+Startup pre-opens connections and starts background jobs; shutdown drains and disposes the engine.
+
+Readiness (``/ready``) also requires every database to answer: the probe
+result is cached for DB_READY_CACHE_SECONDS, so orchestrator polling costs
+at most one ``SELECT 1`` per database per interval and worker.
+"""
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from typing import List, Optional
+
+from app.core.config import settings
+
+
+class Lifecycle:
+    """Readiness and in-flight bookkeeping for one worker process."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Back to the state before startup; the app may be started again in this process."""
+        self.ready = False  # Set once warm-up has finished
+        self.draining = False  # Set at shutdown; new requests are refused
+        self.in_flight = 0
+        # New event: the previous one may belong to the previous run's event loop
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def request_started(self) -> None:
+        self.in_flight += 1
+        self._idle.clear()
+
+    def request_finished(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+
+    async def wait_for_drain(self, timeout: float) -> bool:
+        """Wait until no request is in flight. Returns False on timeout."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+lifecycle = Lifecycle()
+
+
+class DatabaseProbe:
+    """Cached, single-flight ``SELECT 1`` against every database."""
+
+    def __init__(self, ttl: float, timeout: float):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._checked_at = float("-inf")
+        self._problem: Optional[str] = None
+        self._pending: Optional[asyncio.Task] = None
+
+    async def check(self) -> Optional[str]:
+        """None if every database answered, else a short description of what failed."""
+        if time.monotonic() - self._checked_at < self.ttl:
+            return self._problem
+        if self._pending is None:
+            self._pending = asyncio.create_task(self._probe())
+        # Concurrent callers share one probe; cancelling one caller must not cancel it
+        return await asyncio.shield(self._pending)
+
+    async def _probe(self) -> Optional[str]:
+        from sqlalchemy import text
+
+        async def ping(engine) -> None:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(ping(engine) for engine in _all_engines())), self.timeout
+            )
+            problem = None
+        except asyncio.TimeoutError:
+            problem = f"database did not answer within {self.timeout}s"
+        except Exception as e:
+            problem = f"{type(e).__name__}: {e}"
+
+        self._problem = problem
+        self._checked_at = time.monotonic()
+        self._pending = None
+        return problem
+
+
+database_probe = DatabaseProbe(settings.DB_READY_CACHE_SECONDS, settings.DB_READY_TIMEOUT)
+
+
+def _all_engines() -> List:
+    """The main engine plus every shard engine (sharded) or the reader (embedded)."""
+    from app.database import get_engine
+    from app.embedded import embedded_mode, get_reader_engine
+
+    engines = [get_engine()]
+    if embedded_mode():
+        engines.append(get_reader_engine())
+    if settings.SHARD_URLS:
+        from app.sharding import get_shard_router
+
+        engines.extend(get_shard_router().engines)
+    return engines
+
+
+async def _run_hot_statements(conn) -> None:
+    """Execute the per-request UserService statements once on a connection."""
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.services.user import UserService
+
+    async with AsyncSession(bind=conn, expire_on_commit=False) as session:
+        service = UserService(session)
+        await service.get_user_by_id(0)
+        await service.get_users_by_ids([0])
+        await service.get_user_by_email("")
+        await service.get_user_by_username("")
+        await service.get_users(limit=settings.DEFAULT_PAGE_SIZE)
+
+
+async def warm_up_pool(connections: int) -> int:
+    """
+    Open ``connections`` pooled connections at once (on every shard in
+    sharded mode, on the reader and writer in embedded mode) and prime
+    each of them.
+
+    Running the hot UserService statements on every connection fills the
+    SQLAlchemy compiled-statement cache and, on asyncpg, each connection's
+    server-side prepared statement cache. The connections go back to the
+    pool afterwards, so the first real requests skip connect/TLS setup.
+
+    Returns:
+        Number of connections warmed
+    """
+    if settings.SHARD_URLS:
+        from app.sharding import get_shard_router
+
+        # User queries only run on the shards; each has its own pool
+        engines = get_shard_router().engines
+    else:
+        engines = _all_engines()
+
+    warmed = await asyncio.gather(*(_warm_up_engine(engine, connections) for engine in engines))
+    return sum(warmed)
+
+
+async def _warm_up_engine(engine, connections: int) -> int:
+    connections = min(connections, engine.pool.size() + max(engine.pool._max_overflow, 0))
+    if connections <= 0:
+        return 0
+
+    async with AsyncExitStack() as stack:
+        # Hold all of them simultaneously, otherwise the pool would hand the
+        # same connection back each time
+        opened = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections))
+        )
+        await asyncio.gather(*(_run_hot_statements(conn) for conn in opened))
+    return len(opened)
+
+
+async def startup() -> None:
+    """Listen for invalidations, warm the pool, report ready, start background jobs."""
+    from app.core.invalidation import get_invalidation_bus
+
+    # A previous lifespan of this process (tests, benchmarks) left it draining
+    lifecycle.reset()
+
+    await get_invalidation_bus().start()
+
+    try:
+        started = time.perf_counter()
+        warmed = await warm_up_pool(settings.DB_POOL_WARMUP)
+        print(f"✅ Warmed {warmed} DB connections in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        print(f"⚠️ Pool warm-up failed: {e}")
+    lifecycle.ready = True
+
+    if settings.AVAILABILITY_FILTER_ENABLED:
+        from app.services.availability import start_availability_filter
+
+        start_availability_filter()
+
+    if settings.ARCHIVE_ENABLED:
+        from app.services.archive import start_archive_job
+
+        start_archive_job()
+
+
+async def shutdown() -> None:
+    """
+    Stop taking work, drain in-flight requests, flush buffers, dispose engine.
+
+    The whole sequence is bounded by SHUTDOWN_DEADLINE; whatever is left
+    of it after draining is what the engine gets to close connections.
+    """
+    from app.core.invalidation import get_invalidation_bus
+    from app.core.query_log import stop_query_log
+    from app.database import dispose_engine
+    from app.services.archive import stop_archive_job
+    from app.services.availability import stop_availability_filter
+
+    deadline = time.monotonic() + settings.SHUTDOWN_DEADLINE
+    lifecycle.ready = False
+    lifecycle.draining = True
+
+    # Background work stops first; an interrupted batch rolls back
+    await stop_archive_job()
+    await stop_availability_filter()
+
+    if not await lifecycle.wait_for_drain(deadline - time.monotonic()):
+        print(f"⚠️ Shutdown deadline hit with {lifecycle.in_flight} requests in flight")
+
+    # Drained requests have published their invalidations by now
+    await get_invalidation_bus().stop()
+
+    # Pending slow-query records go out before the process exits
+    stop_query_log()
+
+    try:
+        await asyncio.wait_for(dispose_engine(), max(deadline - time.monotonic(), 0.1))
+        print("✅ Database connections closed")
+    except asyncio.TimeoutError:
+        print("⚠️ Timed out closing database connections")
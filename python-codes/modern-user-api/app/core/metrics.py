@@ -0,0 +1,228 @@
+"""
+Prometheus metrics for HTTP, database and security hot paths.
+Supports multi-worker aggregation via prometheus_client multiprocess mode.
+
+Multiprocess mode is enabled by setting ``PROMETHEUS_MULTIPROC_DIR`` to an
+empty, writable directory *before* the workers start (prometheus_client
+picks its value backend at import time). Each worker then writes its
+samples to mmap'd files in that directory and ``/metrics`` merges them.
+"""
+import os
+import time
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.request_context import get_request_context
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Label used for statements issued outside any request (startup, background jobs)
+BACKGROUND_ROUTE = "<background>"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+DB_STATEMENTS = Counter(
+    "db_statements_total",
+    "SQL statements executed, by route template",
+    ["route"],
+)
+
+DB_STATEMENT_SECONDS = Counter(
+    "db_statement_seconds_total",
+    "Time spent executing SQL statements, by route template",
+    ["route"],
+)
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Time spent hashing or verifying passwords",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+
+JWT_DECODE_SECONDS = Histogram(
+    "jwt_decode_seconds",
+    "Time spent decoding and verifying JWTs",
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005),
+)
+
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total",
+    "Requests carrying an Idempotency-Key, by route and outcome",
+    ["route", "outcome"],
+)
+
+ARCHIVED_USERS = Counter(
+    "users_archived_total",
+    "Soft deleted users moved from users to users_archive",
+)
+
+ARCHIVE_BATCH_SECONDS = Histogram(
+    "users_archive_batch_seconds",
+    "Duration of one archival batch transaction",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+ARCHIVE_BACKLOG = Gauge(
+    "users_archive_backlog",
+    "Soft deleted users past the retention window still in users",
+    multiprocess_mode="max",
+)
+
+ARCHIVE_LAST_RUN = Gauge(
+    "users_archive_last_run_timestamp_seconds",
+    "Unix time the last archival pass finished",
+    multiprocess_mode="max",
+)
+
+CONCURRENCY_LIMIT = Gauge(
+    "concurrency_limit",
+    "Current adaptive concurrency limit (summed over workers)",
+    multiprocess_mode="livesum",
+)
+
+CONCURRENCY_REJECTED = Counter(
+    "concurrency_rejected_total",
+    "Requests shed by the concurrency limiter, by priority lane",
+    ["lane"],
+)
+
+DB_CIRCUIT_STATE = Gauge(
+    "db_circuit_state",
+    "Database circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ["database"],
+    multiprocess_mode="max",
+)
+
+DB_CIRCUIT_TRANSITIONS = Counter(
+    "db_circuit_transitions_total",
+    "Database circuit breaker state changes, by new state",
+    ["database", "state"],
+)
+
+DB_CIRCUIT_REJECTED = Counter(
+    "db_circuit_rejected_total",
+    "Connection checkouts failed fast by an open circuit breaker",
+    ["database"],
+)
+
+USER_CACHE_LOOKUPS = Counter(
+    "user_cache_lookups_total",
+    "Authenticated-user lookups served by the per-worker user cache, by result",
+    ["result"],
+)
+
+INVALIDATION_EVENTS = Counter(
+    "user_invalidation_events_total",
+    "User invalidation events, by bus backend and outcome",
+    ["backend", "outcome"],
+)
+
+AVAILABILITY_FILTER_LOOKUPS = Counter(
+    "availability_filter_lookups_total",
+    "Email/username uniqueness checks by filter outcome: definite_miss (no query), "
+    "taken, or false_positive (queried, found free)",
+    ["field", "result"],
+)
+
+AVAILABILITY_FILTER_BYTES = Gauge(
+    "availability_filter_bytes",
+    "Memory held by the taken-name Bloom filters (summed over workers)",
+    ["field"],
+    multiprocess_mode="livesum",
+)
+
+AVAILABILITY_FILTER_ITEMS = Gauge(
+    "availability_filter_items",
+    "Names added to the taken-name Bloom filter",
+    ["field"],
+    multiprocess_mode="max",
+)
+
+AVAILABILITY_FILTER_FALSE_POSITIVE_RATE = Gauge(
+    "availability_filter_false_positive_rate",
+    "Expected false-positive rate of the taken-name Bloom filter at its current fill",
+    ["field"],
+    multiprocess_mode="max",
+)
+
+INVALIDATION_LAG = Histogram(
+    "user_invalidation_lag_seconds",
+    "Delay from publishing a user invalidation to its delivery in another worker",
+    ["backend"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+
+    request = get_request_context()
+    if request is not None:
+        # Flushed per route by the middleware once the route is known
+        request.db_statements += 1
+        request.db_seconds += elapsed
+    else:
+        DB_STATEMENTS.labels(BACKGROUND_ROUTE).inc()
+        DB_STATEMENT_SECONDS.labels(BACKGROUND_ROUTE).inc(elapsed)
+
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """Attach statement count/time listeners to an engine (idempotent)."""
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render metrics in the Prometheus text exposition format.
+
+    Returns:
+        Tuple of (payload, content_type)
+    """
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a finished worker's live gauges in multiprocess mode."""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(pid)
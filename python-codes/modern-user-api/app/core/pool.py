@@ -0,0 +1,171 @@
+"""
+Connection pool instrumentation.
+Checkout latency, timeouts, occupancy and connection age from pool events.
+"""
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+# Checkout wait buckets in seconds (sub-millisecond up to the 30s pool timeout)
+CHECKOUT_WAIT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus-style cumulative buckets."""
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {"buckets": buckets, "sum": round(self.sum, 6), "count": self.count}
+
+
+class PoolStats:
+    """Counters collected from a pool's events and checkout path."""
+
+    def __init__(self):
+        self.checkout_wait = Histogram(CHECKOUT_WAIT_BUCKETS)
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.disconnects = 0
+        self.invalidations = 0
+        # id(dbapi_connection) -> monotonic time it was opened
+        self.connected_at: Dict[int, float] = {}
+
+    def attach(self, pool: Pool) -> None:
+        """Register pool event listeners feeding these stats."""
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "close", self._on_close)
+        event.listen(pool, "close_detached", self._on_close_detached)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connects += 1
+        self.connected_at[id(dbapi_connection)] = time.monotonic()
+
+    def _on_close(self, dbapi_connection, connection_record) -> None:
+        self.disconnects += 1
+        self.connected_at.pop(id(dbapi_connection), None)
+
+    def _on_close_detached(self, dbapi_connection) -> None:
+        self.disconnects += 1
+        self.connected_at.pop(id(dbapi_connection), None)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.invalidations += 1
+
+    def connection_ages(self) -> dict:
+        """Age summary of currently open connections, in seconds."""
+        now = time.monotonic()
+        ages = [now - opened for opened in self.connected_at.values()]
+        if not ages:
+            return {"open": 0, "max": 0.0, "mean": 0.0}
+        return {
+            "open": len(ages),
+            "max": round(max(ages), 3),
+            "mean": round(sum(ages) / len(ages), 3),
+        }
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that records how long each checkout waits.
+
+    The wait covers queueing for a free connection and, when the pool is
+    below its size, opening a new one. Pool timeouts are counted before
+    the TimeoutError propagates.
+
+    With a circuit breaker attached (``pool.breaker``), checkouts fail
+    immediately while it is open.
+    """
+
+    def __init__(self, creator, stats: Optional[PoolStats] = None, **kw):
+        # recreate() hands over the existing dispatch (and its listeners)
+        recreated = "_dispatch" in kw
+        super().__init__(creator, **kw)
+        self.stats = stats or PoolStats()
+        self.breaker = None
+        if not recreated:
+            self.stats.attach(self)
+
+    def _do_get(self):
+        if self.breaker is not None:
+            self.breaker.before_checkout()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.checkout_wait.observe(time.perf_counter() - started)
+        return connection
+
+    def recreate(self) -> "InstrumentedAsyncQueuePool":
+        # engine.dispose() swaps in a fresh pool; keep the counters going
+        new_pool = super().recreate()
+        new_pool.stats = self.stats
+        new_pool.breaker = self.breaker
+        return new_pool
+
+
+def pool_snapshot(pool: Pool) -> dict:
+    """Point-in-time view of pool occupancy plus accumulated stats."""
+    snapshot = {
+        "pool_class": type(pool).__name__,
+        "status": pool.status(),
+    }
+
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        snapshot.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # QueuePool reports negative overflow until the pool is full
+            "overflow": max(pool.overflow(), 0),
+            "timeout": pool.timeout(),
+        })
+
+    stats: Optional[PoolStats] = getattr(pool, "stats", None)
+    if stats is not None:
+        snapshot.update({
+            "checkouts": stats.checkouts,
+            "checkins": stats.checkins,
+            "timeouts": stats.timeouts,
+            "connects": stats.connects,
+            "disconnects": stats.disconnects,
+            "invalidations": stats.invalidations,
+            "checkout_wait_seconds": stats.checkout_wait.snapshot(),
+            "connection_age_seconds": stats.connection_ages(),
+        })
+
+    return snapshot
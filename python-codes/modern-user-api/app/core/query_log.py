@@ -0,0 +1,211 @@
+"""
+Sampled, structured slow-query log.
+Replaces engine echo with JSON records for slow or sampled statements only.
+
+Records are serialised on the event loop only when a statement qualifies;
+writing them happens on a background thread through a QueueHandler, so
+the loop never blocks on log I/O.
+"""
+import datetime
+import decimal
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.request_context import get_request_context
+from app.core.sql_budget import statement_shape
+
+logger = logging.getLogger("app.query_log")
+logger.propagate = False  # Records go through our queue only
+
+# Slowest executions kept per shape for EXPLAIN (in memory, never logged raw)
+MAX_CAPTURED_SHAPES = 100
+
+_listener: Optional[QueueListener] = None
+
+
+class CapturedQuery:
+    """Slowest observed execution of one statement shape."""
+
+    __slots__ = ("shape", "statement", "parameters", "duration_ms", "executions")
+
+    def __init__(self, shape: str, statement: str, parameters: Any, duration_ms: float):
+        self.shape = shape
+        self.statement = statement
+        self.parameters = parameters
+        self.duration_ms = duration_ms
+        self.executions = 1
+
+
+class QueryLogState:
+    """Runtime state of the query log; ``explain_enabled`` is admin-toggled."""
+
+    def __init__(self):
+        self.explain_enabled = settings.QUERY_LOG_EXPLAIN
+        self.captured: Dict[str, CapturedQuery] = {}
+
+    def capture(self, statement: str, parameters: Any, duration_ms: float) -> None:
+        shape = statement_shape(statement)
+        captured = self.captured.get(shape)
+        if captured is not None:
+            captured.executions += 1
+            if duration_ms > captured.duration_ms:
+                captured.statement = statement
+                captured.parameters = parameters
+                captured.duration_ms = duration_ms
+            return
+
+        if len(self.captured) >= MAX_CAPTURED_SHAPES:
+            fastest = min(self.captured.values(), key=lambda q: q.duration_ms)
+            if fastest.duration_ms >= duration_ms:
+                return
+            del self.captured[fastest.shape]
+        self.captured[shape] = CapturedQuery(shape, statement, parameters, duration_ms)
+
+    def slowest(self, limit: int) -> List[CapturedQuery]:
+        return sorted(self.captured.values(), key=lambda q: q.duration_ms, reverse=True)[:limit]
+
+
+state = QueryLogState()
+
+
+def redact_value(value: Any) -> Any:
+    """Keep non-identifying scalars; mask anything that could be user data."""
+    if value is None or isinstance(value, (bool, int, float, decimal.Decimal)):
+        return value
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [redact_value(item) for item in value]
+    return f"<redacted {type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Redact a DBAPI parameter set (sequence or mapping)."""
+    if isinstance(parameters, dict):
+        return {key: redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact_value(value) for value in parameters]
+    return redact_value(parameters)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_log_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_log_started", None)
+    if started is None:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    slow = duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS
+    if slow and state.explain_enabled:
+        state.capture(statement, parameters, duration_ms)
+
+    if not slow and not (
+        settings.QUERY_LOG_SAMPLE_RATE and random.random() < settings.QUERY_LOG_SAMPLE_RATE
+    ):
+        return
+
+    request = get_request_context()
+    record = {
+        "event": "slow_query" if slow else "sampled_query",
+        "duration_ms": round(duration_ms, 3),
+        "route": request.route if request is not None else "<background>",
+        "rows": cursor.rowcount,
+        "executemany": executemany,
+        "statement": statement_shape(statement),
+        "parameters": redact_parameters(parameters),
+    }
+    logger.warning(json.dumps(record, default=str))
+
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """Attach the query log listeners to an engine (idempotent)."""
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def start_query_log() -> None:
+    """Route query log records through a background writer thread."""
+    global _listener
+    if _listener is not None:
+        return
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter("%(message)s"))
+
+    logger.addHandler(QueueHandler(records))
+    logger.setLevel(logging.INFO)
+    _listener = QueueListener(records, stream)
+    _listener.start()
+
+
+def stop_query_log() -> None:
+    """Flush pending records and stop the writer thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    for handler in list(logger.handlers):
+        if isinstance(handler, QueueHandler):
+            logger.removeHandler(handler)
+
+
+async def explain_slowest(engine: AsyncEngine, limit: int) -> List[dict]:
+    """
+    Run EXPLAIN (ANALYZE, BUFFERS) for the slowest captured SELECT shapes.
+
+    ANALYZE executes the statement again, so only read-only statements
+    are explained. PostgreSQL only.
+
+    Returns:
+        One entry per shape with its slowest duration and plan (or error)
+    """
+    if engine.dialect.name != "postgresql":
+        raise ValueError("EXPLAIN capture requires PostgreSQL")
+
+    results = []
+    for captured in state.slowest(limit):
+        entry = {
+            "statement": captured.shape,
+            "slowest_ms": round(captured.duration_ms, 3),
+            "executions": captured.executions,
+        }
+        if not captured.statement.lstrip().upper().startswith("SELECT"):
+            entry["plan"] = None
+            entry["error"] = "Only SELECT statements are explained"
+            results.append(entry)
+            continue
+
+        try:
+            async with engine.connect() as conn:
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + captured.statement,
+                    captured.parameters,
+                )
+                entry["plan"] = result.scalar()
+        except Exception as e:
+            entry["plan"] = None
+            entry["error"] = str(e)
+
+        logger.warning(json.dumps({"event": "query_plan", **entry}, default=str))
+        results.append(entry)
+
+    return results
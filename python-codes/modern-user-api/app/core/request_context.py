@@ -0,0 +1,55 @@
+"""
+Request-scoped context shared by middleware and database event hooks.
+Lets engine-level listeners attribute work to the request that caused it.
+"""
+from contextvars import ContextVar, Token
+from typing import Optional
+
+
+class RequestContext:
+    """Mutable per-request accumulator, set by the outermost middleware."""
+
+    __slots__ = ("scope", "db_statements", "db_seconds")
+
+    def __init__(self, scope: dict):
+        self.scope = scope  # The router writes the matched route into it
+        self.db_statements = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        """Matched route template, or ``<unmatched>`` before routing."""
+        return route_template(self.scope)
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar(
+    "request_context", default=None
+)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """Return the context of the request being served, if any."""
+    return _request_context.get()
+
+
+def set_request_context(context: RequestContext) -> Token:
+    """Install a request context; pass the token to reset_request_context."""
+    return _request_context.set(context)
+
+
+def reset_request_context(token: Token) -> None:
+    """Restore the previous request context."""
+    _request_context.reset(token)
+
+
+def route_template(scope: dict) -> str:
+    """
+    Route path template for an ASGI scope (e.g. ``/api/v1/users/{user_id}``).
+
+    Only available after the router has matched; unmatched requests
+    share one label so arbitrary URLs cannot blow up metric cardinality.
+    """
+    route = scope.get("route")
+    if route is None:
+        return "<unmatched>"
+    return getattr(route, "path_format", None) or getattr(route, "path", "<unmatched>")
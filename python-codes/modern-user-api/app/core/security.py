@@ -3,15 +3,26 @@ Security utilities for JWT tokens and password hashing.
 Modern security practices with proper error handling.
 """
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-
 from app.core.config import settings
+from app.core.metrics import JWT_DECODE_SECONDS, PASSWORD_HASH_SECONDS
+
+# jose and passlib/bcrypt are imported on first use, not at import time,
+# to keep worker spawn and test collection fast.
+
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """Password hashing context, built on first use."""
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    )
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -25,6 +36,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     Returns:
         Encoded JWT token
     """
+    from jose import jwt
+
     to_encode = data.copy()
     
     if expires_delta:
@@ -53,12 +66,15 @@ def verify_token(token: str) -> Optional[dict]:
     Returns:
         Token payload if valid, None if invalid
     """
+    from jose import JWTError, jwt
+
     try:
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
+        with JWT_DECODE_SECONDS.time():
+            payload = jwt.decode(
+                token, 
+                settings.SECRET_KEY, 
+                algorithms=[settings.ALGORITHM]
+            )
         return payload
     except JWTError:
         return None
@@ -74,7 +90,8 @@ def hash_password(password: str) -> str:
     Returns:
         Hashed password
     """
-    return pwd_context.hash(password)
+    with PASSWORD_HASH_SECONDS.labels("hash").time():
+        return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -88,7 +105,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if password is correct, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    with PASSWORD_HASH_SECONDS.labels("verify").time():
+        return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def generate_password_reset_token(email: str) -> str:
@@ -101,6 +119,8 @@ def generate_password_reset_token(email: str) -> str:
     Returns:
         Password reset token
     """
+    from jose import jwt
+
     delta = timedelta(hours=24)  # Reset token valid for 24 hours
     now = datetime.utcnow()
     expires = now + delta
@@ -125,12 +145,15 @@ def verify_password_reset_token(token: str) -> Optional[str]:
     Returns:
         Email if token is valid, None if invalid
     """
+    from jose import JWTError, jwt
+
     try:
-        decoded_token = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
+        with JWT_DECODE_SECONDS.time():
+            decoded_token = jwt.decode(
+                token, 
+                settings.SECRET_KEY, 
+                algorithms=[settings.ALGORITHM]
+            )
         
         if decoded_token.get("type") != "password_reset":
             return None
@@ -0,0 +1,163 @@
+"""
+Per-request SQL statement budgets and N+1 detection.
+Routes declare how many statements they may run; overruns warn or fail.
+"""
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import URL, Engine
+
+from app.core.config import settings
+from app.core.request_context import route_template
+
+logger = logging.getLogger("app.sql_budget")
+
+_IN_LIST = re.compile(r"\bIN \([^()]*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class SQLBudgetExceeded(RuntimeError):
+    """Raised in strict mode when a route runs more statements than declared."""
+
+
+class StatementTracker:
+    """
+    Counts statements and their shapes for one request.
+
+    Counts are kept per database so that with several databases (sharded
+    mode) a budget still means round trips to any one server, and the
+    same statement sent to each shard is not mistaken for an N+1.
+    """
+
+    __slots__ = ("count", "shapes", "per_database")
+
+    def __init__(self):
+        self.count = 0
+        self.shapes: Counter = Counter()
+        self.per_database: Counter = Counter()
+
+    def record(self, statement: str, database: str = "") -> None:
+        self.count += 1
+        self.per_database[database] += 1
+        self.shapes[(database, statement_shape(statement))] += 1
+
+    @property
+    def busiest(self) -> int:
+        """Statements sent to the most used database."""
+        return max(self.per_database.values(), default=0)
+
+    def repeated_shapes(self, threshold: int = 2) -> list[tuple[str, int]]:
+        """Shapes executed at least ``threshold`` times on one database, most frequent first."""
+        return [(shape, n) for (_, shape), n in self.shapes.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        multiple = len(self.per_database) > 1
+        lines = [
+            f"  {n}x [{database}] {shape}" if multiple else f"  {n}x {shape}"
+            for (database, shape), n in self.shapes.most_common()
+        ]
+        return "\n".join(lines)
+
+
+_active_tracker: ContextVar[Optional[StatementTracker]] = ContextVar(
+    "sql_budget_tracker", default=None
+)
+
+
+def statement_shape(statement: str) -> str:
+    """Normalise a statement so repeats differing only in IN-list size match."""
+    shape = _IN_LIST.sub("IN (...)", statement)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def _database_key(url: URL) -> str:
+    """
+    Identify the database a statement went to.
+
+    Host and port are part of it: shards on different servers usually
+    share a database name. Engines on one URL (the reader and writer of
+    embedded mode) count as one database.
+    """
+    if url.host:
+        port = f":{url.port}" if url.port else ""
+        return f"{url.host}{port}/{url.database or ''}"
+    return url.database or ""
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tracker = _active_tracker.get()
+    if tracker is not None:
+        tracker.record(statement, _database_key(conn.engine.url))
+
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """Attach the statement budget listener to an engine (idempotent)."""
+    if not event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _check(tracker: StatementTracker, max_statements: int, route: str) -> None:
+    repeated = tracker.repeated_shapes(settings.SQL_N_PLUS_ONE_THRESHOLD)
+
+    if tracker.busiest > max_statements:
+        counted = f"{tracker.count} statements"
+        if len(tracker.per_database) > 1:
+            counted = f"{tracker.busiest} statements on one database, {tracker.count} in total"
+        message = (
+            f"SQL budget exceeded for {route}: {counted} "
+            f"(budget {max_statements})\n{tracker.report()}"
+        )
+    elif repeated:
+        message = (
+            f"Possible N+1 in {route}: statement shape repeated "
+            f"{repeated[0][1]} times\n{tracker.report()}"
+        )
+    else:
+        return
+
+    if settings.SQL_BUDGET_MODE == "raise":
+        raise SQLBudgetExceeded(message)
+    logger.warning(message)
+
+
+def sql_budget(max_statements: int) -> Callable:
+    """
+    Build a route dependency enforcing a SQL statement budget.
+
+    Usage:
+        @router.get("/", dependencies=[Depends(sql_budget(3))])
+
+    Statements are counted from the moment route dependencies are solved
+    until the endpoint returns; the budget applies per database. With SQL_BUDGET_MODE="warn" an overrun
+    (or a statement shape repeated SQL_N_PLUS_ONE_THRESHOLD times) is
+    logged with a per-shape report; with "raise" it fails the request,
+    which is what test runs should use. "off" disables tracking.
+
+    Args:
+        max_statements: Maximum statements the route may execute
+
+    Returns:
+        Dependency callable for ``Depends``
+    """
+    async def enforce_sql_budget(request: Request):
+        if settings.SQL_BUDGET_MODE == "off":
+            yield
+            return
+
+        tracker = StatementTracker()
+        _active_tracker.set(tracker)
+        try:
+            yield
+        finally:
+            _active_tracker.set(None)
+
+        # Only reached when the endpoint succeeded
+        route = f"{request.method} {route_template(request.scope)}"
+        _check(tracker, max_statements, route)
+
+    return enforce_sql_budget
@@ -0,0 +1,137 @@
+"""
+Embedded single-node mode on SQLite (DATABASE_URL=sqlite+aiosqlite:///path/users.db).
+WAL journal, tuned pragmas, concurrent readers and one writer connection that queues all writes.
+
+SQLite allows a single writer at a time. Rather than letting concurrent
+write transactions collide on the database lock (SQLITE_BUSY, retries),
+each worker writes through one connection: the writer engine's pool
+holds exactly one, so write transactions wait their turn in the pool's
+FIFO queue, at most SQLITE_WRITE_TIMEOUT seconds. Reads use a separate
+pool of read-only connections; with WAL they neither block nor wait for
+the writer.
+
+EmbeddedSession picks the engine per statement: flushes and INSERT /
+UPDATE / DELETE statements go to the writer, and once a transaction has
+written, its later reads follow it there so they see its own changes.
+Everything else reads from the reader pool.
+
+Pragmas, set on every connection:
+    journal_mode=WAL     readers and the writer do not block each other
+    synchronous          NORMAL by default: safe against application
+                         crashes; a power cut may lose the last commits
+    mmap_size            reads served from the OS page cache via mmap
+    cache_size           per-connection page cache
+    busy_timeout         waits for other processes' writers (workers)
+    foreign_keys, temp_store=MEMORY
+    query_only           on reader connections, so a misrouted write
+                         fails loudly instead of bypassing the queue
+"""
+import os
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+def is_sqlite_url(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def embedded_mode() -> bool:
+    """True when DATABASE_URL is SQLite and the app is not sharded."""
+    return not settings.SHARD_URLS and is_sqlite_url(settings.DATABASE_URL)
+
+
+def ensure_database_dir(url: str) -> None:
+    """Create the directory of a SQLite database file if it is missing."""
+    database = make_url(url).database
+    if database and database != ":memory:":
+        directory = os.path.dirname(os.path.abspath(database))
+        os.makedirs(directory, exist_ok=True)
+
+
+def configure_sqlite_engine(sync_engine: Engine, writer: bool) -> None:
+    """
+    Apply the embedded-mode pragmas to every new connection of an engine.
+
+    Args:
+        writer: Begin transactions with BEGIN IMMEDIATE (take the write
+            lock up front, so a transaction never fails half way when
+            upgrading from read to write); otherwise mark connections
+            query_only
+    """
+    pragmas = {
+        "journal_mode": "WAL",
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,  # Negative: KiB, not pages
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "foreign_keys": "ON",
+        "temp_store": "MEMORY",
+    }
+    if not writer:
+        pragmas["query_only"] = "ON"
+
+    def _connect(dbapi_connection, connection_record) -> None:
+        # Let SQLAlchemy, not the driver, emit BEGIN (see _begin)
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    def _begin(conn) -> None:
+        # On the raw cursor: like other drivers' implicit BEGIN, it is not
+        # a statement for SQL budgets and query metrics
+        cursor = conn.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE" if writer else "BEGIN")
+        cursor.close()
+
+    event.listen(sync_engine, "connect", _connect)
+    event.listen(sync_engine, "begin", _begin)
+
+
+class EmbeddedSession(Session):
+    """Session reading from the reader pool and writing through the writer."""
+
+    def __init__(self, reader: AsyncEngine, writer: AsyncEngine, **kwargs):
+        super().__init__(**kwargs)
+        self.reader = reader.sync_engine
+        self.writer = writer.sync_engine
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or self.info.get("writing") or getattr(clause, "is_dml", False):
+            # Stays on the writer until the transaction ends
+            self.info["writing"] = True
+            return self.writer
+        return self.reader
+
+
+@event.listens_for(EmbeddedSession, "after_transaction_end")
+def _transaction_ended(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("writing", None)
+
+
+_reader: Optional[AsyncEngine] = None
+
+
+def get_reader_engine() -> AsyncEngine:
+    """The read-only pool of embedded mode (the writer is app.database.get_engine())."""
+    global _reader
+    if _reader is None:
+        from app.database import create_instrumented_engine
+
+        _reader = create_instrumented_engine(settings.DATABASE_URL, role="reader")
+    return _reader
+
+
+async def dispose_reader_engine() -> None:
+    global _reader
+    if _reader is not None:
+        await _reader.dispose()
+        _reader = None
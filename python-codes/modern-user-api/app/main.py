@@ -1,25 +1,60 @@
 """
 FastAPI main application with modern configuration.
 Production-ready setup with proper middleware and error handling.
+
+The application is built by ``create_app()``. Importing this module is
+cheap and side-effect free; ``app.main:app`` is created on first access,
+so ``uvicorn app.main:app`` and ``uvicorn --factory app.main:create_app``
+both work.
 """
+import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Request, status
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
-import uvicorn
+from fastapi.responses import JSONResponse, Response
 
-from app.api.v1 import auth, users
 from app.core.config import settings
-from app.database import create_tables
+
+DESCRIPTION = """
+    Modern User Management API built with FastAPI and PostgreSQL.
+    
+    ## Features
+    
+    * **Authentication**: JWT-based authentication system
+    * **User Management**: Complete CRUD operations for users
+    * **Security**: Password hashing, token validation, role-based access
+    * **Validation**: Comprehensive input validation with Pydantic
+    * **Async**: Fully asynchronous with SQLAlchemy async
+    * **Documentation**: Auto-generated API documentation
+    
+    ## Authentication
+    
+    1. Register a new user at `/api/v1/auth/register`
+    2. Login to get access token at `/api/v1/auth/login`
+    3. Use the token in Authorization header: `Bearer <token>`
+    
+    ## User Roles
+    
+    * **Regular User**: Can view and update their own profile
+    * **Superuser**: Can manage all users and view statistics
+    """
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
+    from sqlalchemy.engine import make_url
+
+    from app.core import lifecycle
+    from app.core.metrics import mark_process_dead
+    from app.core.query_log import start_query_log
+    from app.database import create_tables
+
     # Startup
     print("🚀 Starting up Modern User API...")
+    print(f"🔧 Using DATABASE_URL: {make_url(settings.DATABASE_URL).render_as_string()}")
+    
+    start_query_log()
     
     # Create database tables (use Alembic in production)
     if settings.DEBUG:
@@ -30,74 +65,25 @@ async def lifespan(app: FastAPI):
             print(f"⚠️ Database connection failed: {e}")
             print("📝 API will work without database for now")
     
+    # Pre-open and prime pool connections; /ready flips only after this
+    await lifecycle.startup()
+    
     print("✅ Application startup complete")
     
     yield
     
     # Shutdown
     print("🛑 Shutting down Modern User API...")
-    print("✅ Application shutdown complete")
-
-
-# Create FastAPI application
-app = FastAPI(
-    title=settings.APP_NAME,
-    version=settings.APP_VERSION,
-    description="""
-    Modern User Management API built with FastAPI and PostgreSQL.
-    
-    ## Features
-    
-    * **Authentication**: JWT-based authentication system
-    * **User Management**: Complete CRUD operations for users
-    * **Security**: Password hashing, token validation, role-based access
-    * **Validation**: Comprehensive input validation with Pydantic
-    * **Async**: Fully asynchronous with SQLAlchemy async
-    * **Documentation**: Auto-generated API documentation
-    
-    ## Authentication
-    
-    1. Register a new user at `/api/v1/auth/register`
-    2. Login to get access token at `/api/v1/auth/login`
-    3. Use the token in Authorization header: `Bearer <token>`
     
-    ## User Roles
+    # Refuse new work, drain in-flight requests, flush logs, close the pool
+    await lifecycle.shutdown()
     
-    * **Regular User**: Can view and update their own profile
-    * **Superuser**: Can manage all users and view statistics
-    """,
-    contact={
-        "name": "API Support",
-        "email": "support@example.com",
-    },
-    license_info={
-        "name": "MIT License",
-        "url": "https://opensource.org/licenses/MIT",
-    },
-    lifespan=lifespan,
-    docs_url="/docs" if settings.DEBUG else None,
-    redoc_url="/redoc" if settings.DEBUG else None,
-)
-
-# Add security middleware
-app.add_middleware(
-    TrustedHostMiddleware, 
-    allowed_hosts=["localhost", "127.0.0.1", "*.example.com"]
-)
-
-# Add CORS middleware
-if settings.BACKEND_CORS_ORIGINS:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
-        allow_credentials=True,
-        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        allow_headers=["*"],
-    )
+    # Drop this worker's live gauges (no-op outside multiprocess mode)
+    mark_process_dead(os.getpid())
+    print("✅ Application shutdown complete")
 
 
-# Global exception handler
-@app.exception_handler(ValueError)
+# Global exception handlers
 async def value_error_handler(request: Request, exc: ValueError):
     """Handle ValueError exceptions globally."""
     return JSONResponse(
@@ -106,7 +92,6 @@ async def value_error_handler(request: Request, exc: ValueError):
     )
 
 
-@app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions with consistent format."""
     return JSONResponse(
@@ -119,7 +104,21 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     )
 
 
-@app.exception_handler(Exception)
+async def database_unavailable_handler(request: Request, exc: Exception):
+    """Answer requests failed fast by an open database circuit breaker."""
+    from app.core.circuit_breaker import retry_after_header
+
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "detail": "Database temporarily unavailable",
+            "type": "database_unavailable",
+            "status_code": status.HTTP_503_SERVICE_UNAVAILABLE
+        },
+        headers={"Retry-After": retry_after_header(exc)}
+    )
+
+
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle unexpected exceptions."""
     if settings.DEBUG:
@@ -145,7 +144,6 @@ async def general_exception_handler(request: Request, exc: Exception):
 
 
 # Health check endpoint
-@app.get("/health", tags=["Health"])
 async def health_check():
     """Health check endpoint for monitoring."""
     return {
@@ -156,8 +154,41 @@ async def health_check():
     }
 
 
+# Readiness endpoint
+async def readiness_check():
+    """
+    Readiness probe: 503 until warm-up has finished, while draining and
+    while the database does not answer (cached probe, see lifecycle).
+    
+    /health stays a pure liveness check: restarting the worker would
+    not fix an unreachable database.
+    """
+    from app.core.lifecycle import database_probe, lifecycle
+
+    if not lifecycle.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "draining" if lifecycle.draining else "starting"}
+        )
+    problem = await database_probe.check()
+    if problem is not None:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "database_unavailable", "detail": problem}
+        )
+    return {"status": "ready"}
+
+
+# Prometheus metrics endpoint
+async def metrics():
+    """Prometheus scrape endpoint (aggregated across workers)."""
+    from app.core.metrics import render_metrics
+
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
 # Root endpoint
-@app.get("/", tags=["Root"])
 async def root():
     """Root endpoint with API information."""
     return {
@@ -168,26 +199,142 @@ async def root():
     }
 
 
-# Include API routers
-app.include_router(
-    auth.router,
-    prefix=f"{settings.API_V1_STR}/auth",
-    tags=["Authentication"]
-)
+def create_app() -> FastAPI:
+    """Build the FastAPI application with middleware, handlers and routers."""
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.middleware.trustedhost import TrustedHostMiddleware
+
+    from app.api.v1 import admin, auth, users
+    from app.core.circuit_breaker import DatabaseUnavailable
+    from app.core.concurrency import AdaptiveLimiter
+    from app.middleware.compression import CompressionMiddleware
+    from app.middleware.concurrency import ConcurrencyLimitMiddleware
+    from app.middleware.lifecycle import DrainMiddleware
+    from app.middleware.metrics import MetricsMiddleware
+
+    # Create FastAPI application
+    app = FastAPI(
+        title=settings.APP_NAME,
+        version=settings.APP_VERSION,
+        description=DESCRIPTION,
+        contact={
+            "name": "API Support",
+            "email": "support@example.com",
+        },
+        license_info={
+            "name": "MIT License",
+            "url": "https://opensource.org/licenses/MIT",
+        },
+        lifespan=lifespan,
+        docs_url="/docs" if settings.DEBUG else None,
+        redoc_url="/redoc" if settings.DEBUG else None,
+    )
+
+    # Add security middleware
+    app.add_middleware(
+        TrustedHostMiddleware, 
+        allowed_hosts=["localhost", "127.0.0.1", "*.example.com"]
+    )
+
+    # Add CORS middleware
+    if settings.BACKEND_CORS_ORIGINS:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
+            allow_credentials=True,
+            allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            allow_headers=["*"],
+        )
+
+    # Compress large responses (per-route opt-out via @skip_compression)
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            levels={
+                "gzip": settings.COMPRESSION_GZIP_LEVEL,
+                "br": settings.COMPRESSION_BROTLI_QUALITY,
+                "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+            },
+        )
+
+    # Shed load beyond the adaptive limit before any work is done
+    if settings.CONCURRENCY_LIMIT_ENABLED:
+        app.add_middleware(
+            ConcurrencyLimitMiddleware,
+            limiter=AdaptiveLimiter(
+                initial_limit=settings.CONCURRENCY_INITIAL_LIMIT
+                or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+                min_limit=settings.CONCURRENCY_MIN_LIMIT,
+                max_limit=settings.CONCURRENCY_MAX_LIMIT,
+                tolerance=settings.CONCURRENCY_LATENCY_TOLERANCE,
+            ),
+            api_prefix=settings.API_V1_STR,
+        )
+
+    # Track in-flight requests for graceful drain
+    app.add_middleware(DrainMiddleware)
+
+    # Add metrics middleware last so it wraps the whole stack
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    # Global exception handlers
+    app.add_exception_handler(ValueError, value_error_handler)
+    app.add_exception_handler(HTTPException, http_exception_handler)
+    app.add_exception_handler(DatabaseUnavailable, database_unavailable_handler)
+    app.add_exception_handler(Exception, general_exception_handler)
+
+    # Operational endpoints
+    app.add_api_route("/health", health_check, methods=["GET"], tags=["Health"])
+    app.add_api_route("/ready", readiness_check, methods=["GET"], tags=["Health"])
+    if settings.METRICS_ENABLED:
+        app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+    app.add_api_route("/", root, methods=["GET"], tags=["Root"])
 
-app.include_router(
-    users.router,
-    prefix=f"{settings.API_V1_STR}/users",
-    tags=["Users"]
-)
+    # Include API routers
+    app.include_router(
+        auth.router,
+        prefix=f"{settings.API_V1_STR}/auth",
+        tags=["Authentication"]
+    )
+
+    app.include_router(
+        users.router,
+        prefix=f"{settings.API_V1_STR}/users",
+        tags=["Users"]
+    )
+
+    app.include_router(
+        admin.router,
+        prefix=f"{settings.API_V1_STR}/admin",
+        tags=["Admin"]
+    )
+
+    return app
+
+
+_app = None
+
+
+def __getattr__(name: str):
+    """Build ``app`` on first access so importing this module stays cheap."""
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Development server
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
         log_level="info" if not settings.DEBUG else "debug"
-    )
\ No newline at end of file
+    )
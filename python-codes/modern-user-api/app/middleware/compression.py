@@ -0,0 +1,208 @@
+"""
+Content-negotiated response compression (zstd, brotli, gzip).
+Pure ASGI; buffers small bodies, stream-compresses streaming responses.
+
+brotli and zstd are optional: install the ``compression`` extra
+(``brotli``, ``zstandard``) to enable them; gzip is always available.
+"""
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml",
+)
+
+
+class Compressor:
+    """Uniform streaming interface over zlib, brotli and zstandard."""
+
+    def __init__(self, compress: Callable[[bytes], bytes], finish: Callable[[], bytes]):
+        self.compress = compress
+        self.finish = finish
+
+
+def _gzip(level: int) -> Compressor:
+    obj = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    return Compressor(obj.compress, obj.flush)
+
+
+def _brotli(level: int) -> Compressor:
+    obj = brotli.Compressor(quality=level)
+    return Compressor(obj.process, obj.finish)
+
+
+def _zstd(level: int) -> Compressor:
+    obj = zstandard.ZstdCompressor(level=level).compressobj()
+    return Compressor(obj.compress, obj.flush)
+
+
+def available_encodings() -> Dict[str, Callable[[int], Compressor]]:
+    """Supported encodings in server preference order (best ratio/CPU first)."""
+    encodings = {}
+    if zstandard is not None:
+        encodings["zstd"] = _zstd
+    if brotli is not None:
+        encodings["br"] = _brotli
+    encodings["gzip"] = _gzip
+    return encodings
+
+
+def negotiate(accept_encoding: str, supported: List[str]) -> Optional[str]:
+    """Pick the first supported encoding the client accepts with q > 0."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    for encoding in supported:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def skip_compression(endpoint: Callable) -> Callable:
+    """Route decorator: never compress this endpoint's responses."""
+    endpoint.__skip_compression__ = True
+    return endpoint
+
+
+class CompressionMiddleware:
+    """
+    Compress responses according to the client's Accept-Encoding.
+
+    Bodies below ``minimum_size`` and non-text content types pass through
+    untouched. A response whose first body message announces more_body is
+    compressed chunk by chunk, so streaming exports never sit in memory.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        levels: Optional[Dict[str, int]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.factories = available_encodings()
+        self.supported = list(self.factories)
+        self.levels = {"zstd": 3, "br": 4, "gzip": 6, **(levels or {})}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate(accept_encoding, self.supported) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(
+            scope, send, encoding, self.factories[encoding], self.levels[encoding], self.minimum_size
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-response state machine wrapping ``send``."""
+
+    def __init__(self, scope, send, encoding, factory, level, minimum_size):
+        self.scope = scope
+        self.downstream = send
+        self.encoding = encoding
+        self.factory = factory
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+        self.passthrough = False
+
+    def _should_compress(self, headers: MutableHeaders) -> bool:
+        if self.start_message["status"] in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        endpoint = getattr(self.scope.get("route"), "endpoint", None)
+        return not getattr(endpoint, "__skip_compression__", False)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the headers until we have seen the first body chunk
+            self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=list(self.start_message["headers"]))
+            compressible = self._should_compress(headers)
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+
+            if not compressible or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                self.start_message["headers"] = headers.raw
+                await self.downstream(self.start_message)
+                await self.downstream(message)
+                return
+
+            self.compressor = self.factory(self.level)
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                # Length unknown up front: fall back to chunked transfer
+                del headers["Content-Length"]
+                self.start_message["headers"] = headers.raw
+                await self.downstream(self.start_message)
+            else:
+                payload = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(payload))
+                self.start_message["headers"] = headers.raw
+                await self.downstream(self.start_message)
+                await self.downstream({"type": "http.response.body", "body": payload})
+                return
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        if chunk or not more_body:
+            await self.downstream(
+                {"type": "http.response.body", "body": chunk, "more_body": more_body}
+            )
@@ -0,0 +1,102 @@
+"""
+Pure ASGI adaptive concurrency limiter with priority lanes.
+Sheds requests beyond the current limit immediately with 503 instead of queueing them.
+"""
+import time
+from typing import List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.concurrency import AdaptiveLimiter
+from app.core.metrics import CONCURRENCY_LIMIT, CONCURRENCY_REJECTED
+
+_REJECTED_BODY = (
+    b'{"detail":"Server is overloaded, retry later","type":"http_error","status_code":503}'
+)
+
+
+def default_lanes(api_prefix: str) -> List[Tuple[Optional[str], str, Optional[str]]]:
+    """
+    (method, path prefix, lane) rules; the first match wins, else "normal".
+
+    Lane None bypasses the limiter: probes and metrics must answer even
+    when the API is overloaded, and they do not touch the database.
+    """
+    return [
+        ("GET", "/health", None),
+        ("GET", "/ready", None),
+        ("GET", "/metrics", None),
+        ("POST", f"{api_prefix}/auth/login", "critical"),
+        ("POST", f"{api_prefix}/auth/refresh", "critical"),
+        ("GET", f"{api_prefix}/users/stats", "low"),
+        ("GET", f"{api_prefix}/auth/availability", "low"),  # Per keystroke, advisory
+        (None, f"{api_prefix}/admin/", "low"),
+    ]
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Admits requests while in-flight < limit * lane share, rejects the rest.
+
+    Admitted requests report their latency back to the limiter, which
+    adjusts the limit (see app.core.concurrency). Rejections are immediate:
+    a fast 503 with Retry-After is cheaper for everyone than a request
+    that waits 30 seconds for a pool connection.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: AdaptiveLimiter, api_prefix: str):
+        self.app = app
+        self.limiter = limiter
+        self.lanes = default_lanes(api_prefix)
+        # The admin user list shares its path with single-user routes
+        self.user_list_paths = {f"{api_prefix}/users", f"{api_prefix}/users/"}
+        CONCURRENCY_LIMIT.set(limiter.limit)
+
+    def lane_for(self, scope: Scope) -> Optional[str]:
+        method, path = scope["method"], scope["path"]
+        if method == "GET" and path in self.user_list_paths:
+            return "low"
+        for rule_method, prefix, lane in self.lanes:
+            if (rule_method is None or rule_method == method) and path.startswith(prefix):
+                return lane
+        return "normal"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        lane = self.lane_for(scope)
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not self.limiter.try_acquire(lane):
+            CONCURRENCY_REJECTED.labels(lane).inc()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", b"1"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _REJECTED_BODY})
+            return
+
+        status_code = 500  # Reported if the app raises before responding
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Fast failures would make latency look better than it is
+            rtt = time.perf_counter() - started if status_code < 500 else None
+            self.limiter.release(rtt)
+            CONCURRENCY_LIMIT.set(self.limiter.limit)
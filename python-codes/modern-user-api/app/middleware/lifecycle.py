@@ -0,0 +1,41 @@
+"""
+Pure ASGI middleware tracking in-flight requests for graceful drain.
+Refuses new requests with 503 once the worker has started shutting down.
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.lifecycle import lifecycle
+
+
+class DrainMiddleware:
+    """Counts requests in flight and turns new ones away while draining."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if lifecycle.draining:
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", b"1"),
+                    (b"connection", b"close"),
+                ],
+            })
+            await send({
+                "type": "http.response.body",
+                "body": b'{"detail":"Server is shutting down","type":"http_error","status_code":503}',
+            })
+            return
+
+        lifecycle.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lifecycle.request_finished()
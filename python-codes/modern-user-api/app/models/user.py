@@ -1,12 +1,12 @@
 """
 User SQLAlchemy model with modern features.
-Includes password hashing, timestamps, and soft delete.
+Includes password hashing, timestamps, soft delete and the archive table.
 """
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
-from sqlalchemy.sql import func
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Table, Text
+from sqlalchemy.sql import func, text
 
 from app.database import Base
 
@@ -15,6 +15,20 @@ class User(Base):
     """User model with comprehensive fields and security features."""
     
     __tablename__ = "users"
+    __table_args__ = (
+        # Partial: only soft deleted rows, which the archival job scans
+        Index(
+            "ix_users_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+        # Keyset order of the change feed (GET /users/changes)
+        Index("ix_users_updated_at_id", "updated_at", "id"),
+        # Never reuse the ID of a deleted row (SQLite otherwise hands out
+        # max(id) + 1): archived users keep theirs in users_archive
+        {"sqlite_autoincrement": True},
+    )
 
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
@@ -71,4 +85,24 @@ class User(Base):
     def restore(self) -> None:
         """Restore soft deleted user."""
         self.deleted_at = None
-        self.is_active = True
\ No newline at end of file
+        self.is_active = True
+
+
+# Soft deleted users past the retention window, moved out of ``users`` by
+# app.services.archive. Same columns, but no unique constraints: an email
+# freed by archival can be registered, deleted and archived again.
+users_archive = Table(
+    "users_archive",
+    Base.metadata,
+    *(
+        Column(
+            column.name,
+            column.type,
+            primary_key=column.primary_key,
+            autoincrement=False,  # IDs come from the users table
+            nullable=column.nullable,
+        )
+        for column in User.__table__.columns
+    ),
+    Column("archived_at", DateTime(timezone=True), nullable=False),
+)
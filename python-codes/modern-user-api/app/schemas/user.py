@@ -3,68 +3,144 @@ User Pydantic schemas for request/response validation.
 Comprehensive schemas with validation rules.
 """
 from datetime import datetime
-from typing import Optional
+from functools import lru_cache
+from typing import Annotated, Any, Optional, get_args
 
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    StringConstraints,
+    TypeAdapter,
+    ValidationInfo,
+    create_model,
+    field_validator
+)
+
+
+# Constrained string types (length checks run inside pydantic-core)
+Username = Annotated[str, StringConstraints(min_length=3, max_length=50)]
+FullName = Annotated[str, StringConstraints(max_length=100)]
+Bio = Annotated[str, StringConstraints(max_length=500)]
+Password = Annotated[str, StringConstraints(min_length=8, max_length=100)]
+
+
+def check_username(v: Optional[str]) -> Optional[str]:
+    """Alphanumeric with underscores allowed."""
+    if v is not None and not v.replace('_', '').isalnum():
+        raise ValueError('Username must be alphanumeric')
+    return v
+
+
+def check_password_strength(v: str) -> str:
+    """
+    Require an uppercase letter, a lowercase letter and a digit.
+
+    Scans the password once and stops as soon as all three are seen;
+    the first missing class is reported in the same order as before.
+    """
+    has_upper = has_lower = has_digit = False
+    for c in v:
+        if c.isupper():
+            has_upper = True
+        elif c.islower():
+            has_lower = True
+        elif c.isdigit():
+            has_digit = True
+        else:
+            continue
+        if has_upper and has_lower and has_digit:
+            return v
+
+    if not has_upper:
+        raise ValueError('Password must contain at least one uppercase letter')
+    if not has_lower:
+        raise ValueError('Password must contain at least one lowercase letter')
+    if not has_digit:
+        raise ValueError('Password must contain at least one digit')
+    return v
 
 
 # Base schemas
 class UserBase(BaseModel):
     """Base user schema with common fields."""
     email: str  # EmailStr yerine str kullanıyoruz (dependency sorunları için)
-    username: Optional[str] = Field(None, min_length=3, max_length=50)
-    full_name: Optional[str] = Field(None, max_length=100)
-    bio: Optional[str] = Field(None, max_length=500)
+    username: Optional[Username] = None
+    full_name: Optional[FullName] = None
+    bio: Optional[Bio] = None
     phone: Optional[str] = None
-    
-    @validator('username')
-    def validate_username(cls, v):
-        if v is not None:
-            if not v.replace('_', '').isalnum():  # Allow underscores
-                raise ValueError('Username must be alphanumeric')
-        return v
+
+    @field_validator('username')
+    @classmethod
+    def validate_username(cls, v: Optional[str]) -> Optional[str]:
+        return check_username(v)
 
 
 class UserCreate(UserBase):
     """Schema for user creation."""
-    password: str = Field(..., min_length=8, max_length=100)
+    password: Password
     confirm_password: str
-    
-    @validator('confirm_password')
-    def passwords_match(cls, v, values):
-        if 'password' in values and v != values['password']:
+
+    @field_validator('password')
+    @classmethod
+    def validate_password(cls, v: str) -> str:
+        return check_password_strength(v)
+
+    # A field validator (not a model validator) keeps the error located on
+    # confirm_password, as clients already expect
+    @field_validator('confirm_password')
+    @classmethod
+    def passwords_match(cls, v: str, info: ValidationInfo) -> str:
+        if 'password' in info.data and v != info.data['password']:
             raise ValueError('Passwords do not match')
         return v
-    
-    @validator('password')
-    def validate_password(cls, v):
-        if not any(c.isupper() for c in v):
-            raise ValueError('Password must contain at least one uppercase letter')
-        if not any(c.islower() for c in v):
-            raise ValueError('Password must contain at least one lowercase letter')
-        if not any(c.isdigit() for c in v):
-            raise ValueError('Password must contain at least one digit')
-        return v
 
 
 class UserUpdate(BaseModel):
     """Schema for user updates (all fields optional)."""
     email: Optional[str] = None
-    username: Optional[str] = Field(None, min_length=3, max_length=50)
-    full_name: Optional[str] = Field(None, max_length=100)
-    bio: Optional[str] = Field(None, max_length=500)
+    username: Optional[Username] = None
+    full_name: Optional[FullName] = None
+    bio: Optional[Bio] = None
     phone: Optional[str] = None
     is_active: Optional[bool] = None
-    
-    @validator('username')
-    def validate_username(cls, v):
-        if v is not None and not v.replace('_', '').isalnum():
-            raise ValueError('Username must be alphanumeric')
-        return v
+
+    @field_validator('username')
+    @classmethod
+    def validate_username(cls, v: Optional[str]) -> Optional[str]:
+        return check_username(v)
 
 
-class UserResponse(UserBase):
+# Response schemas
+class ResponseSchema(BaseModel):
+    """
+    Base for response models.
+
+    Strict mode: values come from our own ORM rows and already have the
+    right types, so pydantic-core skips every coercion attempt. Response
+    models carry no Python validators for the same reason.
+    """
+    model_config = ConfigDict(from_attributes=True, strict=True)
+
+    @classmethod
+    def dump_json(cls, obj: Any, exclude_none: bool = False) -> bytes:
+        """
+        Validate ``obj`` (ORM object or dict) and serialize it to JSON bytes.
+
+        Both steps run in pydantic-core; routes return the bytes in a plain
+        Response so FastAPI does not validate and encode the payload again.
+        """
+        return cls.__pydantic_serializer__.to_json(
+            cls.model_validate(obj), exclude_none=exclude_none
+        )
+
+
+class UserResponse(ResponseSchema):
     """Schema for user responses (public data)."""
+    email: str
+    username: Optional[str] = None
+    full_name: Optional[str] = None
+    bio: Optional[str] = None
+    phone: Optional[str] = None
     id: int
     is_active: bool
     is_verified: bool
@@ -72,9 +148,6 @@ class UserResponse(UserBase):
     updated_at: datetime
     last_login: Optional[datetime] = None
     login_count: int
-    
-    class Config:
-        from_attributes = True  # Pydantic v2 için orm_mode yerine
 
 
 class UserDetail(UserResponse):
@@ -92,12 +165,13 @@ class UserInDB(UserDetail):
 class PasswordChange(BaseModel):
     """Schema for password change."""
     current_password: str
-    new_password: str = Field(..., min_length=8, max_length=100)
+    new_password: Password
     confirm_new_password: str
-    
-    @validator('confirm_new_password')
-    def passwords_match(cls, v, values):
-        if 'new_password' in values and v != values['new_password']:
+
+    @field_validator('confirm_new_password')
+    @classmethod
+    def passwords_match(cls, v: str, info: ValidationInfo) -> str:
+        if 'new_password' in info.data and v != info.data['new_password']:
             raise ValueError('New passwords do not match')
         return v
 
@@ -109,13 +183,19 @@ class UserLogin(BaseModel):
     password: str
 
 
-class Token(BaseModel):
+class Token(ResponseSchema):
     """Token response schema."""
     access_token: str
     token_type: str = "bearer"
     expires_in: int
 
 
+class Availability(ResponseSchema):
+    """Whether the email and/or username asked about are free to register."""
+    email_available: Optional[bool] = None
+    username_available: Optional[bool] = None
+
+
 class TokenData(BaseModel):
     """Token payload data."""
     user_id: Optional[int] = None
@@ -123,10 +203,86 @@ class TokenData(BaseModel):
 
 
 # Pagination schema
-class UserListResponse(BaseModel):
+class UserListResponse(ResponseSchema):
     """Paginated user list response."""
     users: list[UserResponse]
     total: int
     page: int
     page_size: int
-    total_pages: int
\ No newline at end of file
+    total_pages: int
+
+
+# Batch get schemas
+class UserBatchGet(BaseModel):
+    """Schema for fetching many users by ID."""
+    ids: list[int]
+
+
+class UserBatchResponse(ResponseSchema):
+    """Users found, and the IDs that were not, both in request order."""
+    users: list[UserDetail]
+    missing: list[int]
+
+
+# Change feed schemas
+class UserChange(UserResponse):
+    """A user as it is after its latest change; ``deleted_at`` is set for soft deletes."""
+    deleted_at: Optional[datetime] = None
+
+
+class UserChangesResponse(ResponseSchema):
+    """One page of the change feed; null fields are left out."""
+    changes: list[UserChange]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+
+# Reusable adapter: the validator/serializer is built once at import
+user_list_adapter = TypeAdapter(list[UserResponse])
+
+
+# Sparse fieldsets (``fields=`` on user read endpoints)
+def parse_fields(fields: str, model: type[BaseModel]) -> tuple[str, ...]:
+    """
+    Validate a comma-separated ``fields=`` value against ``model``.
+    
+    Returns:
+        The requested names in schema order, so equal sets give equal
+        tuples (the cache key of sparse_model)
+    
+    Raises:
+        ValueError: If no field or an unknown field is named
+    """
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        raise ValueError("fields must name at least one field")
+    unknown = requested - model.model_fields.keys()
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(sorted(unknown))} "
+            f"(allowed: {', '.join(model.model_fields)})"
+        )
+    return tuple(name for name in model.model_fields if name in requested)
+
+
+@lru_cache(maxsize=256)
+def sparse_model(model: type[ResponseSchema], fields: tuple[str, ...]) -> type[ResponseSchema]:
+    """``model`` cut down to ``fields``; built once per field set, then reused."""
+    definitions = {}
+    for name in fields:
+        field = model.model_fields[name]
+        definitions[name] = (field.annotation, ... if field.is_required() else field.default)
+    return create_model(f"{model.__name__}Fields", __base__=ResponseSchema, **definitions)
+
+
+@lru_cache(maxsize=256)
+def sparse_page_model(
+    model: type[ResponseSchema], items: str, fields: tuple[str, ...]
+) -> type[ResponseSchema]:
+    """Page ``model`` whose ``items`` list holds sparse_model(item, fields) entries."""
+    item_model = get_args(model.model_fields[items].annotation)[0]
+    return create_model(
+        f"{model.__name__}Fields",
+        __base__=model,
+        **{items: (list[sparse_model(item_model, fields)], ...)},
+    )
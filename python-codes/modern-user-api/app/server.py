@@ -0,0 +1,246 @@
+"""
+Production launcher with preforked workers and rolling restarts.
+Sizes each worker's DB pool to fit a global connection budget.
+
+Usage:
+    python -m app.server                 # one worker per core
+    python -m app.server --workers 4 --port 8080
+
+Signals (to the supervisor process):
+    SIGHUP          rolling restart: start a replacement, wait until it
+                    serves, then gracefully stop the old worker, one by one
+    SIGINT/SIGTERM  graceful shutdown of all workers
+
+Workers share one listening socket bound by the supervisor, so the
+kernel keeps queueing connections while any single worker restarts.
+"""
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+
+# Seconds a replacement worker gets to finish its startup (lifespan) before
+# a rolling restart is abandoned and the old worker kept
+WORKER_STARTUP_TIMEOUT = 60.0
+
+spawn = multiprocessing.get_context("spawn")
+
+
+def default_workers() -> int:
+    """One worker per core."""
+    return os.cpu_count() or 1
+
+
+def size_pools(workers: int) -> Tuple[int, int]:
+    """
+    Per-worker (pool_size, max_overflow) that respect DB_MAX_CONNECTIONS.
+
+    One extra worker is budgeted for: during a rolling restart the
+    replacement runs next to the worker it replaces.
+
+    Raises:
+        ValueError: If the budget cannot give every worker a connection
+    """
+    per_worker = settings.DB_MAX_CONNECTIONS // (workers + 1)
+    if per_worker < 1:
+        raise ValueError(
+            f"DB_MAX_CONNECTIONS={settings.DB_MAX_CONNECTIONS} is too small "
+            f"for {workers} workers (plus one during restarts)"
+        )
+    pool_size = min(settings.DB_POOL_SIZE, per_worker)
+    max_overflow = min(settings.DB_MAX_OVERFLOW, per_worker - pool_size)
+    return pool_size, max_overflow
+
+
+def best_available(preferred: str, fallback: str) -> str:
+    """Use an optional accelerated implementation when it is installed."""
+    return preferred if importlib.util.find_spec(preferred) else fallback
+
+
+def run_worker(config, ready, sockets: List[socket.socket]) -> None:
+    """Worker entry point: serve the app and signal readiness after startup."""
+    from uvicorn.server import Server
+
+    class ReadyServer(Server):
+        async def startup(self, sockets=None) -> None:
+            # Returns once the lifespan startup has completed and we listen
+            await super().startup(sockets=sockets)
+            if not self.should_exit:
+                ready.set()
+
+    ReadyServer(config).run(sockets=sockets)
+
+
+class Worker:
+    """A worker process plus its readiness flag."""
+
+    def __init__(self, config, sock: socket.socket):
+        from uvicorn._subprocess import get_subprocess
+
+        self.ready = spawn.Event()
+        target = _WorkerTarget(config, self.ready)
+        self.process = get_subprocess(config=config, target=target, sockets=[sock])
+        self.process.start()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def stop(self, timeout: float) -> None:
+        """SIGTERM (uvicorn drains in-flight requests), then SIGKILL after timeout."""
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+class _WorkerTarget:
+    """Picklable callable handed to uvicorn's subprocess helper."""
+
+    def __init__(self, config, ready):
+        self.config = config
+        self.ready = ready
+
+    def __call__(self, sockets: List[socket.socket]) -> None:
+        run_worker(self.config, self.ready, sockets)
+
+
+class Supervisor:
+    """Keeps N workers alive on a shared socket and rolls them on SIGHUP."""
+
+    def __init__(self, config, workers: int):
+        self.config = config
+        self.workers = workers
+        self.processes: List[Worker] = []
+        self.should_exit = False
+        self.restart_requested = False
+
+    def run(self) -> None:
+        sock = self.config.bind_socket()
+        signal.signal(signal.SIGINT, self._handle_exit)
+        signal.signal(signal.SIGTERM, self._handle_exit)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+
+        print(f"🚀 Starting {self.workers} workers (supervisor pid {os.getpid()})")
+        self.processes = [Worker(self.config, sock) for _ in range(self.workers)]
+
+        try:
+            while not self.should_exit:
+                if self.restart_requested:
+                    self.restart_requested = False
+                    self.rolling_restart(sock)
+                self.replace_dead_workers(sock)
+                time.sleep(0.5)
+        finally:
+            print("🛑 Stopping workers...")
+            for worker in self.processes:
+                if worker.process.is_alive():
+                    worker.process.terminate()
+            for worker in self.processes:
+                worker.stop(settings.GRACEFUL_SHUTDOWN_TIMEOUT)
+                self._worker_exited(worker)
+            sock.close()
+            print("✅ All workers stopped")
+
+    def rolling_restart(self, sock: socket.socket) -> None:
+        """Replace workers one at a time, never dropping below N serving."""
+        print("🔄 Rolling restart")
+        for index, old in enumerate(list(self.processes)):
+            if self.should_exit:
+                return
+            new = Worker(self.config, sock)
+            if not new.ready.wait(WORKER_STARTUP_TIMEOUT):
+                print(f"⚠️ Replacement worker {new.pid} did not start; keeping {old.pid}")
+                new.stop(0)
+                return
+            self.processes[index] = new
+            old.stop(settings.GRACEFUL_SHUTDOWN_TIMEOUT)
+            self._worker_exited(old)
+            print(f"✅ Worker {old.pid} replaced by {new.pid}")
+
+    def replace_dead_workers(self, sock: socket.socket) -> None:
+        for index, worker in enumerate(self.processes):
+            if not worker.process.is_alive():
+                print(f"⚠️ Worker {worker.pid} died (exit code {worker.process.exitcode}); respawning")
+                self._worker_exited(worker)
+                self.processes[index] = Worker(self.config, sock)
+
+    def _worker_exited(self, worker: Worker) -> None:
+        from app.core.metrics import mark_process_dead
+
+        if worker.pid is not None:
+            mark_process_dead(worker.pid)
+
+    def _handle_exit(self, signum, frame) -> None:
+        self.should_exit = True
+
+    def _handle_restart(self, signum, frame) -> None:
+        self.restart_requested = True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers", type=int, default=settings.SERVER_WORKERS or default_workers()
+    )
+    args = parser.parse_args()
+
+    pool_size, max_overflow = size_pools(args.workers)
+
+    # Workers are spawned interpreters: they read these through Settings.
+    # Set them before anything imports prometheus_client in this process.
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    os.environ["SERVER_WORKERS"] = str(args.workers)
+    # Created here, so removed here when the supervisor exits
+    temp_dirs = []
+    if settings.METRICS_ENABLED and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        temp_dirs.append(tempfile.mkdtemp(prefix="prometheus-"))
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = temp_dirs[-1]
+    if args.workers > 1 and settings.INVALIDATION_BACKEND == "memory":
+        # Cached users must be evicted in every worker, not just the writer's
+        temp_dirs.append(tempfile.mkdtemp(prefix="invalidation-"))
+        os.environ["INVALIDATION_BACKEND"] = "unix"
+        os.environ["INVALIDATION_SOCKET_DIR"] = temp_dirs[-1]
+
+    from uvicorn.config import Config
+
+    config = Config(
+        "app.main:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        loop=best_available("uvloop", "asyncio"),
+        http=best_available("httptools", "h11"),
+        lifespan="on",
+        timeout_graceful_shutdown=int(settings.GRACEFUL_SHUTDOWN_TIMEOUT),
+        proxy_headers=True,
+        log_level="debug" if settings.DEBUG else "info",
+    )
+
+    print(
+        f"🔧 {args.workers} workers, loop={config.loop}, http={config.http}, "
+        f"pool {pool_size}+{max_overflow} per worker "
+        f"(budget {settings.DB_MAX_CONNECTIONS} connections)"
+    )
+    try:
+        Supervisor(config, args.workers).run()
+    finally:
+        for directory in temp_dirs:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Archival of soft deleted users into ``users_archive``.
+Moves rows deleted longer than ARCHIVE_RETENTION_DAYS out of ``users`` in throttled batches.
+
+Each batch is one short transaction: copy up to ARCHIVE_BATCH_SIZE rows
+into ``users_archive``, then delete them from ``users``. The job sleeps
+ARCHIVE_BATCH_PAUSE seconds between batches, so it never holds locks for
+long or competes with requests for the database. In sharded mode every
+shard is archived on its own; the archive table sits next to ``users``,
+and each batch then releases its users' directory entries, so archived
+emails and usernames become free as they do in a single database.
+
+Archived users can still be restored: UserService.restore_user falls back
+to the archive when the row is no longer in ``users``.
+
+Every worker runs the job when ARCHIVE_ENABLED. On PostgreSQL batches lock
+their rows with SKIP LOCKED, so concurrent workers split the work instead
+of colliding. To run it from cron instead (with ARCHIVE_ENABLED=false):
+    python -m app.services.archive
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.metrics import (
+    ARCHIVE_BACKLOG,
+    ARCHIVE_BATCH_SECONDS,
+    ARCHIVE_LAST_RUN,
+    ARCHIVED_USERS,
+)
+from app.models.user import User, users_archive
+
+users = User.__table__
+
+
+def archive_cutoff(retention_days: int) -> datetime:
+    """Users deleted before this are archived (naive UTC, like User.soft_delete)."""
+    return datetime.utcnow() - timedelta(days=retention_days)
+
+
+def user_engines() -> List[AsyncEngine]:
+    """Engines holding a ``users`` table: every shard, or the single database."""
+    if settings.SHARD_URLS:
+        from app.sharding import get_shard_router
+
+        return get_shard_router().engines
+
+    from app.database import get_engine
+
+    return [get_engine()]
+
+
+async def count_archivable(engine: AsyncEngine, cutoff: datetime) -> int:
+    """Soft deleted users older than ``cutoff`` still in ``users``."""
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            select(func.count()).select_from(users).where(users.c.deleted_at < cutoff)
+        )
+        return result.scalar_one()
+
+
+async def archive_batch(engine: AsyncEngine, cutoff: datetime, batch_size: int) -> int:
+    """
+    Move up to ``batch_size`` users deleted before ``cutoff`` into the archive.
+
+    Oldest deletions go first. The copy and the delete commit together,
+    so a user is always in exactly one of the two tables.
+
+    Returns:
+        Number of users moved
+    """
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            select(users.c.id)
+            .where(users.c.deleted_at < cutoff)
+            .order_by(users.c.deleted_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        ids = list(result.scalars())
+        if not ids:
+            return 0
+
+        await conn.execute(
+            insert(users_archive).from_select(
+                [*users.c.keys(), "archived_at"],
+                select(*users.c, func.now()).where(users.c.id.in_(ids)),
+            )
+        )
+        await conn.execute(delete(users).where(users.c.id.in_(ids)))
+
+    if settings.SHARD_URLS:
+        from app.sharding import get_shard_router
+
+        # Frees the emails/usernames, as deleting from ``users`` does in a
+        # single database. After the commit: should this fail, the names
+        # stay reserved rather than being claimable twice
+        await get_shard_router().directory.release(*ids)
+    return len(ids)
+
+
+async def archive_engine(
+    engine: AsyncEngine,
+    cutoff: datetime,
+    batch_size: int,
+    pause: float,
+    max_batches: Optional[int] = None,
+) -> int:
+    """
+    Archive batches on one database until nothing is left before ``cutoff``.
+
+    Returns:
+        Number of users moved
+    """
+    moved = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        started = time.perf_counter()
+        count = await archive_batch(engine, cutoff, batch_size)
+        ARCHIVE_BATCH_SECONDS.observe(time.perf_counter() - started)
+        if count == 0:
+            break
+
+        moved += count
+        batches += 1
+        ARCHIVED_USERS.inc(count)
+        ARCHIVE_BACKLOG.dec(count)
+        if count < batch_size:
+            break
+        # Throttle: leave the database to request traffic for a moment
+        await asyncio.sleep(pause)
+    return moved
+
+
+async def run_archival(max_batches: Optional[int] = None) -> int:
+    """
+    One archival pass over every database with the configured settings.
+
+    Returns:
+        Number of users moved
+    """
+    cutoff = archive_cutoff(settings.ARCHIVE_RETENTION_DAYS)
+    engines = user_engines()
+
+    backlog = await asyncio.gather(*(count_archivable(engine, cutoff) for engine in engines))
+    ARCHIVE_BACKLOG.set(sum(backlog))
+
+    moved = 0
+    # One database at a time keeps the extra load bounded to one batch
+    for engine, pending in zip(engines, backlog):
+        if pending:
+            moved += await archive_engine(
+                engine,
+                cutoff,
+                settings.ARCHIVE_BATCH_SIZE,
+                settings.ARCHIVE_BATCH_PAUSE,
+                max_batches,
+            )
+    ARCHIVE_LAST_RUN.set(time.time())
+    return moved
+
+
+class ArchiveJob:
+    """Runs run_archival() every ``interval`` seconds in the background."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="user-archival")
+
+    async def stop(self) -> None:
+        """Cancel the job; a batch in progress is rolled back."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        # Spread the first pass so workers started together do not overlap
+        await asyncio.sleep(random.uniform(0, min(self.interval, 60.0)))
+        while True:
+            try:
+                moved = await run_archival()
+                if moved:
+                    print(f"🗄️ Archived {moved} soft deleted users")
+            except Exception as e:
+                print(f"⚠️ User archival failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+_job: Optional[ArchiveJob] = None
+
+
+def start_archive_job() -> None:
+    """Start background archival in this worker."""
+    global _job
+    if _job is None:
+        _job = ArchiveJob(settings.ARCHIVE_INTERVAL_SECONDS)
+        _job.start()
+
+
+async def stop_archive_job() -> None:
+    """Stop background archival (before the engines are disposed)."""
+    global _job
+    if _job is not None:
+        await _job.stop()
+        _job = None
+
+
+async def _main() -> None:
+    from app.database import dispose_engine
+
+    try:
+        moved = await run_archival()
+        print(f"🗄️ Archived {moved} soft deleted users")
+    finally:
+        await dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,193 @@
+"""
+Per-worker Bloom filters of taken emails and usernames.
+A definite miss means "free" without a query; a possible hit is checked in the database.
+
+Registration, profile updates and GET /auth/availability ask the filter
+first, so lookups of free names (the common case for all three) cost no
+round trip. The filters hold every name in ``users`` (in sharded mode,
+the directory), soft deleted users included, and are:
+    built     at startup by a streaming scan; until then every check
+              goes to the database
+    updated   by this worker's own writes
+    rebuilt   every AVAILABILITY_FILTER_REBUILD_SECONDS, which picks up
+              names taken through other workers and sheds deleted ones
+
+A name taken through another worker since the last rebuild can look free
+here. Availability answers are advisory for that reason; registration
+and updates still hit the unique constraints, and UserService reports a
+violation as the usual "already registered" error.
+"""
+import asyncio
+import time
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import Table, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.core.metrics import (
+    AVAILABILITY_FILTER_BYTES,
+    AVAILABILITY_FILTER_FALSE_POSITIVE_RATE,
+    AVAILABILITY_FILTER_ITEMS,
+    AVAILABILITY_FILTER_LOOKUPS,
+)
+
+FIELDS = ("email", "username")
+
+
+class TakenNames:
+    """The email and username filters of this worker, swapped whole on rebuild."""
+
+    def __init__(self):
+        self.filters: Optional[dict] = None
+        # Names added while a rebuild scans, replayed into the new filters
+        self._added_during_rebuild: Optional[list] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.filters is not None
+
+    def might_be_taken(self, field: str, value: str) -> bool:
+        """False only if ``value`` is certainly not taken."""
+        if self.filters is None or value in self.filters[field]:
+            return True
+        AVAILABILITY_FILTER_LOOKUPS.labels(field, "definite_miss").inc()
+        return False
+
+    def record_lookup(self, field: str, taken: bool) -> None:
+        """Outcome of the database check after might_be_taken said True."""
+        if self.filters is not None:
+            AVAILABILITY_FILTER_LOOKUPS.labels(field, "taken" if taken else "false_positive").inc()
+
+    def add(self, email: str, username: Optional[str]) -> None:
+        """Mark names as taken (after the write that took them committed)."""
+        if self._added_during_rebuild is not None:
+            self._added_during_rebuild.append((email, username))
+        if self.filters is not None:
+            self._add(self.filters, [(email, username)])
+            self._report()
+
+    @staticmethod
+    def _add(filters: dict, rows: Iterable[Tuple[str, Optional[str]]]) -> None:
+        for email, username in rows:
+            filters["email"].add(email)
+            if username is not None:
+                filters["username"].add(username)
+
+    def _report(self) -> None:
+        for field, bloom in self.filters.items():
+            AVAILABILITY_FILTER_BYTES.labels(field).set(bloom.nbytes)
+            AVAILABILITY_FILTER_ITEMS.labels(field).set(bloom.count)
+            AVAILABILITY_FILTER_FALSE_POSITIVE_RATE.labels(field).set(bloom.false_positive_rate())
+
+    async def rebuild(self, engine: AsyncEngine, table: Table) -> int:
+        """
+        Build new filters from ``table`` and swap them in.
+
+        Returns:
+            Number of rows scanned
+        """
+        self._added_during_rebuild = []
+        try:
+            async with engine.connect() as conn:
+                rows = await conn.scalar(select(func.count()).select_from(table))
+                capacity = max(settings.AVAILABILITY_FILTER_MIN_CAPACITY, rows * 2)
+                filters = {
+                    field: BloomFilter(capacity, settings.AVAILABILITY_FILTER_ERROR_RATE)
+                    for field in FIELDS
+                }
+
+                # Streamed: memory stays at one batch of rows, not the table
+                result = await conn.stream(
+                    select(table.c.email, table.c.username).execution_options(
+                        yield_per=settings.AVAILABILITY_FILTER_SCAN_BATCH
+                    )
+                )
+                scanned = 0
+                async for batch in result.partitions():
+                    self._add(filters, batch)
+                    scanned += len(batch)
+                    await asyncio.sleep(0)  # Let requests run between batches
+
+            self._add(filters, self._added_during_rebuild)
+            self.filters = filters
+            self._report()
+            return scanned
+        finally:
+            self._added_during_rebuild = None
+
+
+def name_source() -> Tuple[AsyncEngine, Table]:
+    """Where all taken names live: the directory when sharded, else ``users``."""
+    if settings.SHARD_URLS:
+        from app.sharding import get_shard_router, user_directory
+
+        return get_shard_router().directory.engine, user_directory
+
+    from app.database import get_engine
+    from app.embedded import embedded_mode, get_reader_engine
+    from app.models.user import User
+
+    # Embedded: a scan on the writer would hold up every write meanwhile
+    return get_reader_engine() if embedded_mode() else get_engine(), User.__table__
+
+
+class AvailabilityFilterJob:
+    """Builds the filters now, then rebuilds them every ``interval`` seconds."""
+
+    def __init__(self, names: TakenNames, interval: float):
+        self.names = names
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="availability-filter")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                started = time.perf_counter()
+                scanned = await self.names.rebuild(*name_source())
+                print(
+                    f"✅ Built availability filters from {scanned} users "
+                    f"in {time.perf_counter() - started:.2f}s"
+                )
+            except Exception as e:
+                print(f"⚠️ Availability filter build failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+_names = TakenNames()
+_job: Optional[AvailabilityFilterJob] = None
+
+
+def get_taken_names() -> TakenNames:
+    """Return this worker's filters (not ready until the first build)."""
+    return _names
+
+
+def start_availability_filter() -> None:
+    """Build the filters in the background and keep them fresh."""
+    global _job
+    if _job is None:
+        _job = AvailabilityFilterJob(_names, settings.AVAILABILITY_FILTER_REBUILD_SECONDS)
+        _job.start()
+
+
+async def stop_availability_filter() -> None:
+    global _job
+    if _job is not None:
+        await _job.stop()
+        _job = None
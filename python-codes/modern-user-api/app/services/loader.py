@@ -0,0 +1,123 @@
+"""
+DataLoader-style batching for per-id user lookups.
+Coalesces concurrent get_user_by_id calls into one IN query.
+"""
+import asyncio
+import weakref
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import async_session_maker
+from app.models.user import User
+from app.services.user import UserService
+
+
+class UserLoader:
+    """
+    Batch loader for users keyed by ID.
+
+    Every ``load`` call made before the batch is dispatched joins the same
+    pending batch; duplicate IDs share one slot. The batch is dispatched
+    at the end of the current event loop tick (or after ``wait_ms``), or
+    immediately once ``max_batch_size`` distinct IDs are pending.
+
+    Loaded users come from a short-lived session of their own, so they are
+    detached by the time callers see them. Use them for reads only; code
+    that mutates a user must fetch it through the request's UserService.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = async_session_maker,
+        max_batch_size: int = settings.USER_LOADER_MAX_BATCH_SIZE,
+        wait_ms: float = settings.USER_LOADER_WAIT_MS,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.wait_ms = wait_ms
+
+        self._pending: Dict[int, List[asyncio.Future]] = {}
+        self._handle: Optional[asyncio.Handle] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+        # Counters for benchmarks and debugging
+        self.batches_dispatched = 0
+        self.keys_requested = 0
+
+    async def load(self, user_id: int) -> Optional[User]:
+        """Load a single user by ID, batched with concurrent callers."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self._pending.setdefault(user_id, []).append(future)
+        self.keys_requested += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._handle is None:
+            if self.wait_ms > 0:
+                self._handle = loop.call_later(self.wait_ms / 1000, self._dispatch)
+            else:
+                self._handle = loop.call_soon(self._dispatch)
+
+        return await future
+
+    async def load_many(self, user_ids: List[int]) -> List[Optional[User]]:
+        """Load several users, preserving the order of ``user_ids``."""
+        return list(await asyncio.gather(*(self.load(user_id) for user_id in user_ids)))
+
+    def _dispatch(self) -> None:
+        """Hand the pending batch over to a resolver task."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+
+        self.batches_dispatched += 1
+        task = asyncio.ensure_future(self._resolve(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _resolve(self, batch: Dict[int, List[asyncio.Future]]) -> None:
+        """Run the IN query for a batch and settle every waiting future."""
+        try:
+            async with self.session_factory() as session:
+                users = await UserService(session).get_users_by_ids(list(batch))
+        except Exception as exc:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(exc)
+            return
+
+        users_by_id = {user.id: user for user in users}
+        for user_id, futures in batch.items():
+            user = users_by_id.get(user_id)
+            for future in futures:
+                # Waiters may have been cancelled (client disconnects)
+                if not future.done():
+                    future.set_result(user)
+
+
+# One loader per event loop: futures cannot be shared across loops
+_loaders: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, UserLoader]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_user_loader() -> UserLoader:
+    """Return the user loader bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    loader = _loaders.get(loop)
+    if loader is None:
+        loader = UserLoader()
+        _loaders[loop] = loader
+    return loader
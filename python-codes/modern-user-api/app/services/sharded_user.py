@@ -0,0 +1,185 @@
+"""
+UserService for sharded mode (settings.SHARD_URLS).
+Directory-backed email/username lookups and scatter-gather listing.
+"""
+import asyncio
+import heapq
+from datetime import datetime
+from itertools import islice
+from operator import attrgetter
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.user import User
+from app.schemas.user import UserCreate, UserUpdate
+from app.services.availability import get_taken_names
+from app.services.user import UserService
+from app.sharding import ShardRouter
+
+
+class ShardedUserService(UserService):
+    """
+    UserService over a ShardRouter.
+
+    ``self.db`` is a ShardedSession: ID-based queries reach only the owning
+    shard, and users loaded through it flush back to their own shard, so
+    the inherited ID-based methods work unchanged. Email and username
+    lookups resolve the ID through the directory first. Listing and stats
+    query every shard concurrently and merge the results.
+    """
+
+    def __init__(self, db: AsyncSession, router: ShardRouter):
+        super().__init__(db)
+        self.router = router
+        self.directory = router.directory
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        """Get user by email via the directory (excluding soft deleted)."""
+        user_id = await self.directory.id_for_email(email)
+        if user_id is None:
+            return None
+
+        result = await self.db.execute(
+            select(User).where(
+                and_(User.id == user_id, User.email == email, User.deleted_at.is_(None))
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def get_user_by_username(self, username: str) -> Optional[User]:
+        """Get user by username via the directory (excluding soft deleted)."""
+        user_id = await self.directory.id_for_username(username)
+        if user_id is None:
+            return None
+
+        result = await self.db.execute(
+            select(User).where(
+                and_(User.id == user_id, User.username == username, User.deleted_at.is_(None))
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def get_users(
+        self,
+        skip: int = 0,
+        limit: int = 20,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> tuple[List[User], int]:
+        """
+        Paginated list across all shards, newest first.
+
+        Each shard returns its own first ``skip + limit`` rows in the global
+        order; merging those sorted runs and slicing gives the exact page.
+        Deep pages therefore cost ``skip + limit`` rows per shard.
+        """
+        if columns:
+            columns = [*columns, "created_at"]  # The merge key
+
+        async def shard_page(shard: int) -> tuple[List[User], int]:
+            async with self.router.shard_session(shard) as session:
+                return await UserService(session).get_users(
+                    skip=0,
+                    limit=skip + limit,
+                    search=search,
+                    is_active=is_active,
+                    columns=columns,
+                )
+
+        pages = await asyncio.gather(*(shard_page(shard) for shard in self.router.shard_ids))
+
+        total = sum(count for _, count in pages)
+        merged = heapq.merge(
+            *(users for users, _ in pages), key=attrgetter("created_at"), reverse=True
+        )
+        return list(islice(merged, skip, skip + limit)), total
+
+    async def get_changes(
+        self,
+        after: Optional[Tuple[datetime, int]],
+        until: datetime,
+        limit: int
+    ) -> List[User]:
+        """Change feed page across all shards: each shard's first ``limit``, merged."""
+        async def shard_changes(shard: int) -> List[User]:
+            async with self.router.shard_session(shard) as session:
+                return await UserService(session).get_changes(after, until, limit)
+
+        pages = await asyncio.gather(*(shard_changes(shard) for shard in self.router.shard_ids))
+        merged = heapq.merge(*pages, key=attrgetter("updated_at", "id"))
+        return list(islice(merged, limit))
+
+    async def create_user(self, user_data: UserCreate) -> User:
+        """Create user: claim email/username and an ID in the directory, then insert."""
+        # The directory insert is the uniqueness check and the ID allocator
+        user_id = await self.directory.reserve(user_data.email, user_data.username)
+
+        db_user = self._build_user(user_data)
+        db_user.id = user_id  # Decides the shard
+
+        self.db.add(db_user)
+        try:
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            await self.directory.release(user_id)
+            raise
+        await self.db.refresh(db_user)
+        get_taken_names().add(db_user.email, db_user.username)
+
+        return db_user
+
+    async def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
+        """Update user on its shard, then move its directory entry if renamed."""
+        user = await super().update_user(user_id, user_data)
+        if user is None or not user_data.model_fields_set & {"email", "username"}:
+            return user
+
+        try:
+            await self.directory.rename(user_id, user.email, user.username)
+        except ValueError:
+            # Another user claimed the name between our check and commit
+            user.email, user.username = await self.directory.entry(user_id)
+            await self.db.commit()
+            await self._publish_change(user)
+            raise
+
+        return user
+
+    def _bind_arguments(self, user_id: int) -> Optional[dict]:
+        """Pin plain SQL about ``user_id`` (the archive table) to its shard."""
+        return {"shard_id": self.router.shard_for(user_id)}
+
+    async def _unarchive_user(self, user_id: int) -> Optional[User]:
+        """Take a user out of the archive and claim its email/username back in the directory."""
+        user = await super()._unarchive_user(user_id)
+        if user is not None:
+            # Archival released them; claimed before the shard commit, like create_user
+            await self.directory.reclaim(user_id, user.email, user.username)
+        return user
+
+    async def get_user_stats(self) -> dict:
+        """User statistics summed over all shards."""
+        async def shard_stats(shard: int) -> dict:
+            async with self.router.shard_session(shard) as session:
+                return await UserService(session).get_user_stats()
+
+        per_shard = await asyncio.gather(*(shard_stats(shard) for shard in self.router.shard_ids))
+
+        total_users = sum(stats["total_users"] for stats in per_shard)
+        active_users = sum(stats["active_users"] for stats in per_shard)
+        verified_users = sum(stats["verified_users"] for stats in per_shard)
+        users_today = sum(stats["users_created_today"] for stats in per_shard)
+
+        return {
+            "total_users": total_users,
+            "active_users": active_users,
+            "verified_users": verified_users,
+            "users_created_today": users_today,
+            "verification_rate": round((verified_users / total_users * 100), 2) if total_users > 0 else 0,
+            "activation_rate": round((active_users / total_users * 100), 2) if total_users > 0 else 0,
+        }
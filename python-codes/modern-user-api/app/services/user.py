@@ -2,17 +2,55 @@
 User service layer for business logic.
 Handles complex operations and business rules.
 """
-from datetime import datetime
-from typing import List, Optional
+import base64
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
 
-from sqlalchemy import and_, func, or_
+from sqlalchemy import and_, delete, func, or_, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only, selectinload
 
+from app.core.invalidation import get_invalidation_bus
 from app.core.security import hash_password, verify_password
-from app.models.user import User
+from app.models.user import User, users_archive
 from app.schemas.user import UserCreate, UserUpdate
+from app.services.availability import get_taken_names
+from app.services.user_cache import user_version
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_change_cursor(user: User) -> str:
+    """Opaque change feed cursor for the position just after ``user``."""
+    updated_at = user.updated_at
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)  # Naive UTC
+    micros = (updated_at - _EPOCH) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(f"{micros}:{user.id}".encode()).rstrip(b"=").decode()
+
+
+def decode_change_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Position (updated_at, id) of a change feed cursor.
+
+    Raises:
+        ValueError: If the cursor was not made by encode_change_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        micros, user_id = raw.split(":")
+        return _EPOCH + timedelta(microseconds=int(micros)), int(user_id)
+    except (ValueError, UnicodeDecodeError, OverflowError):
+        raise ValueError("Invalid cursor")
+
+
+def _columns_option(columns: Optional[Sequence[str]]) -> tuple:
+    """Query options loading only ``columns`` (plus the key) of User, or everything."""
+    if not columns:
+        return ()
+    return (load_only(*(getattr(User, name) for name in columns)),)
 
 
 class UserService:
@@ -29,7 +67,27 @@ class UserService:
             )
         )
         return result.scalar_one_or_none()
-    
+
+    async def get_users_by_ids(
+        self, user_ids: List[int], columns: Optional[Sequence[str]] = None
+    ) -> List[User]:
+        """
+        Get many users by ID in a single query (excluding soft deleted).
+
+        Missing or soft deleted IDs are simply absent from the result;
+        no ordering is guaranteed. With ``columns``, only those are loaded;
+        the other attributes must not be touched.
+        """
+        if not user_ids:
+            return []
+
+        result = await self.db.execute(
+            select(User)
+            .options(*_columns_option(columns))
+            .where(and_(User.id.in_(user_ids), User.deleted_at.is_(None)))
+        )
+        return list(result.scalars().all())
+
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email (excluding soft deleted)."""
         result = await self.db.execute(
@@ -48,21 +106,42 @@ class UserService:
         )
         return result.scalar_one_or_none()
     
+    async def email_taken(self, email: str) -> bool:
+        """Whether a user has ``email``; a definite miss of the filter skips the query."""
+        names = get_taken_names()
+        if not names.might_be_taken("email", email):
+            return False
+        taken = await self.get_user_by_email(email) is not None
+        names.record_lookup("email", taken)
+        return taken
+    
+    async def username_taken(self, username: str) -> bool:
+        """Whether a user has ``username``; a definite miss of the filter skips the query."""
+        names = get_taken_names()
+        if not names.might_be_taken("username", username):
+            return False
+        taken = await self.get_user_by_username(username) is not None
+        names.record_lookup("username", taken)
+        return taken
+    
     async def get_users(
         self, 
         skip: int = 0, 
         limit: int = 20,
         search: Optional[str] = None,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        columns: Optional[Sequence[str]] = None
     ) -> tuple[List[User], int]:
         """
         Get paginated list of users with optional filtering.
         
+        With ``columns``, only those are loaded (see get_users_by_ids).
+        
         Returns:
             Tuple of (users_list, total_count)
         """
         # Base query (exclude soft deleted)
-        query = select(User).where(User.deleted_at.is_(None))
+        query = select(User).options(*_columns_option(columns)).where(User.deleted_at.is_(None))
         count_query = select(func.count(User.id)).where(User.deleted_at.is_(None))
         
         # Apply filters
@@ -92,24 +171,92 @@ class UserService:
         
         return list(users), total
     
+    async def get_changes(
+        self,
+        after: Optional[Tuple[datetime, int]],
+        until: datetime,
+        limit: int
+    ) -> List[User]:
+        """
+        Users changed after position ``after``, oldest change first.
+        
+        Positions are (updated_at, id), walked along ix_users_updated_at_id;
+        soft deleted users are included. Changes from ``until`` on are left
+        for a later call.
+        """
+        query = select(User).where(User.updated_at < until)
+        if after is not None:
+            query = query.where(tuple_(User.updated_at, User.id) > after)
+        
+        result = await self.db.execute(
+            query.order_by(User.updated_at, User.id).limit(limit)
+        )
+        return list(result.scalars().all())
+    
     async def create_user(self, user_data: UserCreate) -> User:
         """Create new user with business validation."""
         # Check if email already exists
-        existing_user = await self.get_user_by_email(user_data.email)
-        if existing_user:
+        if await self.email_taken(user_data.email):
             raise ValueError("Email already registered")
         
         # Check if username already exists (if provided)
-        if user_data.username:
-            existing_username = await self.get_user_by_username(user_data.username)
-            if existing_username:
-                raise ValueError("Username already taken")
+        if user_data.username and await self.username_taken(user_data.username):
+            raise ValueError("Username already taken")
+        
+        db_user = self._build_user(user_data)
+        
+        self.db.add(db_user)
+        await self._commit_names(user_data.email, user_data.username)
+        await self.db.refresh(db_user)
+        get_taken_names().add(db_user.email, db_user.username)
+        
+        return db_user
+    
+    async def _commit_names(
+        self, email: str, username: Optional[str], user_id: Optional[int] = None
+    ) -> None:
+        """
+        Commit a write that takes an email and/or username.
+        
+        Args:
+            email, username: The names the write takes
+            user_id: The user written, when updating: its own row holds
+                its names and is not a collision
         
+        Raises:
+            ValueError: If a unique constraint rejected it: the name was
+                taken since our check, or through another worker after
+                this worker's availability filter was built
+        """
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            # Any row, soft deleted included: the constraint covers them all
+            names = [User.email == email]
+            if username:
+                names.append(User.username == username)
+            query = select(User.email).where(or_(*names))
+            if user_id is not None:
+                query = query.where(User.id != user_id)
+            taken = set((await self.db.scalars(query.limit(2))).all())
+            if email in taken:
+                raise ValueError("Email already registered")
+            if taken:
+                raise ValueError("Username already taken")
+            raise  # Some other constraint
+    
+    def _build_user(self, user_data: UserCreate) -> User:
+        """New, unsaved User from registration data (password hashed here)."""
         # Hash password
         hashed_password = hash_password(user_data.password)
         
-        # Create user
-        db_user = User(
+        # Create user; timestamps from our clock, like every later update,
+        # so the change feed's (updated_at, id) order holds from the start
+        now = datetime.utcnow()
+        return User(
+            created_at=now,
+            updated_at=now,
             email=user_data.email,
             username=user_data.username,
             full_name=user_data.full_name,
@@ -119,12 +266,6 @@ class UserService:
             is_active=True,
             is_verified=False,  # Email verification required
         )
-        
-        self.db.add(db_user)
-        await self.db.commit()
-        await self.db.refresh(db_user)
-        
-        return db_user
     
     async def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
         """Update user with business validation."""
@@ -134,25 +275,26 @@ class UserService:
         
         # Check email uniqueness (if changed)
         if user_data.email and user_data.email != user.email:
-            existing_email = await self.get_user_by_email(user_data.email)
-            if existing_email:
+            if await self.email_taken(user_data.email):
                 raise ValueError("Email already registered")
         
         # Check username uniqueness (if changed)
         if user_data.username and user_data.username != user.username:
-            existing_username = await self.get_user_by_username(user_data.username)
-            if existing_username:
+            if await self.username_taken(user_data.username):
                 raise ValueError("Username already taken")
         
         # Update fields
-        update_data = user_data.dict(exclude_unset=True)
+        update_data = user_data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(user, field, value)
         
         user.updated_at = datetime.utcnow()
         
-        await self.db.commit()
+        # Read now: the rollback of a rejected commit expires the instance
+        await self._commit_names(user.email, user.username, user.id)
         await self.db.refresh(user)
+        get_taken_names().add(user.email, user.username)
+        await self._publish_change(user)
         
         return user
     
@@ -163,10 +305,73 @@ class UserService:
             return False
         
         user.soft_delete()
+        user.updated_at = datetime.utcnow()
         await self.db.commit()
+        await self._publish_change(user)
         
         return True
     
+    async def restore_user(self, user_id: int) -> Optional[User]:
+        """
+        Restore a soft deleted user, from users_archive if it was archived.
+        
+        Returns:
+            The restored user, or None if there is no such user
+        
+        Raises:
+            ValueError: If the user is not deleted, or the archived user's
+                email/username has been taken since
+        """
+        result = await self.db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            user = await self._unarchive_user(user_id)
+            if user is None:
+                return None
+        elif not user.is_deleted:
+            raise ValueError("User is not deleted")
+        
+        user.restore()
+        user.updated_at = datetime.utcnow()
+        # Archival freed the email/username: the unique constraints decide
+        # whether they are still ours (soft deleted holders included)
+        await self._commit_names(user.email, user.username, user.id)
+        get_taken_names().add(user.email, user.username)
+        await self._publish_change(user)
+        
+        return user
+    
+    async def _publish_change(self, user: User) -> None:
+        """Evict ``user`` from the user cache of every worker (after commit)."""
+        await get_invalidation_bus().publish(user.id, user_version(user))
+    
+    def _bind_arguments(self, user_id: int) -> Optional[dict]:
+        """bind_arguments for plain (non-ORM) SQL about ``user_id``."""
+        return None
+    
+    async def _unarchive_user(self, user_id: int) -> Optional[User]:
+        """
+        Take a user out of users_archive; it is inserted into users on commit.
+        
+        Whether its email/username were taken since is left to that commit.
+        """
+        bind_arguments = self._bind_arguments(user_id)
+        result = await self.db.execute(
+            select(users_archive).where(users_archive.c.id == user_id),
+            bind_arguments=bind_arguments,
+        )
+        row = result.mappings().one_or_none()
+        if row is None:
+            return None
+        
+        await self.db.execute(
+            delete(users_archive).where(users_archive.c.id == user_id),
+            bind_arguments=bind_arguments,
+        )
+        user = User(**{column.name: row[column.name] for column in User.__table__.columns})
+        self.db.add(user)
+        return user
+    
     async def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Authenticate user with email and password."""
         user = await self.get_user_by_email(email)
@@ -179,10 +384,20 @@ class UserService:
         if not verify_password(password, user.hashed_password):
             return None
         
-        # Update login tracking
-        user.last_login = datetime.utcnow()
-        user.login_count += 1
+        # Update login tracking. Not a change of the user's data: updated_at
+        # is kept (overriding its onupdate), so logins stay out of the
+        # change feed; the cache version follows last_login instead
+        await self.db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(
+                last_login=datetime.utcnow(),
+                login_count=User.login_count + 1,
+                updated_at=User.updated_at,
+            )
+        )
         await self.db.commit()
+        await self._publish_change(user)
         
         return user
     
@@ -206,6 +421,7 @@ class UserService:
         user.updated_at = datetime.utcnow()
         
         await self.db.commit()
+        await self._publish_change(user)
         
         return True
     
@@ -220,6 +436,7 @@ class UserService:
         user.updated_at = datetime.utcnow()
         
         await self.db.commit()
+        await self._publish_change(user)
         
         return True
     
@@ -233,6 +450,7 @@ class UserService:
         user.updated_at = datetime.utcnow()
         
         await self.db.commit()
+        await self._publish_change(user)
         
         return True
     
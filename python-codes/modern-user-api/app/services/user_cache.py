@@ -0,0 +1,111 @@
+"""
+Per-process cache of authenticated users.
+Saves the user lookup on every authenticated request; kept coherent by the invalidation bus.
+
+Entries are the detached users UserLoader returns, so the same rule
+applies: read only. Each entry expires after USER_CACHE_TTL_SECONDS,
+which is also the worst-case staleness should an invalidation event be
+lost; normally an event evicts the entry in every worker right after
+the change commits.
+
+The "memory" invalidation backend reaches this process only, so with it
+the cache stays off unless this is known to be the only worker
+(SERVER_WORKERS=1, which python -m app.server sets for its workers).
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.core.invalidation import get_invalidation_bus
+from app.core.metrics import USER_CACHE_LOOKUPS
+from app.models.user import User
+
+
+def _micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        # Set in Python as naive UTC (datetime.utcnow())
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1_000_000)
+
+
+def user_version(user: User) -> int:
+    """
+    Version of a user row for invalidation events, in microseconds.
+
+    The later of updated_at and last_login: a login changes the cached
+    user (login_count) without counting as a data change.
+    """
+    version = _micros(user.updated_at)
+    if user.last_login is not None:
+        version = max(version, _micros(user.last_login))
+    return version
+
+
+class UserCache:
+    """At most ``max_entries`` users (oldest dropped first), each kept ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # user_id -> (expires, version, user); insertion order == expiry order
+        self._entries: "OrderedDict[int, Tuple[float, int, User]]" = OrderedDict()
+        # Bumped by every invalidation; see ``put``
+        self.epoch = 0
+
+    def get(self, user_id: int) -> Optional[User]:
+        if self.ttl <= 0:
+            return None
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            USER_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+        USER_CACHE_LOOKUPS.labels("hit").inc()
+        return entry[2]
+
+    def put(self, user: User, epoch: int) -> None:
+        """
+        Cache ``user``, loaded after reading ``epoch``.
+
+        If anything was invalidated since, the load may have raced with a
+        change whose event already went by, so the user is not cached.
+        """
+        if epoch != self.epoch or self.ttl <= 0:
+            return
+        self._entries[user.id] = (time.monotonic() + self.ttl, user_version(user), user)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int, version: int) -> None:
+        """Evict ``user_id`` unless the cached copy is newer than ``version``."""
+        self.epoch += 1
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] <= version:
+            del self._entries[user_id]
+
+    def clear(self) -> None:
+        self.epoch += 1
+        self._entries.clear()
+
+
+def cache_ttl() -> float:
+    """USER_CACHE_TTL_SECONDS, or 0 (off) if other workers would not see our invalidations."""
+    if settings.INVALIDATION_BACKEND == "memory" and settings.SERVER_WORKERS != 1:
+        return 0.0
+    return settings.USER_CACHE_TTL_SECONDS
+
+
+_cache: Optional[UserCache] = None
+
+
+def get_user_cache() -> UserCache:
+    """Return the process-wide user cache, subscribed to the invalidation bus."""
+    global _cache
+    if _cache is None:
+        _cache = UserCache(settings.USER_CACHE_MAX_ENTRIES, cache_ttl())
+        get_invalidation_bus().subscribe(_cache.invalidate, _cache.clear)
+    return _cache
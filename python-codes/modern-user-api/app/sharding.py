@@ -0,0 +1,301 @@
+"""
+Horizontal sharding of the users table across several databases.
+Rows are placed by a hash of the user ID; a global directory maps email/username.
+
+Layout:
+    DATABASE_URL   directory database: ``user_directory`` (id, email, username).
+                   Its autoincrement key is the global user ID allocator and
+                   its unique constraints enforce uniqueness across shards.
+    SHARD_URLS     one database per shard, each holding a ``users`` table with
+                   its own engine and connection pool.
+
+Request sessions are SQLAlchemy ``ShardedSession``s: statements that filter
+on ``User.id`` (``==`` or ``IN``) go only to the owning shards, loaded
+objects remember their shard for flushes and refreshes, and anything else
+is sent to every shard.
+
+The shard of an ID is ``crc32(id) % len(SHARD_URLS)``: changing the number
+of shards needs a data migration.
+
+Try it locally with SQLite files:
+    DATABASE_URL=sqlite+aiosqlite:///./directory.db
+    SHARD_URLS='["sqlite+aiosqlite:///./shard0.db", "sqlite+aiosqlite:///./shard1.db"]'
+"""
+import asyncio
+import zlib
+from typing import Any, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import ORMExecuteState
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+
+from app.core.config import settings
+from app.database import Base, create_instrumented_engine, get_engine
+from app.models.user import User
+
+# Kept out of Base.metadata: the directory lives only on DATABASE_URL
+directory_metadata = MetaData()
+
+user_directory = Table(
+    "user_directory",
+    directory_metadata,
+    Column("id", Integer, primary_key=True),  # Global user ID allocator
+    Column("email", String(255), nullable=False, unique=True),
+    Column("username", String(50), nullable=True, unique=True),
+    # IDs of released entries (archived users) are never handed out again
+    sqlite_autoincrement=True,
+)
+
+
+def shard_for_id(user_id: int, shard_count: int) -> int:
+    """Stable shard index of a user ID (independent of PYTHONHASHSEED)."""
+    return zlib.crc32(int(user_id).to_bytes(8, "big", signed=True)) % shard_count
+
+
+class ShardDirectory:
+    """
+    Global email/username -> user ID index on the directory database.
+
+    Every operation runs in its own short transaction on the directory
+    engine, independent of the request session.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    async def _lookup(self, column, value: str) -> Optional[int]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                select(user_directory.c.id).where(column == value)
+            )
+            return result.scalar_one_or_none()
+
+    async def id_for_email(self, email: str) -> Optional[int]:
+        """User ID registered for ``email``, if any."""
+        return await self._lookup(user_directory.c.email, email)
+
+    async def id_for_username(self, username: str) -> Optional[int]:
+        """User ID registered for ``username``, if any."""
+        return await self._lookup(user_directory.c.username, username)
+
+    async def entry(self, user_id: int) -> tuple[str, Optional[str]]:
+        """Current (email, username) registered for ``user_id``."""
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                select(user_directory.c.email, user_directory.c.username)
+                .where(user_directory.c.id == user_id)
+            )
+            return tuple(result.one())
+
+    async def _conflict(self, email: Optional[str], username: Optional[str], user_id: Optional[int] = None) -> None:
+        """Raise the same ValueError as UserService for a taken email/username."""
+        email_owner = await self.id_for_email(email) if email else None
+        if email_owner is not None and email_owner != user_id:
+            raise ValueError("Email already registered")
+        username_owner = await self.id_for_username(username) if username else None
+        if username_owner is not None and username_owner != user_id:
+            raise ValueError("Username already taken")
+
+    async def reserve(self, email: str, username: Optional[str]) -> int:
+        """
+        Claim ``email``/``username`` and allocate a new user ID.
+
+        The unique constraints make this the cross-shard uniqueness check,
+        including for concurrent registrations.
+
+        Raises:
+            ValueError: If the email or username is already taken
+        """
+        await self._conflict(email, username)
+        try:
+            async with self.engine.begin() as conn:
+                result = await conn.execute(
+                    insert(user_directory)
+                    .values(email=email, username=username)
+                    .returning(user_directory.c.id)
+                )
+                return result.scalar_one()
+        except IntegrityError:
+            # Lost a race against a concurrent registration
+            await self._conflict(email, username)
+            raise
+
+    async def rename(self, user_id: int, email: str, username: Optional[str]) -> None:
+        """
+        Point the directory entry of ``user_id`` at a new email/username.
+
+        Raises:
+            ValueError: If the email or username belongs to another user
+        """
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(
+                    update(user_directory)
+                    .where(user_directory.c.id == user_id)
+                    .values(email=email, username=username)
+                )
+        except IntegrityError:
+            await self._conflict(email, username, user_id)
+            raise
+
+    async def reclaim(self, user_id: int, email: str, username: Optional[str]) -> None:
+        """
+        Register ``email``/``username`` again for ``user_id`` (a user restored from the archive).
+
+        Raises:
+            ValueError: If the email or username belongs to another user
+        """
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(
+                    insert(user_directory).values(id=user_id, email=email, username=username)
+                )
+        except IntegrityError:
+            # Taken by someone else, or left in place by an earlier attempt
+            await self._conflict(email, username, user_id)
+            await self.rename(user_id, email, username)
+
+    async def release(self, *user_ids: int) -> None:
+        """Drop the entries of reservations whose shard insert failed, or of archived users."""
+        async with self.engine.begin() as conn:
+            await conn.execute(delete(user_directory).where(user_directory.c.id.in_(user_ids)))
+
+
+def _conjuncts(clause) -> Iterator[Any]:
+    """Top-level AND terms of a WHERE clause."""
+    if isinstance(clause, BooleanClauseList) and clause.operator is operators.and_:
+        for child in clause.clauses:
+            yield from _conjuncts(child)
+    elif clause is not None:
+        yield clause
+
+
+def user_ids_in_criteria(statement, parameters: Optional[dict] = None) -> Optional[Set[int]]:
+    """
+    User IDs a statement is restricted to, or None if it is not.
+
+    Only top-level ``User.id == x`` / ``User.id IN (...)`` terms count:
+    under an OR they would not restrict the rows. Values bound at execution
+    time (primary key loads, refresh) are read from ``parameters``.
+    """
+    ids: Optional[Set[int]] = None
+    for term in _conjuncts(getattr(statement, "whereclause", None)):
+        if not isinstance(term, BinaryExpression) or not isinstance(term.right, BindParameter):
+            continue
+        left = term.left
+        if getattr(left, "table", None) is not User.__table__ or left.key != "id":
+            continue
+        value = term.right.effective_value
+        if value is None:
+            value = (parameters or {}).get(term.right.key)
+        if value is None:
+            continue
+        if term.operator is operators.eq:
+            found = {value}
+        elif term.operator is operators.in_op:
+            found = set(value)
+        else:
+            continue
+        ids = found if ids is None else ids & found
+    return ids
+
+
+class ShardRouter:
+    """Shard engines, routing rules and session factories for sharded mode."""
+
+    def __init__(self, shard_urls: List[str], directory_engine: AsyncEngine):
+        if not shard_urls:
+            raise ValueError("At least one shard URL is required")
+
+        self.engines: List[AsyncEngine] = [create_instrumented_engine(url) for url in shard_urls]
+        self.directory = ShardDirectory(directory_engine)
+
+    @property
+    def shard_ids(self) -> List[int]:
+        return list(range(len(self.engines)))
+
+    def shard_for(self, user_id: int) -> int:
+        return shard_for_id(user_id, len(self.engines))
+
+    # ShardedSession hooks -------------------------------------------------
+
+    def _shard_chooser(self, mapper, instance, clause=None, **kw) -> int:
+        """Shard for flushing ``instance``; new users need their directory ID first."""
+        if instance is None:
+            # Plain SQL without an entity to route by; callers pin a shard
+            # through bind_arguments={"shard_id": ...} when it matters
+            return 0
+        if instance.id is None:
+            raise ValueError("Sharded users need a directory-allocated id before insert")
+        return self.shard_for(instance.id)
+
+    def _identity_chooser(self, mapper, primary_key, **kw) -> List[int]:
+        return [self.shard_for(primary_key[0])]
+
+    def _execute_chooser(self, context: ORMExecuteState) -> Iterable[int]:
+        parameters = context.parameters if isinstance(context.parameters, dict) else None
+        user_ids = user_ids_in_criteria(context.statement, parameters)
+        if user_ids is None:
+            return self.shard_ids
+        # An empty IN still needs one shard to produce the (empty) result
+        return sorted({self.shard_for(user_id) for user_id in user_ids}) or [0]
+
+    # Sessions ------------------------------------------------------------
+
+    def session_maker(self) -> async_sessionmaker:
+        """Factory for request sessions that span all shards."""
+        return async_sessionmaker(
+            class_=AsyncSession,
+            sync_session_class=ShardedSession,
+            expire_on_commit=False,
+            shards={shard: engine.sync_engine for shard, engine in enumerate(self.engines)},
+            shard_chooser=self._shard_chooser,
+            identity_chooser=self._identity_chooser,
+            execute_chooser=self._execute_chooser,
+        )
+
+    def shard_session(self, shard: int) -> AsyncSession:
+        """Plain session on a single shard (scatter-gather legs, maintenance)."""
+        return AsyncSession(bind=self.engines[shard], expire_on_commit=False)
+
+    # Schema / lifecycle --------------------------------------------------
+
+    async def create_tables(self) -> None:
+        async with self.directory.engine.begin() as conn:
+            await conn.run_sync(directory_metadata.create_all)
+        for engine in self.engines:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+
+    async def drop_tables(self) -> None:
+        for engine in self.engines:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+        async with self.directory.engine.begin() as conn:
+            await conn.run_sync(directory_metadata.drop_all)
+
+    async def dispose(self) -> None:
+        await asyncio.gather(*(engine.dispose() for engine in self.engines))
+
+
+_router: Optional[ShardRouter] = None
+
+
+def get_shard_router() -> ShardRouter:
+    """Return the process-wide shard router for settings.SHARD_URLS."""
+    global _router
+    if _router is None:
+        _router = ShardRouter(settings.SHARD_URLS, get_engine())
+    return _router
+
+
+async def dispose_shard_router() -> None:
+    """Close every shard pool; the next get_shard_router() starts afresh."""
+    global _router
+    if _router is not None:
+        await _router.dispose()
+    _router = None
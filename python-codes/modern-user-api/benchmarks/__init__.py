@@ -0,0 +1,4 @@
+"""
+Benchmarks and load tools for the Modern User API.
+Run from the project root, e.g. ``python -m benchmarks.user_loader``.
+"""
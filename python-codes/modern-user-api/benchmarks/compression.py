@@ -0,0 +1,99 @@
+"""
+Benchmark: CPU cost vs bytes saved for each response compression codec.
+Compresses a page_size=100 user list payload at several levels per codec.
+
+Usage:
+    python -m benchmarks.compression --users 100 --iterations 200
+"""
+import argparse
+import json
+import time
+from functools import partial
+from datetime import datetime, timedelta, timezone
+
+from app.middleware.compression import available_encodings
+
+LEVELS = {
+    "gzip": (1, 6, 9),
+    "br": (1, 4, 6, 11),
+    "zstd": (1, 3, 9, 19),
+}
+
+
+def build_payload(users: int) -> bytes:
+    """A UserListResponse-shaped JSON body with realistic text fields."""
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    items = [
+        {
+            "id": i,
+            "email": f"user{i}@example.com",
+            "username": f"user{i}",
+            "full_name": f"Example User {i}",
+            "bio": f"Backend engineer #{i}. Likes distributed systems, coffee and long walks. " * 2,
+            "avatar_url": f"https://cdn.example.com/avatars/{i:08d}.png",
+            "is_active": True,
+            "is_superuser": i % 50 == 0,
+            "created_at": (now - timedelta(days=i)).isoformat(),
+            "updated_at": (now - timedelta(hours=i)).isoformat(),
+        }
+        for i in range(1, users + 1)
+    ]
+    body = {"users": items, "total": users * 10, "page": 1, "page_size": users, "total_pages": 10}
+    return json.dumps(body, separators=(",", ":")).encode()
+
+
+def compress_once(factory, level: int, payload: bytes) -> bytes:
+    compressor = factory(level)
+    return compressor.compress(payload) + compressor.finish()
+
+
+def compress_streamed(factory, level: int, payload: bytes, chunk_size: int) -> bytes:
+    """Same as the middleware does for StreamingResponse bodies."""
+    compressor = factory(level)
+    parts = [
+        compressor.compress(payload[start:start + chunk_size])
+        for start in range(0, len(payload), chunk_size)
+    ]
+    parts.append(compressor.finish())
+    return b"".join(parts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--chunk-size", type=int, default=0, help="Compress in chunks of this size (streaming)"
+    )
+    args = parser.parse_args()
+
+    payload = build_payload(args.users)
+    print(f"payload: {len(payload)} bytes ({args.users} users)\n")
+    print(f"{'codec':<8}{'level':>6}{'bytes':>10}{'ratio':>8}{'saved':>10}{'us/op':>10}{'MB/s':>9}")
+
+    for encoding, factory in available_encodings().items():
+        for level in LEVELS[encoding]:
+            if args.chunk_size:
+                run = partial(compress_streamed, factory, level, payload, args.chunk_size)
+            else:
+                run = partial(compress_once, factory, level, payload)
+
+            compressed = run()
+            started = time.process_time()
+            for _ in range(args.iterations):
+                run()
+            cpu = (time.process_time() - started) / args.iterations
+
+            print(
+                f"{encoding:<8}{level:>6}{len(compressed):>10}"
+                f"{len(payload) / len(compressed):>8.1f}{len(payload) - len(compressed):>10}"
+                f"{cpu * 1e6:>10.0f}{len(payload) / cpu / 1e6:>9.1f}"
+            )
+
+    missing = set(LEVELS) - set(available_encodings())
+    if missing:
+        print(f"\nnot installed: {', '.join(sorted(missing))} (pip install '.[compression]')")
+
+
+if __name__ == "__main__":
+    main()
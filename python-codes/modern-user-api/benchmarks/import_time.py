@@ -0,0 +1,90 @@
+"""
+Import-time budget check for app.main, based on ``python -X importtime``.
+Exits non-zero when the budget is exceeded, so CI can run it as a gate.
+
+Two checks:
+    * cumulative import time of the target module stays under --budget-ms
+      (median of several fresh interpreters, to damp noise)
+    * heavy modules that must load lazily (server, JWT, bcrypt, DB driver)
+      are not imported as a side effect of importing the target
+
+Usage:
+    python -m benchmarks.import_time --budget-ms 600 --top 15
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Modules that must not be pulled in by `import app.main`
+LAZY_MODULES = ("uvicorn", "jose", "passlib", "bcrypt", "asyncpg", "aiosqlite")
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """Map module name -> (self_us, cumulative_us) from -X importtime output."""
+    timings = {}
+    for line in stderr.splitlines():
+        # "import time:   self |  cumulative | <indent>package"; skip the header
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure(target: str) -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+    """Import ``target`` in a fresh interpreter; return timings and loaded lazy modules."""
+    probe = (
+        f"import sys, {target}; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return parse_importtime(result.stderr), loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=600.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    totals = []
+    timings: Dict[str, Tuple[int, int]] = {}
+    loaded: List[str] = []
+    for _ in range(args.runs):
+        timings, loaded = measure(args.target)
+        totals.append(timings[args.target][1] / 1000)
+
+    total_ms = statistics.median(totals)
+
+    print(f"{'module':<60}{'self ms':>10}{'cumul ms':>10}")
+    slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[: args.top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"{name:<60}{self_us / 1000:>10.1f}{cumulative_us / 1000:>10.1f}")
+
+    print(f"\nimport {args.target}: {total_ms:.1f} ms (median of {args.runs}), budget {args.budget_ms:.0f} ms")
+
+    failed = False
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time over budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if loaded:
+        print(f"FAIL: eagerly imported: {', '.join(loaded)}")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
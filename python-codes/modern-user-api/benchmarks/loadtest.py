@@ -0,0 +1,327 @@
+"""
+Asyncio load generator with scripted user journeys and latency reports.
+Drives app.main:app in-process (ASGI transport) or a running server.
+
+Scenarios:
+    auth   register -> login -> GET /auth/me loop (one journey per virtual user)
+    admin  superuser paging and searching GET /users
+    stats  superuser polling GET /users/stats/overview
+
+The database is whatever DATABASE_URL points at: a local Postgres, or a
+SQLite stand-in such as ``sqlite+aiosqlite:///./loadtest.db``.
+
+Usage:
+    # In-process, 30s, write a baseline
+    python -m benchmarks.loadtest --duration 30 --output baseline.json
+
+    # Against a local uvicorn, failing if p95/throughput regress by >15%
+    python -m benchmarks.loadtest --base-url http://localhost:8000 \\
+        --compare baseline.json --max-regression 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+API = "/api/v1"
+PASSWORD = "Loadtest1"
+
+
+class Recorder:
+    """Collects per-endpoint latencies and error counts."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+
+    async def request(
+        self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latencies[name].append(time.perf_counter() - started)
+
+        if response is None or response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for name, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            endpoints[name] = {
+                "requests": len(samples),
+                "errors": self.errors[name],
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+                "p50_ms": round(percentile(samples, 50) * 1000, 3),
+                "p95_ms": round(percentile(samples, 95) * 1000, 3),
+                "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            }
+        return endpoints
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_samples))) - 1, 0)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+
+def auth_headers(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def login(client: httpx.AsyncClient, rec: Recorder, email: str) -> Optional[str]:
+    response = await rec.request(
+        client, "POST /auth/login", "POST", f"{API}/auth/login",
+        json={"email": email, "password": PASSWORD},
+    )
+    if response is None or response.status_code != 200:
+        return None
+    return response.json()["access_token"]
+
+
+async def auth_journey(client, rec, deadline, vu: int, run_id: str, me_calls: int) -> None:
+    """register -> login -> /auth/me x me_calls, repeated until the deadline."""
+    iteration = 0
+    while time.monotonic() < deadline:
+        email = f"lt-{run_id}-{vu}-{iteration}@example.com"
+        iteration += 1
+
+        await rec.request(
+            client, "POST /auth/register", "POST", f"{API}/auth/register",
+            json={
+                "email": email,
+                "username": f"lt_{run_id}_{vu}_{iteration}",
+                "password": PASSWORD,
+                "confirm_password": PASSWORD,
+            },
+        )
+        token = await login(client, rec, email)
+        if token is None:
+            continue
+
+        for _ in range(me_calls):
+            if time.monotonic() >= deadline:
+                break
+            await rec.request(
+                client, "GET /auth/me", "GET", f"{API}/auth/me", headers=auth_headers(token)
+            )
+
+
+async def admin_listing(client, rec, deadline, token: str, pages: int) -> None:
+    """Page through the user list, then page a search, until the deadline."""
+    headers = auth_headers(token)
+    while time.monotonic() < deadline:
+        for page in range(1, pages + 1):
+            await rec.request(
+                client, "GET /users", "GET", f"{API}/users/",
+                params={"page": page, "page_size": 50}, headers=headers,
+            )
+            await rec.request(
+                client, "GET /users?search", "GET", f"{API}/users/",
+                params={"page": page, "page_size": 20, "search": "lt-"}, headers=headers,
+            )
+
+
+async def stats_polling(client, rec, deadline, token: str, interval: float) -> None:
+    """Poll user statistics until the deadline."""
+    headers = auth_headers(token)
+    while time.monotonic() < deadline:
+        await rec.request(
+            client, "GET /users/stats/overview", "GET", f"{API}/users/stats/overview",
+            headers=headers,
+        )
+        if interval:
+            await asyncio.sleep(interval)
+
+
+async def ensure_superuser(email: str) -> None:
+    """Create (or promote) the load-test superuser directly in the database."""
+    from app.database import async_session_maker
+    from app.schemas.user import UserCreate
+    from app.services.user import UserService
+
+    async with async_session_maker() as session:
+        service = UserService(session)
+        user = await service.get_user_by_email(email)
+        if user is None:
+            user = await service.create_user(
+                UserCreate(email=email, password=PASSWORD, confirm_password=PASSWORD)
+            )
+        user.is_superuser = True
+        user.is_active = True
+        await session.commit()
+
+
+def build_client(base_url: Optional[str]) -> httpx.AsyncClient:
+    timeout = httpx.Timeout(60.0)
+    if base_url:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        return httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits)
+
+    from app.main import app
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://localhost", timeout=timeout
+    )
+
+
+@asynccontextmanager
+async def app_lifespan(base_url: Optional[str]) -> AsyncIterator[None]:
+    """
+    In-process, run the app's startup and shutdown around the load.
+
+    ASGITransport sends no lifespan events: without this the tables would
+    not be created and the engine never disposed (its aiosqlite threads
+    then keep the process from exiting). Against a server, only the
+    engine ensure_superuser may have opened is disposed.
+    """
+    if base_url:
+        from app.database import dispose_engine
+
+        try:
+            yield
+        finally:
+            await dispose_engine()
+        return
+
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        yield
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Return a list of regressions of p95 latency or throughput beyond tolerance."""
+    failures = []
+    for name, base in baseline["endpoints"].items():
+        now = current["endpoints"].get(name)
+        if now is None:
+            failures.append(f"{name}: missing from this run")
+            continue
+        if now["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            failures.append(f"{name}: p95 {base['p95_ms']}ms -> {now['p95_ms']}ms")
+        if now["throughput_rps"] < base["throughput_rps"] * (1 - max_regression):
+            failures.append(
+                f"{name}: throughput {base['throughput_rps']} -> {now['throughput_rps']} rps"
+            )
+    return failures
+
+
+def print_report(result: dict) -> None:
+    print(f"\n{'endpoint':<28}{'reqs':>8}{'errs':>6}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, row in result["endpoints"].items():
+        print(
+            f"{name:<28}{row['requests']:>8}{row['errors']:>6}{row['throughput_rps']:>10}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+        )
+
+
+async def run(args: argparse.Namespace) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    rec = Recorder()
+    scenarios = set(args.scenario)
+
+    admin_email = args.admin_email
+    async with app_lifespan(args.base_url), build_client(args.base_url) as client:
+        if scenarios & {"admin", "stats"}:
+            await ensure_superuser(admin_email)
+
+        admin_token = None
+        if scenarios & {"admin", "stats"}:
+            admin_token = await login(client, rec, admin_email)
+            if admin_token is None:
+                raise SystemExit("Could not log in as the load-test superuser")
+
+        started = time.monotonic()
+        deadline = started + args.duration
+        tasks = []
+        if "auth" in scenarios:
+            tasks += [
+                auth_journey(client, rec, deadline, vu, run_id, args.me_calls)
+                for vu in range(args.users)
+            ]
+        if "admin" in scenarios:
+            tasks += [
+                admin_listing(client, rec, deadline, admin_token, args.pages)
+                for _ in range(args.admin_users)
+            ]
+        if "stats" in scenarios:
+            tasks += [
+                stats_polling(client, rec, deadline, admin_token, args.stats_interval)
+                for _ in range(args.admin_users)
+            ]
+
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - started
+
+    return {
+        "run_id": run_id,
+        "mode": "http" if args.base_url else "in-process",
+        "database": os.environ.get("DATABASE_URL", "<default>").split("@")[-1],
+        "duration_s": round(elapsed, 2),
+        "virtual_users": args.users,
+        "endpoints": rec.report(elapsed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="Target server; omit to run in-process")
+    parser.add_argument(
+        "--scenario", action="append", choices=["auth", "admin", "stats"],
+        help="Scenario to run (repeatable; default: all)",
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--users", type=int, default=20, help="Virtual users for auth")
+    parser.add_argument("--admin-users", type=int, default=2, help="Virtual admins")
+    parser.add_argument("--me-calls", type=int, default=20, help="/auth/me calls per login")
+    parser.add_argument("--pages", type=int, default=5, help="List pages per admin loop")
+    parser.add_argument("--stats-interval", type=float, default=0.0)
+    parser.add_argument("--admin-email", default="loadtest-admin@example.com")
+    parser.add_argument("--strict-budgets", action="store_true",
+                        help="In-process only: fail requests that exceed their SQL budget")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline JSON to gate against")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    args = parser.parse_args()
+    args.scenario = args.scenario or ["auth", "admin", "stats"]
+
+    if args.strict_budgets:
+        # Must be set before app.core.config is imported
+        os.environ["SQL_BUDGET_MODE"] = "raise"
+
+    result = asyncio.run(run(args))
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        failures = compare(result, baseline, args.max_regression)
+        if failures:
+            print("\nRegressions:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: per-request overhead of MetricsMiddleware.
+Drives a trivial ASGI app directly (no network) with and without the middleware.
+
+Usage:
+    python -m benchmarks.metrics_overhead --requests 200000
+"""
+import argparse
+import asyncio
+import time
+
+from app.middleware.metrics import MetricsMiddleware
+
+
+class _Route:
+    path_format = "/api/v1/users/{user_id}"
+
+
+async def plain_app(scope, receive, send):
+    """Minimal app: mimics the router tagging the scope, then responds 200."""
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, requests: int) -> float:
+    """Return microseconds per request."""
+    started = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "path": "/api/v1/users/1", "headers": []}
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+async def main(args: argparse.Namespace) -> None:
+    instrumented = MetricsMiddleware(plain_app)
+
+    # Warm up label children and code paths
+    await drive(plain_app, 1000)
+    await drive(instrumented, 1000)
+
+    baseline = await drive(plain_app, args.requests)
+    with_metrics = await drive(instrumented, args.requests)
+
+    print(f"baseline      {baseline:8.2f} us/request")
+    print(f"with metrics  {with_metrics:8.2f} us/request")
+    print(f"overhead      {with_metrics - baseline:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    asyncio.run(main(parser.parse_args()))
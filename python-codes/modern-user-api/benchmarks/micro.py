@@ -0,0 +1,270 @@
+"""
+Microbenchmarks for security, schema and service hot paths.
+Appends every run to a JSON-lines history and diffs against the previous run.
+
+Covers the code that runs on every request or login:
+    security  create_access_token, verify_token, hash_password/verify_password
+              at settings.BCRYPT_ROUNDS
+    schemas   UserCreate / UserUpdate validation (incl. password validators),
+              UserResponse.model_validate over ORM rows
+    service   every UserService query against a seeded in-memory SQLite DB
+
+Usage:
+    python -m benchmarks.micro                  # all groups
+    python -m benchmarks.micro --group security --min-time 0.5
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.security import (
+    create_access_token,
+    hash_password,
+    verify_password,
+    verify_token,
+)
+from app.database import Base
+from app.models.user import User
+from app.schemas.user import UserCreate, UserResponse, UserUpdate
+from app.services.user import UserService
+
+HISTORY_FILE = Path(__file__).parent / "results" / "micro-history.jsonl"
+
+SEED_USERS = 2_000
+
+
+def summarize(samples: List[float], per_round: int) -> dict:
+    """Per-operation timing stats from per-round wall times."""
+    per_op = [sample / per_round for sample in samples]
+    mean = statistics.fmean(per_op)
+    return {
+        "ops_per_sec": round(1 / mean, 2),
+        "mean_us": round(mean * 1e6, 3),
+        "median_us": round(statistics.median(per_op) * 1e6, 3),
+        "stdev_us": round(statistics.pstdev(per_op) * 1e6, 3),
+        "min_us": round(min(per_op) * 1e6, 3),
+        "rounds": len(samples),
+        "per_round": per_round,
+    }
+
+
+def bench_sync(fn: Callable[[], object], min_time: float, rounds: int = 7) -> dict:
+    """Calibrate iterations so a round takes ~min_time/rounds, then time rounds."""
+    target = min_time / rounds
+    per_round = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(per_round):
+            fn()
+        if time.perf_counter() - started >= target or per_round >= 1 << 20:
+            break
+        per_round *= 2
+
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(per_round):
+            fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples, per_round)
+
+
+async def bench_async(fn: Callable[[], Awaitable[object]], min_time: float, rounds: int = 7) -> dict:
+    """Async counterpart of bench_sync."""
+    target = min_time / rounds
+    per_round = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(per_round):
+            await fn()
+        if time.perf_counter() - started >= target or per_round >= 1 << 16:
+            break
+        per_round *= 2
+
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(per_round):
+            await fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples, per_round)
+
+
+def make_orm_user(user_id: int) -> User:
+    now = datetime.now(timezone.utc)
+    return User(
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        username=f"user_{user_id}",
+        full_name="Bench User",
+        hashed_password="x",
+        is_active=True,
+        is_superuser=False,
+        is_verified=True,
+        bio="Lorem ipsum " * 20,
+        created_at=now,
+        updated_at=now,
+        login_count=3,
+    )
+
+
+def security_cases(min_time: float) -> Dict[str, dict]:
+    token = create_access_token({"sub": "42", "email": "user42@example.com"})
+    hashed = hash_password("Benchmark1")
+    # bcrypt is ~100ms+ per call; a handful of rounds is plenty
+    return {
+        "security.create_access_token": bench_sync(
+            lambda: create_access_token({"sub": "42", "email": "user42@example.com"}), min_time
+        ),
+        "security.verify_token": bench_sync(lambda: verify_token(token), min_time),
+        f"security.hash_password[rounds={settings.BCRYPT_ROUNDS}]": bench_sync(
+            lambda: hash_password("Benchmark1"), min_time, rounds=3
+        ),
+        f"security.verify_password[rounds={settings.BCRYPT_ROUNDS}]": bench_sync(
+            lambda: verify_password("Benchmark1", hashed), min_time, rounds=3
+        ),
+    }
+
+
+def schema_cases(min_time: float) -> Dict[str, dict]:
+    create_payload = {
+        "email": "new@example.com",
+        "username": "new_user",
+        "full_name": "New User",
+        "password": "Str0ngPassword",
+        "confirm_password": "Str0ngPassword",
+    }
+    update_payload = {"username": "renamed_user", "bio": "Updated bio", "is_active": True}
+    users = [make_orm_user(i) for i in range(1, 101)]
+
+    return {
+        "schemas.UserCreate": bench_sync(lambda: UserCreate(**create_payload), min_time),
+        "schemas.UserUpdate": bench_sync(lambda: UserUpdate(**update_payload), min_time),
+        "schemas.UserResponse.model_validate": bench_sync(
+            lambda: UserResponse.model_validate(users[0]), min_time
+        ),
+        "schemas.UserResponse.model_validate[x100]": bench_sync(
+            lambda: [UserResponse.model_validate(user) for user in users], min_time
+        ),
+    }
+
+
+async def service_cases(min_time: float) -> Dict[str, dict]:
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_maker() as session:
+        session.add_all(
+            User(
+                email=f"user{i}@example.com",
+                username=f"user_{i}",
+                full_name=f"User {i}",
+                hashed_password="x",
+                is_active=i % 10 != 0,
+                is_verified=i % 3 == 0,
+            )
+            for i in range(1, SEED_USERS + 1)
+        )
+        await session.commit()
+
+    results = {}
+    async with session_maker() as session:
+        service = UserService(session)
+        ids = list(range(1, 101))
+        cases = {
+            "service.get_user_by_id": lambda: service.get_user_by_id(1000),
+            "service.get_users_by_ids[100]": lambda: service.get_users_by_ids(ids),
+            "service.get_user_by_email": lambda: service.get_user_by_email("user1000@example.com"),
+            "service.get_user_by_username": lambda: service.get_user_by_username("user_1000"),
+            "service.get_users[page]": lambda: service.get_users(skip=100, limit=20),
+            "service.get_users[search]": lambda: service.get_users(limit=20, search="user_1"),
+            "service.get_user_stats": service.get_user_stats,
+        }
+        for name, fn in cases.items():
+            # Expunge between calls so identity-map hits don't flatter the numbers
+            async def call(fn=fn):
+                await fn()
+                session.expunge_all()
+            results[name] = await bench_async(call, min_time)
+
+    await engine.dispose()
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def last_run() -> dict:
+    if not HISTORY_FILE.exists():
+        return {}
+    lines = HISTORY_FILE.read_text().splitlines()
+    return json.loads(lines[-1]) if lines else {}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--group", action="append", choices=["security", "schemas", "service"],
+        help="Group to run (repeatable; default: all)",
+    )
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds per case")
+    parser.add_argument("--no-save", action="store_true", help="Do not append to history")
+    args = parser.parse_args()
+    groups = args.group or ["security", "schemas", "service"]
+
+    results: Dict[str, dict] = {}
+    if "security" in groups:
+        results.update(security_cases(args.min_time))
+    if "schemas" in groups:
+        results.update(schema_cases(args.min_time))
+    if "service" in groups:
+        results.update(asyncio.run(service_cases(args.min_time)))
+
+    previous = last_run().get("results", {})
+    print(f"{'case':<48}{'mean':>12}{'ops/s':>14}{'vs last':>10}")
+    for name, row in results.items():
+        delta = ""
+        if name in previous:
+            change = row["mean_us"] / previous[name]["mean_us"] - 1
+            delta = f"{change:+.1%}"
+        print(f"{name:<48}{row['mean_us']:>10.1f}us{row['ops_per_sec']:>14.1f}{delta:>10}")
+
+    if not args.no_save:
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with HISTORY_FILE.open("a") as f:
+            f.write(json.dumps(entry) + "\n")
+        print(f"\nAppended to {HISTORY_FILE}")
+
+
+if __name__ == "__main__":
+    main()
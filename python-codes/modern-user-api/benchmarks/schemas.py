@@ -0,0 +1,77 @@
+"""
+Benchmark: validation throughput of the request and response schemas.
+Reports validations per second for UserCreate, UserUpdate and UserListResponse.
+
+The list cases compare the fast path (ResponseSchema.dump_json) with what
+FastAPI does for a returned dict: validate, dump to Python, then encode.
+
+Usage:
+    python -m benchmarks.schemas --page-size 100 --min-time 1.0
+"""
+import argparse
+import json
+
+from pydantic import ValidationError
+
+from app.schemas.user import UserCreate, UserListResponse, UserUpdate, user_list_adapter
+from benchmarks.micro import bench_sync, make_orm_user
+
+
+def expect_invalid(schema, payload: dict) -> None:
+    try:
+        schema.model_validate(payload)
+    except ValidationError:
+        return
+    raise AssertionError(f"{schema.__name__} accepted an invalid payload")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds per case")
+    args = parser.parse_args()
+
+    create_payload = {
+        "email": "new@example.com",
+        "username": "new_user",
+        "full_name": "New User",
+        "bio": "Short bio",
+        "password": "Str0ngPassword",
+        "confirm_password": "Str0ngPassword",
+    }
+    create_json = json.dumps(create_payload)
+    # Digit missing: the password check has to scan the whole string
+    weak_payload = {**create_payload, "password": "NoDigitsAnywhere", "confirm_password": "NoDigitsAnywhere"}
+    update_payload = {"username": "renamed_user", "bio": "Updated bio", "is_active": True}
+
+    users = [make_orm_user(i) for i in range(1, args.page_size + 1)]
+    page = {
+        "users": users,
+        "total": 10 * args.page_size,
+        "page": 1,
+        "page_size": args.page_size,
+        "total_pages": 10,
+    }
+
+    def fastapi_style() -> bytes:
+        return json.dumps(UserListResponse.model_validate(page).model_dump(mode="json")).encode()
+
+    cases = {
+        "UserCreate": lambda: UserCreate.model_validate(create_payload),
+        "UserCreate[json]": lambda: UserCreate.model_validate_json(create_json),
+        "UserCreate[weak password]": lambda: expect_invalid(UserCreate, weak_payload),
+        "UserUpdate": lambda: UserUpdate.model_validate(update_payload),
+        f"user_list_adapter[{args.page_size}]": lambda: user_list_adapter.validate_python(users),
+        f"UserListResponse.model_validate[{args.page_size}]": lambda: UserListResponse.model_validate(page),
+        f"UserListResponse.dump_json[{args.page_size}]": lambda: UserListResponse.dump_json(page),
+        f"UserListResponse validate+encode[{args.page_size}]": fastapi_style,
+    }
+
+    print(f"{'case':<48}{'mean':>12}{'ops/s':>14}")
+    for name, fn in cases.items():
+        row = bench_sync(fn, args.min_time)
+        print(f"{name:<48}{row['mean_us']:>10.1f}us{row['ops_per_sec']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
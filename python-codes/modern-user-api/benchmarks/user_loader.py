@@ -0,0 +1,99 @@
+"""
+Benchmark: per-id user lookups vs the batching UserLoader.
+Reports lookups per second and DB statements issued for each mode.
+
+Usage:
+    python -m benchmarks.user_loader --users 1000 --concurrency 200 --rounds 20
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import event, func, select
+
+from app.core.security import hash_password
+from app.database import async_session_maker, create_tables, get_engine
+from app.models.user import User
+from app.services.loader import UserLoader
+from app.services.user import UserService
+
+
+class StatementCounter:
+    """Counts statements sent to the database through the engine."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+async def seed_users(count: int) -> list[int]:
+    """Make sure at least ``count`` users exist and return their IDs."""
+    async with async_session_maker() as session:
+        existing = (await session.execute(select(func.count(User.id)))).scalar()
+        if existing < count:
+            # One hash reused for all rows; bcrypt cost is not under test here
+            hashed = hash_password("Benchmark1")
+            session.add_all(
+                User(email=f"bench-{existing + i}@example.com", hashed_password=hashed)
+                for i in range(count - existing)
+            )
+            await session.commit()
+
+        result = await session.execute(
+            select(User.id).where(User.deleted_at.is_(None)).limit(count)
+        )
+        return list(result.scalars().all())
+
+
+async def lookup_direct(user_id: int) -> None:
+    """Baseline: one session and one SELECT per lookup (pre-loader behaviour)."""
+    async with async_session_maker() as session:
+        await UserService(session).get_user_by_id(user_id)
+
+
+async def run_mode(name, lookup, ids, concurrency, rounds, counter) -> None:
+    counter.count = 0
+    started = time.perf_counter()
+
+    for _ in range(rounds):
+        batch = random.choices(ids, k=concurrency)
+        await asyncio.gather(*(lookup(user_id) for user_id in batch))
+
+    elapsed = time.perf_counter() - started
+    lookups = concurrency * rounds
+    print(
+        f"{name:<10} lookups={lookups:<7} qps={lookups / elapsed:>10.1f} "
+        f"statements={counter.count:<6} lookups/statement={lookups / max(counter.count, 1):.1f}"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    await create_tables()
+    ids = await seed_users(args.users)
+
+    engine = get_engine()
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+
+    loader = UserLoader(max_batch_size=args.max_batch_size, wait_ms=args.wait_ms)
+
+    try:
+        await run_mode("direct", lookup_direct, ids, args.concurrency, args.rounds, counter)
+        await run_mode("loader", loader.load, ids, args.concurrency, args.rounds, counter)
+        print(f"loader batches={loader.batches_dispatched} keys={loader.keys_requested}")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--max-batch-size", type=int, default=100)
+    parser.add_argument("--wait-ms", type=float, default=0.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,114 @@
+"""
+Test setup: the app on a throwaway SQLite database, SQL budgets enforced.
+The environment is set here, before anything imports app.core.config.
+"""
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from itertools import count
+
+import pytest
+
+_DATA_DIR = tempfile.mkdtemp(prefix="modern-user-api-tests-")
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{_DATA_DIR}/users.db",
+    "DEBUG": "true",  # Creates the tables at startup
+    "SQL_BUDGET_MODE": "raise",  # A route over its statement budget fails its test
+    "BCRYPT_ROUNDS": "4",
+    "ARCHIVE_ENABLED": "false",  # Tests archive explicitly
+    "CONCURRENCY_LIMIT_ENABLED": "false",
+    "CHANGE_FEED_SETTLE_SECONDS": "0",
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+
+PASSWORD = "Passw0rdX"
+_names = count(1)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="module")
+def client():
+    """Client of one app instance per test module (startup, shutdown included)."""
+    from app.main import create_app
+
+    with TestClient(create_app(), base_url="http://localhost") as client:
+        yield client
+
+
+def api(path: str) -> str:
+    return f"{settings.API_V1_STR}{path}"
+
+
+def run(client: TestClient, coroutine_function, *args):
+    """Run ``coroutine_function(*args)`` on the app's event loop."""
+    return client.portal.call(coroutine_function, *args)
+
+
+def register(client: TestClient, name: str = "") -> dict:
+    """Register a fresh user; returns the created user."""
+    name = f"{name or 'user'}{next(_names)}"
+    response = client.post(api("/auth/register"), json={
+        "email": f"{name}@example.com",
+        "username": name,
+        "password": PASSWORD,
+        "confirm_password": PASSWORD,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def login(client: TestClient, email: str) -> dict:
+    """Authorization headers of a logged in user."""
+    response = client.post(api("/auth/login"), json={"email": email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def _make_superuser(user_id: int) -> None:
+    from sqlalchemy import update
+
+    from app.database import async_session_maker
+    from app.models.user import User
+
+    async with async_session_maker() as session:
+        await session.execute(update(User).where(User.id == user_id).values(is_superuser=True))
+        await session.commit()
+
+
+def make_superuser(client: TestClient, user_id: int) -> None:
+    run(client, _make_superuser, user_id)
+
+
+async def _archive_deleted() -> int:
+    from app.services.archive import archive_batch, user_engines
+
+    # Deleted "long enough" ago: everything deleted so far
+    cutoff = datetime.utcnow() + timedelta(minutes=1)
+    return sum([await archive_batch(engine, cutoff, 1000) for engine in user_engines()])
+
+
+def archive_deleted(client: TestClient) -> int:
+    """Move every soft deleted user to the archive; returns how many."""
+    return run(client, _archive_deleted)
+
+
+@pytest.fixture
+def user(client):
+    """A new regular user, with its authorization ``headers``."""
+    created = register(client)
+    return {**created, "headers": login(client, created["email"])}
+
+
+@pytest.fixture(scope="module")
+def admin_headers(client):
+    created = register(client, "admin")
+    make_superuser(client, created["id"])
+    return login(client, created["email"])
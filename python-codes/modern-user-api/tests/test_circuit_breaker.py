@@ -0,0 +1,187 @@
+"""
+Database circuit breaker: tripping, fast failure, half-open probing, /ready.
+The outage is a SQLite engine whose driver connect fails while ``down`` is set.
+"""
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import lifecycle as lifecycle_module
+from app.core.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    DatabaseUnavailable,
+    instrument_engine,
+)
+from app.core.pool import InstrumentedAsyncQueuePool
+from tests.conftest import api, run
+
+THRESHOLD = 3
+RESET_TIMEOUT = 0.2
+
+
+class FlakyDatabase:
+    """SQLite engine behind a breaker; connects fail while ``down``."""
+
+    def __init__(self, path):
+        self.down = False
+        self.connects = 0
+        self.statements = 0
+        self.breaker = CircuitBreaker("test", THRESHOLD, RESET_TIMEOUT)
+        # pool_recycle=0: every checkout connects afresh, so each one reaches the driver
+        self.engine = create_async_engine(
+            f"sqlite+aiosqlite:///{path}", poolclass=InstrumentedAsyncQueuePool, pool_recycle=0
+        )
+        dialect = self.engine.sync_engine.dialect
+        connect = dialect.connect
+
+        def flaky_connect(*args, **kwargs):
+            self.connects += 1
+            if self.down:
+                raise ConnectionRefusedError("database is down")
+            return connect(*args, **kwargs)
+
+        dialect.connect = flaky_connect
+        instrument_engine(self.engine.sync_engine, self.breaker)
+
+        @event.listens_for(self.engine.sync_engine, "before_cursor_execute")
+        def count_statement(*args):
+            self.statements += 1
+
+    async def query(self) -> None:
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+
+@pytest.fixture
+def database(tmp_path):
+    return FlakyDatabase(tmp_path / "flaky.db")
+
+
+def test_trips_after_consecutive_connect_failures(database):
+    async def scenario():
+        await database.query()
+        database.down = True
+        for failures in range(1, THRESHOLD + 1):
+            assert database.breaker.state == CLOSED
+            with pytest.raises(ConnectionRefusedError):
+                await database.query()
+            assert database.breaker.failures == failures
+        assert database.breaker.state == OPEN
+
+        # Open: no connect attempt, no waiting
+        connects = database.connects
+        started = time.perf_counter()
+        with pytest.raises(DatabaseUnavailable) as raised:
+            await database.query()
+        assert time.perf_counter() - started < 0.05
+        assert database.connects == connects
+        assert 0 < raised.value.retry_after <= RESET_TIMEOUT
+        await database.engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_a_success_resets_the_failure_count(database):
+    async def scenario():
+        database.down = True
+        for _ in range(THRESHOLD - 1):
+            with pytest.raises(ConnectionRefusedError):
+                await database.query()
+        database.down = False
+        await database.query()
+        assert (database.breaker.state, database.breaker.failures) == (CLOSED, 0)
+        await database.engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_half_open_probe_closes_or_reopens(database):
+    async def scenario():
+        database.down = True
+        for _ in range(THRESHOLD):
+            with pytest.raises(ConnectionRefusedError):
+                await database.query()
+
+        # A failed probe opens it again for another reset_timeout
+        await asyncio.sleep(RESET_TIMEOUT)
+        with pytest.raises(ConnectionRefusedError):
+            await database.query()
+        assert database.breaker.state == OPEN
+        with pytest.raises(DatabaseUnavailable):
+            await database.query()
+
+        # A completed statement closes it
+        await asyncio.sleep(RESET_TIMEOUT)
+        database.down = False
+        await database.query()
+        assert database.breaker.state == CLOSED
+        await database.query()
+        await database.engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_half_open_lets_one_probe_through_at_a_time():
+    breaker = CircuitBreaker("probe", failure_threshold=1, reset_timeout=RESET_TIMEOUT)
+    breaker.record_failure()
+    time.sleep(RESET_TIMEOUT)
+
+    breaker.before_checkout()  # The probe
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(DatabaseUnavailable):
+        breaker.before_checkout()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_checkout()
+
+
+def _app_breakers() -> list:
+    return [engine.sync_engine.pool.breaker for engine in lifecycle_module._all_engines()]
+
+
+def test_open_breaker_answers_503(client, user):
+    breakers = _app_breakers()
+    try:
+        for breaker in breakers:
+            for _ in range(breaker.failure_threshold):
+                breaker.record_failure()
+
+        response = client.get(api("/auth/me"), headers=user["headers"])
+        assert response.status_code == 503, response.text
+        assert response.json()["type"] == "database_unavailable"
+        assert int(response.headers["retry-after"]) >= 1
+    finally:
+        for breaker in breakers:
+            breaker.record_success()
+
+    assert client.get(api("/auth/me"), headers=user["headers"]).status_code == 200
+
+
+def test_ready_probe_is_cached(client, database, monkeypatch):
+    probe = lifecycle_module.DatabaseProbe(ttl=60.0, timeout=1.0)
+    monkeypatch.setattr(lifecycle_module, "database_probe", probe)
+    monkeypatch.setattr(lifecycle_module, "_all_engines", lambda: [database.engine])
+
+    async def check_concurrently():
+        return await asyncio.gather(*(probe.check() for _ in range(5)))
+
+    assert run(client, check_concurrently) == [None] * 5
+    assert client.get("/ready").json() == {"status": "ready"}
+    assert database.statements == 1  # One probe for all of them
+
+    # An outage shows once the cached result expires
+    database.down = True
+    assert client.get("/ready").status_code == 200
+    probe.ttl = 0.0
+    response = client.get("/ready")
+    assert response.status_code == 503, response.text
+    assert response.json()["status"] == "database_unavailable"
+    assert "database is down" in response.json()["detail"]
+    run(client, database.engine.dispose)
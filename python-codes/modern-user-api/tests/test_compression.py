@@ -0,0 +1,113 @@
+"""
+Response compression: negotiation, minimum_size, @skip_compression, Vary.
+The middleware wraps a small FastAPI app; only gzip is assumed installed.
+"""
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware.compression import CompressionMiddleware, negotiate, skip_compression
+
+MINIMUM_SIZE = 500
+LARGE = "x" * 2000
+SMALL = "x" * 100
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=MINIMUM_SIZE)
+
+    @app.get("/text", response_class=PlainTextResponse)
+    async def text(size: int = len(LARGE)):
+        return "x" * size
+
+    @app.get("/skipped", response_class=PlainTextResponse)
+    @skip_compression
+    async def skipped():
+        return LARGE
+
+    @app.get("/png")
+    async def png():
+        return PlainTextResponse(LARGE, media_type="image/png")
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse((f"{i:08d}\n" for i in range(1000)), media_type="text/plain")
+
+    return app
+
+
+@pytest.fixture(scope="module")
+def compression_client():
+    with TestClient(build_app()) as client:
+        yield client
+
+
+def get(client: TestClient, path: str, accept_encoding: str, **params):
+    return client.get(path, params=params, headers={"Accept-Encoding": accept_encoding})
+
+
+def test_gzip_is_negotiated(compression_client):
+    response = get(compression_client, "/text", "gzip")
+    assert response.status_code == 200, response.text
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(LARGE)
+    assert response.text == LARGE  # Decoded by the client
+
+    for accept_encoding in ("identity", "gzip;q=0", "deflate"):
+        response = get(compression_client, "/text", accept_encoding)
+        assert "content-encoding" not in response.headers, accept_encoding
+        assert response.text == LARGE
+
+
+def test_negotiation_follows_server_preference_and_quality():
+    supported = ["zstd", "br", "gzip"]
+    assert negotiate("gzip, br", supported) == "br"
+    assert negotiate("gzip;q=0.5, br;q=0", supported) == "gzip"
+    assert negotiate("*", supported) == "zstd"
+    assert negotiate("*, zstd;q=0", supported) == "br"
+    assert negotiate("GZIP;q=oops, identity", supported) is None
+
+
+def test_bodies_below_minimum_size_pass_through(compression_client):
+    response = get(compression_client, "/text", "gzip", size=MINIMUM_SIZE - 1)
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-length"] == str(MINIMUM_SIZE - 1)
+    # Compressible type: a larger body would have been compressed
+    assert response.headers["vary"] == "Accept-Encoding"
+
+    response = get(compression_client, "/text", "gzip", size=MINIMUM_SIZE)
+    assert response.headers["content-encoding"] == "gzip"
+
+
+def test_skip_compression_opts_a_route_out(compression_client):
+    response = get(compression_client, "/skipped", "gzip")
+    assert response.status_code == 200, response.text
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+    assert response.text == LARGE
+
+
+def test_non_text_types_pass_through(compression_client):
+    response = get(compression_client, "/png", "gzip")
+    assert "content-encoding" not in response.headers
+    assert response.content == LARGE.encode()
+
+
+def test_compressed_responses_vary_on_accept_encoding(compression_client):
+    for path in ("/text", "/stream"):
+        response = get(compression_client, path, "gzip")
+        assert response.headers["content-encoding"] == "gzip", path
+        assert response.headers["vary"] == "Accept-Encoding", path
+
+
+def test_streaming_responses_are_compressed_chunk_by_chunk(compression_client):
+    with compression_client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+
+    assert gzip.decompress(raw) == "".join(f"{i:08d}\n" for i in range(1000)).encode()
@@ -0,0 +1,133 @@
+"""
+Adaptive concurrency limiter: shedding, priority lanes, bypass, RTT samples.
+The middleware wraps a stub app whose requests stay in flight until released.
+"""
+import asyncio
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from app.core.concurrency import AdaptiveLimiter
+from app.middleware.concurrency import ConcurrencyLimitMiddleware
+
+API = "/api/v1"
+LIMIT = 10  # Lanes: critical 10, normal 8, low 5 requests
+
+
+class RecordingLimiter(AdaptiveLimiter):
+    """Fixed limit; keeps what each request reported on release."""
+
+    def __init__(self):
+        super().__init__(initial_limit=LIMIT, min_limit=LIMIT, max_limit=LIMIT)
+        self.rtts = []
+
+    def release(self, rtt):
+        self.rtts.append(rtt)
+        super().release(rtt)
+
+
+class StubApp:
+    """200s; ``?hold=1`` waits for ``released``, ``?status=N`` answers N, ``?raise=1`` raises."""
+
+    def __init__(self):
+        self.released = asyncio.Event()
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope["query_string"].decode())
+        if "hold" in query:
+            await self.released.wait()
+        if "raise" in query:
+            raise RuntimeError("boom")
+        status = int(query.get("status", ["200"])[0])
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+
+def scenario(test):
+    """Run ``test(client, limiter, app)`` against a fresh limiter and stub app."""
+    async def run():
+        app, limiter = StubApp(), RecordingLimiter()
+        transport = httpx.ASGITransport(app=ConcurrencyLimitMiddleware(app, limiter, API))
+        async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+            await test(client, limiter, app)
+
+    asyncio.run(run())
+
+
+async def hold(client, limiter, count: int, method: str = "GET", path: str = f"{API}/users/1"):
+    """Start ``count`` more requests that stay in flight; returns their tasks."""
+    target = limiter.in_flight + count
+    tasks = [
+        asyncio.create_task(client.request(method, path, params={"hold": 1})) for _ in range(count)
+    ]
+    while limiter.in_flight < target:
+        await asyncio.sleep(0.001)
+    return tasks
+
+
+def test_requests_beyond_the_limit_are_shed():
+    async def test(client, limiter, app):
+        held = await hold(client, limiter, 8)
+
+        response = await client.get(f"{API}/users/1")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert limiter.in_flight == 8  # Shed without being admitted
+
+        app.released.set()
+        assert [task.status_code for task in await asyncio.gather(*held)] == [200] * 8
+        assert (await client.get(f"{API}/users/1")).status_code == 200
+
+    scenario(test)
+
+
+def test_higher_lanes_are_admitted_where_lower_ones_are_shed():
+    async def test(client, limiter, app):
+        held = await hold(client, limiter, 5)
+        assert (await client.get(f"{API}/users/stats/overview")).status_code == 503
+        assert (await client.get(f"{API}/users/")).status_code == 503
+
+        held += await hold(client, limiter, 3)  # normal: up to 8
+        assert (await client.get(f"{API}/users/1")).status_code == 503
+
+        held += await hold(client, limiter, 2, "POST", f"{API}/auth/login")  # critical: up to 10
+        assert (await client.post(f"{API}/auth/login")).status_code == 503
+
+        app.released.set()
+        await asyncio.gather(*held)
+
+    scenario(test)
+
+
+@pytest.mark.parametrize("path", ["/health", "/ready", "/metrics"])
+def test_probes_and_metrics_bypass_the_limiter(path):
+    async def test(client, limiter, app):
+        held = await hold(client, limiter, LIMIT, "POST", f"{API}/auth/login")
+        assert (await client.post(f"{API}/auth/login")).status_code == 503
+
+        response = await client.get(path)
+        assert response.status_code == 200
+        assert limiter.rtts == []  # Not counted either
+
+        app.released.set()
+        await asyncio.gather(*held)
+
+    scenario(test)
+
+
+def test_server_errors_are_not_latency_samples():
+    async def test(client, limiter, app):
+        assert (await client.get(f"{API}/users/1", params={"status": 200})).status_code == 200
+        assert (await client.get(f"{API}/users/1", params={"status": 404})).status_code == 404
+        assert (await client.get(f"{API}/users/1", params={"status": 503})).status_code == 503
+        with pytest.raises(RuntimeError):
+            await client.get(f"{API}/users/1", params={"raise": 1})
+
+        ok, not_found, unavailable, raised = limiter.rtts
+        assert ok > 0 and not_found > 0
+        assert unavailable is None and raised is None
+        assert limiter._window_count == 2
+        assert limiter.in_flight == 0
+
+    scenario(test)
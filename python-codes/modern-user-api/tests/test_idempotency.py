@@ -0,0 +1,159 @@
+"""
+Idempotency-Key replay on POST /auth/register and POST /users (memory store).
+A slowed-down UserService.create_user stands in for a request still in progress.
+"""
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.config import settings
+from app.services.user import UserService
+from tests.conftest import PASSWORD, api, make_superuser, register
+
+
+def registration() -> dict:
+    name = f"idem{uuid.uuid4().hex[:12]}"
+    return {
+        "email": f"{name}@example.com",
+        "username": name,
+        "password": PASSWORD,
+        "confirm_password": PASSWORD,
+    }
+
+
+def key_header() -> dict:
+    return {"Idempotency-Key": uuid.uuid4().hex}
+
+
+class CreateUserCalls(list):
+    """Emails UserService.create_user was called with."""
+    delay = 0.0  # Seconds each call takes first
+    failures = 0  # Calls to fail with an unexpected error
+
+
+@pytest.fixture
+def create_user_calls(monkeypatch) -> CreateUserCalls:
+    calls = CreateUserCalls()
+    original = UserService.create_user
+
+    async def create_user(self, user_data):
+        calls.append(user_data.email)
+        await asyncio.sleep(calls.delay)
+        if calls.failures:
+            calls.failures -= 1
+            raise RuntimeError("database went away")
+        return await original(self, user_data)
+
+    monkeypatch.setattr(UserService, "create_user", create_user)
+    return calls
+
+
+def test_replay_returns_the_stored_response(client, create_user_calls):
+    body, headers = registration(), key_header()
+
+    first = client.post(api("/auth/register"), json=body, headers=headers)
+    assert first.status_code == 201, first.text
+    assert "idempotent-replayed" not in first.headers
+
+    second = client.post(api("/auth/register"), json=body, headers=headers)
+    assert second.status_code == 201, second.text
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json() == first.json()
+    assert len(create_user_calls) == 1
+
+
+def test_key_reused_with_another_body_is_rejected(client, create_user_calls):
+    headers = key_header()
+    assert client.post(api("/auth/register"), json=registration(), headers=headers).status_code == 201
+
+    response = client.post(api("/auth/register"), json=registration(), headers=headers)
+    assert response.status_code == 422, response.text
+    assert "different request body" in response.json()["detail"]
+    assert len(create_user_calls) == 1
+
+
+def post_concurrently(client, body: dict, headers: dict, head_start: float) -> list:
+    """POST the same request twice, the second ``head_start`` seconds later."""
+    def post(delay: float):
+        time.sleep(delay)
+        return client.post(api("/auth/register"), json=body, headers=headers)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        return list(pool.map(post, [0.0, head_start]))
+
+
+def test_concurrent_duplicate_waits_for_the_original(client, create_user_calls):
+    create_user_calls.delay = 0.5
+    original, duplicate = post_concurrently(client, registration(), key_header(), head_start=0.1)
+
+    assert original.status_code == 201, original.text
+    assert "idempotent-replayed" not in original.headers
+    assert duplicate.status_code == 201, duplicate.text
+    assert duplicate.headers["idempotent-replayed"] == "true"
+    assert duplicate.json() == original.json()
+    assert len(create_user_calls) == 1
+
+
+def test_concurrent_duplicate_gives_up_after_the_wait_timeout(client, create_user_calls, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_TIMEOUT", 0.1)
+    create_user_calls.delay = 0.6
+    original, duplicate = post_concurrently(client, registration(), key_header(), head_start=0.1)
+
+    assert original.status_code == 201, original.text
+    assert duplicate.status_code == 409, duplicate.text
+    assert len(create_user_calls) == 1
+
+
+def test_server_errors_are_not_stored(client, create_user_calls):
+    body, headers = registration(), key_header()
+    create_user_calls.failures = 1
+
+    response = client.post(api("/auth/register"), json=body, headers=headers)
+    assert response.status_code == 500, response.text
+
+    retry = client.post(api("/auth/register"), json=body, headers=headers)
+    assert retry.status_code == 201, retry.text
+    assert "idempotent-replayed" not in retry.headers
+    assert len(create_user_calls) == 2
+
+
+def test_auth_failures_are_not_stored(client):
+    body, headers = registration(), key_header()
+
+    for _ in range(2):
+        response = client.post(
+            api("/users/"), json=body, headers={**headers, "Authorization": "Bearer not-a-token"}
+        )
+        assert response.status_code == 401, response.text
+        assert "idempotent-replayed" not in response.headers
+
+    # 403, then the same caller is made a superuser: the retry runs afresh
+    caller = register(client)
+    token = client.post(api("/auth/login"), json={"email": caller["email"], "password": PASSWORD})
+    headers["Authorization"] = f"Bearer {token.json()['access_token']}"
+    response = client.post(api("/users/"), json=body, headers=headers)
+    assert response.status_code == 403, response.text
+
+    make_superuser(client, caller["id"])
+    response = client.post(api("/users/"), json=body, headers=headers)
+    assert response.status_code == 201, response.text
+    assert "idempotent-replayed" not in response.headers
+
+
+def test_rendered_http_errors_are_replayed(client, create_user_calls):
+    body = registration()
+    assert client.post(api("/auth/register"), json=body).status_code == 201
+
+    headers = key_header()
+    first = client.post(api("/auth/register"), json=body, headers=headers)
+    assert first.status_code == 400, first.text
+    assert first.json()["detail"] == "Email already registered"
+
+    second = client.post(api("/auth/register"), json=body, headers=headers)
+    assert second.status_code == 400, second.text
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json() == first.json()
+    assert len(create_user_calls) == 2
@@ -0,0 +1,58 @@
+"""
+Invalidation bus tests: user caches of separate buses stay coherent.
+Two unix socket buses stand in for two workers of one host.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from app.core.invalidation import UnixSocketInvalidationBus
+from app.models.user import User
+from app.services.user_cache import UserCache, user_version
+
+
+def make_user(user_id: int, updated_at: datetime) -> User:
+    return User(id=user_id, email=f"user{user_id}@example.com", username=f"user{user_id}",
+                updated_at=updated_at, last_login=None)
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_buses_evict_each_others_cache_entries(tmp_path):
+    async def scenario():
+        buses = [UnixSocketInvalidationBus(str(tmp_path)) for _ in range(2)]
+        caches = [UserCache(max_entries=100, ttl=60.0) for _ in buses]
+        for bus, cache in zip(buses, caches):
+            bus.subscribe(cache.invalidate, cache.clear)
+            await bus.start()
+        try:
+            await wait_for(lambda: len(list(tmp_path.glob("*.sock"))) == 2)
+
+            loaded = datetime(2026, 1, 1)
+            for cache in caches:
+                cache.put(make_user(1, loaded), cache.epoch)
+                cache.put(make_user(2, loaded), cache.epoch)
+
+            # Worker 0 changes user 1, worker 1 changes user 2
+            changed = user_version(make_user(0, loaded + timedelta(seconds=1)))
+            await buses[0].publish(1, changed)
+            await buses[1].publish(2, changed)
+
+            await wait_for(lambda: all(cache.get(1) is None for cache in caches))
+            await wait_for(lambda: all(cache.get(2) is None for cache in caches))
+
+            # An older version (a late event) leaves a fresher entry alone
+            epoch = caches[1].epoch
+            caches[1].put(make_user(1, loaded + timedelta(seconds=2)), epoch)
+            await buses[0].publish(1, changed)
+            await wait_for(lambda: caches[1].epoch > epoch)
+            assert caches[1].get(1) is not None
+        finally:
+            for bus in buses:
+                await bus.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,25 @@
+"""
+Startup and shutdown of the app, more than once per process.
+"""
+from fastapi.testclient import TestClient
+
+from app.core.lifecycle import lifecycle
+from tests.conftest import register
+
+
+def test_app_serves_again_after_a_restart():
+    from app.main import create_app
+
+    app = create_app()
+    for _ in range(2):
+        with TestClient(app, base_url="http://localhost") as client:
+            response = client.get("/ready")
+            assert response.status_code == 200, response.text
+            assert response.json() == {"status": "ready"}
+            register(client)
+        assert lifecycle.draining and not lifecycle.ready
+
+    # A new app in the same process starts afresh too
+    with TestClient(create_app(), base_url="http://localhost") as client:
+        register(client)
+    assert lifecycle.in_flight == 0
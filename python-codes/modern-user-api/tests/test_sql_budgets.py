@@ -0,0 +1,163 @@
+"""
+SQL statement budgets of the v1 routes, enforced (SQL_BUDGET_MODE=raise).
+Every route is called once on its normal path; running over budget fails the request.
+
+Budgets are only checked when the endpoint succeeds, so each call here
+is one that should succeed. The user cache is off (one worker is not
+guaranteed), so every authenticated call pays its auth lookup.
+"""
+from tests.conftest import PASSWORD, api, archive_deleted, login, register
+
+
+# Auth
+
+def test_register(client):
+    register(client)
+
+
+def test_availability(client, user):
+    response = client.get(api("/auth/availability"), params={"email": user["email"], "username": "free-name"})
+    assert response.status_code == 200, response.text
+
+
+def test_login(client, user):
+    login(client, user["email"])
+
+
+def test_login_form(client, user):
+    response = client.post(api("/auth/login/form"), data={"username": user["email"], "password": PASSWORD})
+    assert response.status_code == 200, response.text
+
+
+def test_me(client, user):
+    response = client.get(api("/auth/me"), headers=user["headers"])
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == user["id"]
+
+
+def test_update_me(client, user):
+    response = client.put(
+        api("/auth/me"), headers=user["headers"],
+        json={"full_name": "Renamed", "username": f"{user['username']}new"},
+    )
+    assert response.status_code == 200, response.text
+
+
+def test_change_password(client, user):
+    response = client.post(api("/auth/change-password"), headers=user["headers"], json={
+        "current_password": PASSWORD,
+        "new_password": "Passw0rdY",
+        "confirm_new_password": "Passw0rdY",
+    })
+    assert response.status_code == 200, response.text
+
+
+def test_refresh(client, user):
+    response = client.post(api("/auth/refresh"), headers=user["headers"])
+    assert response.status_code == 200, response.text
+
+
+def test_logout(client, user):
+    response = client.post(api("/auth/logout"), headers=user["headers"])
+    assert response.status_code == 200, response.text
+
+
+# Users
+
+def test_list_users(client, admin_headers, user):
+    response = client.get(api("/users/"), headers=admin_headers, params={"search": user["username"]})
+    assert response.status_code == 200, response.text
+    assert [found["id"] for found in response.json()["users"]] == [user["id"]]
+
+
+def test_create_user(client, admin_headers):
+    response = client.post(api("/users/"), headers=admin_headers, json={
+        "email": "created@example.com",
+        "username": "created",
+        "password": PASSWORD,
+        "confirm_password": PASSWORD,
+    })
+    assert response.status_code == 201, response.text
+
+
+def test_changes(client, admin_headers, user):
+    response = client.get(api("/users/changes"), headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert user["id"] in [change["id"] for change in response.json()["changes"]]
+
+
+def test_batch_get(client, admin_headers, user):
+    other = register(client)
+    ids = [user["id"], other["id"], 10**9]
+    response = client.post(api("/users/batch-get"), headers=admin_headers, json={"ids": ids})
+    assert response.status_code == 200, response.text
+    assert response.json()["missing"] == [10**9]
+
+    response = client.get(
+        api("/users/batch-get"), headers=admin_headers, params={"ids": ",".join(map(str, ids))}
+    )
+    assert response.status_code == 200, response.text
+    assert len(response.json()["users"]) == 2
+
+
+def test_get_user(client, user):
+    response = client.get(api(f"/users/{user['id']}"), headers=user["headers"])
+    assert response.status_code == 200, response.text
+
+
+def test_update_user(client, admin_headers, user):
+    response = client.put(
+        api(f"/users/{user['id']}"), headers=admin_headers,
+        json={"email": f"moved-{user['email']}", "username": f"{user['username']}moved"},
+    )
+    assert response.status_code == 200, response.text
+
+
+def test_delete_and_restore(client, admin_headers, user):
+    response = client.delete(api(f"/users/{user['id']}"), headers=admin_headers)
+    assert response.status_code == 200, response.text
+
+    response = client.post(api(f"/users/{user['id']}/restore"), headers=admin_headers)
+    assert response.status_code == 200, response.text
+
+
+def test_restore_archived(client, admin_headers, user):
+    response = client.delete(api(f"/users/{user['id']}"), headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert archive_deleted(client) >= 1
+
+    response = client.post(api(f"/users/{user['id']}/restore"), headers=admin_headers)
+    assert response.status_code == 200, response.text
+    login(client, user["email"])
+
+
+def test_deactivate_and_activate(client, admin_headers, user):
+    for action in ("deactivate", "activate"):
+        response = client.post(api(f"/users/{user['id']}/{action}"), headers=admin_headers)
+        assert response.status_code == 200, response.text
+
+
+def test_stats(client, admin_headers):
+    response = client.get(api("/users/stats/overview"), headers=admin_headers)
+    assert response.status_code == 200, response.text
+
+
+# Admin
+
+def test_pool(client, admin_headers):
+    response = client.get(api("/admin/pool"), headers=admin_headers)
+    assert response.status_code == 200, response.text
+
+
+def test_query_log(client, admin_headers):
+    response = client.put(api("/admin/query-log/explain"), headers=admin_headers, params={"enabled": True})
+    assert response.status_code == 200, response.text
+    try:
+        response = client.get(api("/admin/query-log"), headers=admin_headers)
+        assert response.status_code == 200, response.text
+
+        # EXPLAIN is PostgreSQL only; the auth lookup still ran
+        response = client.post(api("/admin/query-log/explain"), headers=admin_headers)
+        assert response.status_code == 400, response.text
+    finally:
+        client.put(api("/admin/query-log/explain"), headers=admin_headers, params={"enabled": False})
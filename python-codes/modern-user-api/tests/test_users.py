@@ -0,0 +1,89 @@
+"""
+User service behaviour through the v1 API.
+"""
+from datetime import datetime
+
+from tests.conftest import PASSWORD, api, archive_deleted, login, register, run
+
+
+async def _insert_user(email: str, username: str) -> None:
+    """Insert a user behind the app's back (as another worker would)."""
+    from app.database import async_session_maker
+    from app.models.user import User
+
+    now = datetime.utcnow()
+    async with async_session_maker() as session:
+        session.add(User(email=email, username=username, hashed_password="x", created_at=now, updated_at=now))
+        await session.commit()
+
+
+def test_update_reports_the_name_that_collided(client, admin_headers, user):
+    # Not in this worker's availability filter: only the unique constraint catches it
+    name = f"{user['username']}taken"
+    run(client, _insert_user, f"{name}@example.com", name)
+
+    for body, detail in (
+        ({"username": name}, "Username already taken"),
+        ({"email": f"{name}@example.com"}, "Email already registered"),
+        ({"email": f"{name}@example.com", "username": name}, "Email already registered"),
+    ):
+        response = client.put(api(f"/users/{user['id']}"), headers=admin_headers, json=body)
+        assert response.status_code == 400, response.text
+        assert response.json()["detail"] == detail
+
+    # The user's own names are no collision
+    response = client.put(
+        api(f"/users/{user['id']}"), headers=admin_headers,
+        json={"email": user["email"], "username": user["username"], "full_name": "Same Names"},
+    )
+    assert response.status_code == 200, response.text
+
+
+def test_register_reports_the_name_that_collided(client):
+    name = f"{register(client)['username']}taken"
+    run(client, _insert_user, f"{name}@example.com", name)
+
+    response = client.post(api("/auth/register"), json={
+        "email": f"other-{name}@example.com",
+        "username": name,
+        "password": PASSWORD,
+        "confirm_password": PASSWORD,
+    })
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Username already taken"
+
+
+def test_login_is_not_a_change(client, admin_headers, user):
+    before = client.get(api("/auth/me"), headers=user["headers"]).json()
+    feed = client.get(api("/users/changes"), headers=admin_headers).json()
+
+    login(client, user["email"])
+
+    after = client.get(api("/auth/me"), headers=user["headers"]).json()
+    assert after["login_count"] == before["login_count"] + 1
+    assert after["updated_at"] == before["updated_at"]
+    changes = client.get(api("/users/changes"), headers=admin_headers, params={"since": feed["next_cursor"]})
+    assert user["id"] not in [change["id"] for change in changes.json()["changes"]]
+
+
+def test_restore_of_archived_user_whose_name_was_taken(client, admin_headers, user):
+    assert client.delete(api(f"/users/{user['id']}"), headers=admin_headers).status_code == 200
+    archive_deleted(client)
+
+    # Archival freed the email; its new holder is soft deleted, but still holds it
+    response = client.post(api("/auth/register"), json={
+        "email": user["email"],
+        "username": f"{user['username']}again",
+        "password": PASSWORD,
+        "confirm_password": PASSWORD,
+    })
+    assert response.status_code == 201, response.text
+    assert client.delete(api(f"/users/{response.json()['id']}"), headers=admin_headers).status_code == 200
+
+    response = client.post(api(f"/users/{user['id']}/restore"), headers=admin_headers)
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Email already registered"
+
+    # Still archived, so it can be restored once the name is free again
+    response = client.get(api(f"/users/{user['id']}"), headers=admin_headers)
+    assert response.status_code == 404, response.text
@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from . import crud_async as crud, schemas
+from .database import get_async_db
+from .limits import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+# Endpoints for DB_MODE=async: same paths and responses as the sync ones in
+# main.py, but awaiting asyncpg on the event loop instead of blocking a
+# threadpool thread on psycopg2
+router = APIRouter()
+
+# GET /api/users - Get all users
+@router.get("/api/users", response_model=List[schemas.User])
+async def get_users(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    users = await crud.get_users(db, skip=skip, limit=limit)
+    return users
+
+# Fixed paths first: /api/users/{user_id} would otherwise match them (422)
+# GET /api/users/search?name=xxx - Search users by name
+@router.get("/api/users/search", response_model=List[schemas.User])
+async def search_users(
+    name: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    users = await crud.search_users_by_name(db, name=name, skip=skip, limit=limit)
+    return users
+
+# GET /api/users/count - Get user count
+@router.get("/api/users/count")
+async def get_user_count(db: AsyncSession = Depends(get_async_db)):
+    count = await crud.get_user_count(db)
+    return {"count": count}
+
+# GET /api/users/{user_id} - Get user by ID
+@router.get("/api/users/{user_id}", response_model=schemas.User)
+async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_user = await crud.get_user(db, user_id=user_id)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return db_user
+
+# GET /api/users/email/{email} - Get user by email
+@router.get("/api/users/email/{email}", response_model=schemas.User)
+async def get_user_by_email(email: str, db: AsyncSession = Depends(get_async_db)):
+    db_user = await crud.get_user_by_email(db, email=email)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return db_user
+
+# POST /api/users - Create new user
+@router.post("/api/users", response_model=schemas.User, status_code=201)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    # Check if user with email already exists
+    db_user = await crud.get_user_by_email(db, email=user.email)
+    if db_user:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    return await crud.create_user(db=db, user=user)
+
+# PUT /api/users/{user_id} - Update user
+@router.put("/api/users/{user_id}", response_model=schemas.User)
+async def update_user(user_id: int, user: schemas.UserUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await crud.update_user(db, user_id=user_id, user=user)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return db_user
+
+# DELETE /api/users/{user_id} - Delete user
+@router.delete("/api/users/{user_id}")
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await crud.delete_user(db, user_id=user_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"message": "User deleted successfully"}
@@ -10,10 +10,17 @@ def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.email == email).first()
 
 def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[models.User]:
-    return db.query(models.User).offset(skip).limit(limit).all()
-
-def search_users_by_name(db: Session, name: str) -> List[models.User]:
-    return db.query(models.User).filter(models.User.name.ilike(f"%{name}%")).all()
+    return db.query(models.User).order_by(models.User.id).offset(skip).limit(limit).all()
+
+def search_users_by_name(db: Session, name: str, skip: int = 0, limit: int = 100) -> List[models.User]:
+    return (
+        db.query(models.User)
+        .filter(models.User.name.ilike(f"%{name}%"))
+        .order_by(models.User.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
 
 def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     db_user = models.User(name=user.name, email=user.email)
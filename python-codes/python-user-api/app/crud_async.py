@@ -0,0 +1,57 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from . import models, schemas
+from typing import List, Optional
+
+# Async twin of crud.py: same queries, awaited on an AsyncSession
+
+async def get_user(db: AsyncSession, user_id: int) -> Optional[models.User]:
+    return await db.get(models.User, user_id)
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
+    result = await db.execute(select(models.User).where(models.User.email == email).limit(1))
+    return result.scalars().first()
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[models.User]:
+    result = await db.execute(select(models.User).order_by(models.User.id).offset(skip).limit(limit))
+    return list(result.scalars())
+
+async def search_users_by_name(db: AsyncSession, name: str, skip: int = 0, limit: int = 100) -> List[models.User]:
+    result = await db.execute(
+        select(models.User)
+        .where(models.User.name.ilike(f"%{name}%"))
+        .order_by(models.User.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(result.scalars())
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate) -> models.User:
+    db_user = models.User(name=user.name, email=user.email)
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_user(db: AsyncSession, user_id: int, user: schemas.UserUpdate) -> Optional[models.User]:
+    db_user = await db.get(models.User, user_id)
+    if db_user:
+        if user.name is not None:
+            db_user.name = user.name
+        if user.email is not None:
+            db_user.email = user.email
+        await db.commit()
+        await db.refresh(db_user)
+    return db_user
+
+async def delete_user(db: AsyncSession, user_id: int) -> bool:
+    db_user = await db.get(models.User, user_id)
+    if db_user:
+        await db.delete(db_user)
+        await db.commit()
+        return True
+    return False
+
+async def get_user_count(db: AsyncSession) -> int:
+    result = await db.execute(select(func.count(models.User.id)))
+    return result.scalar()
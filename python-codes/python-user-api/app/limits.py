@@ -0,0 +1,77 @@
+import asyncio
+import os
+from fastapi.responses import JSONResponse
+from prometheus_client import Counter, Gauge
+from .database import POOL_CAPACITY
+
+# At most MAX_CONCURRENCY /api requests run at once (default: one per pooled
+# connection); up to REQUEST_QUEUE_SIZE more wait for a slot, each for at most
+# REQUEST_QUEUE_TIMEOUT seconds. Anything beyond that gets 503 + Retry-After
+# right away instead of queueing in the threadpool or the pool until the
+# client gives up.
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", str(POOL_CAPACITY)))
+REQUEST_QUEUE_SIZE = int(os.getenv("REQUEST_QUEUE_SIZE", "50"))
+REQUEST_QUEUE_TIMEOUT = float(os.getenv("REQUEST_QUEUE_TIMEOUT", "5"))
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "1"))
+
+# Hard cap on list/search page size
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+# Page size when the client gives no limit; never above the cap
+DEFAULT_PAGE_SIZE = min(100, MAX_PAGE_SIZE)
+
+REQUESTS_IN_FLIGHT = Gauge("api_requests_in_flight", "API requests holding a concurrency slot")
+REQUEST_QUEUE_DEPTH = Gauge("api_request_queue_depth", "API requests waiting for a concurrency slot")
+REQUESTS_REJECTED = Counter(
+    "api_requests_rejected_total", "API requests shed with 503", ["reason"]
+)
+
+
+class ConcurrencyLimitMiddleware:
+    # Bounded admission queue in front of the /api routes
+
+    def __init__(self, app, limit: int = MAX_CONCURRENCY, queue_size: int = REQUEST_QUEUE_SIZE,
+                 queue_timeout: float = REQUEST_QUEUE_TIMEOUT, prefix: str = "/api/"):
+        self.app = app
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.prefix = prefix
+        self.slots = asyncio.Semaphore(limit)
+        self.waiting = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        if self.slots.locked():
+            if self.waiting >= self.queue_size:
+                await self.reject("queue_full", scope, receive, send)
+                return
+            self.waiting += 1
+            REQUEST_QUEUE_DEPTH.set(self.waiting)
+            try:
+                await asyncio.wait_for(self.slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                await self.reject("queue_timeout", scope, receive, send)
+                return
+            finally:
+                self.waiting -= 1
+                REQUEST_QUEUE_DEPTH.set(self.waiting)
+        else:
+            await self.slots.acquire()
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            self.slots.release()
+
+    async def reject(self, reason: str, scope, receive, send):
+        REQUESTS_REJECTED.labels(reason).inc()
+        response = JSONResponse(
+            {"detail": "Server is busy, retry later"},
+            status_code=503,
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+        await response(scope, receive, send)
@@ -1,37 +1,87 @@
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+from anyio import to_thread
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, Query, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from sqlalchemy.orm import Session
 from typing import List
 from . import crud, models, schemas
-from .database import SessionLocal, engine, get_db
+from .database import DB_MODE, SessionLocal, async_engine, engine, get_db
+from .limits import DEFAULT_PAGE_SIZE, MAX_CONCURRENCY, MAX_PAGE_SIZE, ConcurrencyLimitMiddleware
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create database tables
+    if DB_MODE == "async":
+        async with async_engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+    else:
+        models.Base.metadata.create_all(bind=engine)
+        # One worker thread per admitted request: extra threads would only
+        # block waiting for a pooled connection
+        to_thread.current_default_thread_limiter().total_tokens = MAX_CONCURRENCY
+    yield
+    if DB_MODE == "async":
+        await async_engine.dispose()
+    engine.dispose()
 
 # Create FastAPI app
 app = FastAPI(
     title="User Management API",
     description="A simple User Management API built with FastAPI and PostgreSQL",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-# Root endpoint
+app.add_middleware(ConcurrencyLimitMiddleware)
+
+# Root endpoint (async: never waits for a worker thread)
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Welcome to User Management API"}
 
 # Health check
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "healthy"}
 
+# Prometheus metrics (in-flight, queue depth, rejections)
+@app.get("/metrics")
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+# Endpoints for DB_MODE=sync; the async twins are in async_api.py
+sync_router = APIRouter()
+
 # GET /api/users - Get all users
-@app.get("/api/users", response_model=List[schemas.User])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@sync_router.get("/api/users", response_model=List[schemas.User])
+def get_users(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
     users = crud.get_users(db, skip=skip, limit=limit)
     return users
 
+# Fixed paths first: /api/users/{user_id} would otherwise match them (422)
+# GET /api/users/search?name=xxx - Search users by name
+@sync_router.get("/api/users/search", response_model=List[schemas.User])
+def search_users(
+    name: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    users = crud.search_users_by_name(db, name=name, skip=skip, limit=limit)
+    return users
+
+# GET /api/users/count - Get user count
+@sync_router.get("/api/users/count")
+def get_user_count(db: Session = Depends(get_db)):
+    count = crud.get_user_count(db)
+    return {"count": count}
+
 # GET /api/users/{user_id} - Get user by ID
-@app.get("/api/users/{user_id}", response_model=schemas.User)
+@sync_router.get("/api/users/{user_id}", response_model=schemas.User)
 def get_user(user_id: int, db: Session = Depends(get_db)):
     db_user = crud.get_user(db, user_id=user_id)
     if db_user is None:
@@ -39,21 +89,15 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
     return db_user
 
 # GET /api/users/email/{email} - Get user by email
-@app.get("/api/users/email/{email}", response_model=schemas.User)
+@sync_router.get("/api/users/email/{email}", response_model=schemas.User)
 def get_user_by_email(email: str, db: Session = Depends(get_db)):
     db_user = crud.get_user_by_email(db, email=email)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
-# GET /api/users/search?name=xxx - Search users by name
-@app.get("/api/users/search", response_model=List[schemas.User])
-def search_users(name: str, db: Session = Depends(get_db)):
-    users = crud.search_users_by_name(db, name=name)
-    return users
-
 # POST /api/users - Create new user
-@app.post("/api/users", response_model=schemas.User, status_code=201)
+@sync_router.post("/api/users", response_model=schemas.User, status_code=201)
 def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     # Check if user with email already exists
     db_user = crud.get_user_by_email(db, email=user.email)
@@ -62,7 +106,7 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     return crud.create_user(db=db, user=user)
 
 # PUT /api/users/{user_id} - Update user
-@app.put("/api/users/{user_id}", response_model=schemas.User)
+@sync_router.put("/api/users/{user_id}", response_model=schemas.User)
 def update_user(user_id: int, user: schemas.UserUpdate, db: Session = Depends(get_db)):
     db_user = crud.update_user(db, user_id=user_id, user=user)
     if db_user is None:
@@ -70,18 +114,18 @@ def update_user(user_id: int, user: schemas.UserUpdate, db: Session = Depends(ge
     return db_user
 
 # DELETE /api/users/{user_id} - Delete user
-@app.delete("/api/users/{user_id}")
+@sync_router.delete("/api/users/{user_id}")
 def delete_user(user_id: int, db: Session = Depends(get_db)):
     success = crud.delete_user(db, user_id=user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deleted successfully"}
 
-# GET /api/users/count - Get user count
-@app.get("/api/users/count")
-def get_user_count(db: Session = Depends(get_db)):
-    count = crud.get_user_count(db)
-    return {"count": count}
+if DB_MODE == "async":
+    from .async_api import router as async_router
+    app.include_router(async_router)
+else:
+    app.include_router(sync_router)
 
 # Error handlers
 @app.exception_handler(Exception)
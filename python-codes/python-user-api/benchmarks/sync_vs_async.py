@@ -0,0 +1,158 @@
+"""
+Side-by-side load test of DB_MODE=sync and DB_MODE=async.
+
+Starts uvicorn once per mode against the same database, seeds users if
+needed, then drives each concurrency level with the same request mix
+(GET by id, GET by email, list) and prints throughput and latency.
+
+Needs httpx on top of requirements.txt:
+    pip install httpx
+    python benchmarks/sync_vs_async.py --concurrency 1 16 64 256 --requests 4000
+
+DATABASE_URL is read from the environment / .env as by the app itself.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def start_server(mode: str, port: int, args: argparse.Namespace) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DB_MODE": mode,
+        "DB_POOL_SIZE": str(args.pool_size),
+        "DB_MAX_OVERFLOW": str(args.max_overflow),
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        cwd=PROJECT_DIR,
+        env=env,
+    )
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def seed(client: httpx.AsyncClient, count: int) -> list:
+    users = []
+    while len(users) < count:
+        page = (await client.get("/api/users", params={"skip": len(users), "limit": 100})).json()
+        users.extend(page)
+        if len(page) < 100:
+            break
+    users = users[:count]
+    for i in range(len(users), count):
+        response = await client.post(
+            "/api/users", json={"name": f"Bench User {i}", "email": f"bench{i}@example.com"}
+        )
+        if response.status_code == 201:
+            users.append(response.json())
+    return users
+
+
+async def run_level(client: httpx.AsyncClient, users: list, concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    remaining = total
+
+    async def one_request() -> None:
+        nonlocal errors
+        user = random.choice(users)
+        pick = random.random()
+        if pick < 0.6:
+            url = f"/api/users/{user['id']}"
+        elif pick < 0.9:
+            url = f"/api/users/email/{user['email']}"
+        else:
+            url = "/api/users?limit=20"
+        started = time.perf_counter()
+        try:
+            response = await client.get(url)
+            if response.status_code != 200:
+                errors += 1
+        except httpx.HTTPError:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await one_request()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+async def bench_mode(mode: str, args: argparse.Namespace) -> dict:
+    server = start_server(mode, args.port, args)
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60.0
+        ) as client:
+            await wait_until_up(client)
+            users = await seed(client, args.users)
+            await run_level(client, users, max(args.concurrency), args.requests // 4)  # warm-up
+            return {
+                concurrency: await run_level(client, users, concurrency, args.requests)
+                for concurrency in args.concurrency
+            }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main(args: argparse.Namespace) -> None:
+    results = {mode: await bench_mode(mode, args) for mode in args.modes}
+
+    print(f"{'mode':<7}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for concurrency in args.concurrency:
+        for mode in args.modes:
+            row = results[mode][concurrency]
+            print(
+                f"{mode:<7}{concurrency:>6}{row['rps']:>10.1f}{row['p50_ms']:>10.2f}"
+                f"{row['p99_ms']:>10.2f}{row['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark DB_MODE=sync against DB_MODE=async")
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 16, 64, 256])
+    parser.add_argument("--requests", type=int, default=4000, help="Requests per concurrency level")
+    parser.add_argument("--users", type=int, default=1000, help="Users to seed")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--max-overflow", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))